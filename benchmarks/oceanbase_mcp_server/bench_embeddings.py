@@ -0,0 +1,125 @@
+"""
+Compare the embedding providers of the memory tools: model load time, single query latency,
+batch throughput, and how close the int8 ONNX embeddings are to the reference ones.
+
+    python benchmarks/oceanbase_mcp_server/bench_embeddings.py \
+        --model BAAI/bge-small-en-v1.5 --providers huggingface,onnx
+
+Install the package with the memory extra (huggingface) and the onnx extra (onnx, onnx-fp32).
+--model may also be a local sentence-transformers directory, with --onnx-dir pointing at the
+directory of its ONNX export (model.onnx and tokenizer.json), as EMBEDDING_ONNX_DIR does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+SENTENCES = [
+    "User likes playing football and drinking coffee",
+    "User works at a database company in Shanghai",
+    "User prefers Python for data analysis and Go for services",
+    "User is allergic to peanuts",
+    "User's favourite movie genre is science fiction",
+    "User runs OceanBase 4.3.5 in production with three zones",
+    "User drinks green tea in the afternoon",
+    "User is learning to play the piano",
+]
+
+
+def load_provider(provider: str, model_name: str, threads: int, onnx_dir: str | None):
+    os.environ.setdefault("HF_ENDPOINT", "https://hf-mirror.com")
+    if provider == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(
+            model_name=model_name, encode_kwargs={"normalize_embeddings": True}
+        )
+    if provider == "onnx":
+        from oceanbase_mcp.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(model_name, model_dir=onnx_dir, threads=threads or None)
+    if provider == "onnx-fp32":
+        from oceanbase_mcp.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(
+            model_name, model_dir=onnx_dir, quantize=False, threads=threads or None
+        )
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q))
+
+
+def bench_provider(provider: str, args) -> tuple[dict, np.ndarray]:
+    start = time.perf_counter()
+    embeddings = load_provider(provider, args.model, args.threads, args.onnx_dir)
+    load_seconds = time.perf_counter() - start
+
+    for sentence in SENTENCES:  # warm up
+        embeddings.embed_query(sentence)
+    latencies = []
+    for i in range(args.queries):
+        start = time.perf_counter()
+        embeddings.embed_query(SENTENCES[i % len(SENTENCES)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    documents = [
+        SENTENCES[i % len(SENTENCES)] + f" #{i}" for i in range(args.documents)
+    ]
+    start = time.perf_counter()
+    embeddings.embed_documents(documents)
+    batch_seconds = time.perf_counter() - start
+
+    reference = np.asarray(embeddings.embed_documents(SENTENCES), dtype=np.float32)
+    return {
+        "provider": provider,
+        "load_s": load_seconds,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p99_ms": percentile(latencies, 99),
+        "docs_per_s": len(documents) / batch_seconds,
+    }, reference
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--providers", default="huggingface,onnx")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=512)
+    parser.add_argument(
+        "--threads", type=int, default=0, help="ONNX intra-op threads, 0: auto"
+    )
+    parser.add_argument("--onnx-dir", help="local ONNX export of the model")
+    args = parser.parse_args()
+
+    results = []
+    vectors = {}
+    for provider in args.providers.split(","):
+        provider = provider.strip()
+        result, vectors[provider] = bench_provider(provider, args)
+        results.append(result)
+
+    baseline = results[0]["provider"]
+    header = f"{'provider':<12} {'load s':>8} {'p50 ms':>8} {'p99 ms':>8} {'docs/s':>9} {'cos':>7}"
+    print(f"model: {args.model}, cosine similarity against {baseline}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        # Embeddings are normalized, the row-wise dot product is the cosine similarity.
+        cosine = float(
+            np.mean(np.sum(vectors[baseline] * vectors[result["provider"]], axis=1))
+        )
+        print(
+            f"{result['provider']:<12} {result['load_s']:>8.2f} {result['query_p50_ms']:>8.2f} "
+            f"{result['query_p99_ms']:>8.2f} {result['docs_per_s']:>9.1f} {cosine:>7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measure the cold import time of the server with `python -X importtime` and fail when it
+exceeds a budget, or when a dependency that tools import lazily is loaded at startup.
+
+    python benchmarks/oceanbase_mcp_server/bench_import_time.py --runs 7 --budget-ms 150
+
+The budget applies to the server's own share: the cumulative import time of
+oceanbase_mcp.server minus that of the mcp SDK, which every MCP server pays anyway.
+Run it with the package installed (or src/oceanbase_mcp_server on PYTHONPATH).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_MODULE = "oceanbase_mcp.server"
+SDK_MODULE = "mcp.server.fastmcp"
+# Loaded on first use by the tools that need them, never by importing the server.
+LAZY_MODULES = ("bs4", "pyobvector", "sqlalchemy", "mysql.connector", "numpy")
+
+
+def import_profile() -> dict[str, tuple[int, int]]:
+    """{module: (self us, cumulative us)} of one import of the server in a fresh interpreter."""
+    env = {**os.environ, "ENABLE_MEMORY": "0", "PYTHONDONTWRITEBYTECODE": "1"}
+    # The server reads its connection settings at import, it never connects here.
+    env.setdefault("OB_USER", "root")
+    env.setdefault("OB_PASSWORD", "testpassword")
+    env.setdefault("OB_DATABASE", "test_db")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {SERVER_MODULE}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        # Nested imports of a package's submodules can list a name twice, children are printed
+        # before their parents: keep the outermost, i.e. largest, entry.
+        entry = (int(self_us), int(cumulative_us))
+        if name not in profile or entry[1] > profile[name][1]:
+            profile[name] = entry
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=150,
+        help="budget of the server's own import time",
+    )
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args()
+
+    # The first import compiles bytecode and warms the page cache, it is not measured.
+    import_profile()
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [profile[SERVER_MODULE][1] / 1000 for profile in profiles]
+    sdk = [profile.get(SDK_MODULE, (0, 0))[1] / 1000 for profile in profiles]
+    own = [total - sdk_ms for total, sdk_ms in zip(totals, sdk)]
+
+    print(f"{SERVER_MODULE} over {args.runs} runs (median)")
+    print(f"  total import:    {statistics.median(totals):8.1f} ms")
+    print(f"  mcp SDK:         {statistics.median(sdk):8.1f} ms")
+    print(
+        f"  server's share:  {statistics.median(own):8.1f} ms (budget {args.budget_ms:.0f} ms)"
+    )
+
+    last = profiles[-1]
+    print("\nslowest modules by self time (last run):")
+    for name, (self_us, cumulative_us) in sorted(
+        last.items(), key=lambda item: item[1][0], reverse=True
+    )[: args.top]:
+        print(
+            f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}"
+        )
+
+    failures = []
+    eager = [name for name in LAZY_MODULES if name in last]
+    if eager:
+        failures.append(
+            f"imported at startup although tools import them lazily: {eager}"
+        )
+    if statistics.median(own) > args.budget_ms:
+        failures.append(
+            f"server's share of the import time {statistics.median(own):.1f} ms exceeds "
+            f"the budget of {args.budget_ms:.0f} ms"
+        )
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
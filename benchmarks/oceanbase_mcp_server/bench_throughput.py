@@ -0,0 +1,308 @@
+"""
+Throughput and latency of the server under concurrent load: execute_sql, the search tools and
+the resources are called through a real MCP transport at increasing concurrency, against the
+stand-in OceanBase of fake_mysql.py with a fixed latency per query. Reports p50/p99 latency,
+calls per second and the resident memory of the server process.
+
+    python benchmarks/oceanbase_mcp_server/bench_throughput.py \
+        --transport stdio --concurrency 1,4,16 --requests 200 --latency-ms 2
+
+Every run starts a fresh stand-in and server, so results only depend on the options and the
+machine: compare runs with --output before and after a change. Admission, pool and token
+limit settings are read by the server from the environment as usual. Run it with the package
+installed (or src/oceanbase_mcp_server on PYTHONPATH).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import anyio
+import fake_mysql
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+QUERY_VECTOR = [0.1 * i for i in range(fake_mysql.VECTOR_DIMENSION)]
+# (kind, target, arguments) of each operation, tools are called and resources read.
+OPERATIONS = {
+    "execute_sql": (
+        "tool",
+        "execute_sql",
+        {"sql": "SELECT id, name, created_at FROM bench_events LIMIT 20"},
+    ),
+    "text_search": (
+        "tool",
+        "oceanbase_text_search",
+        {
+            "table_name": "bench_docs",
+            "full_text_search_column_name": ["content"],
+            "full_text_search_expr": "synthetic",
+            "with_score": True,
+        },
+    ),
+    "vector_search": (
+        "tool",
+        "oceabase_vector_search",
+        {"table_name": "bench_docs", "vector_data": QUERY_VECTOR, "topk": 5},
+    ),
+    "hybrid_search": (
+        "tool",
+        "oceanbase_hybrid_search",
+        {
+            "table_name": "bench_docs",
+            "vector_data": QUERY_VECTOR,
+            "full_text_search_column_name": ["content"],
+            "full_text_search_expr": "synthetic",
+            "topk": 5,
+        },
+    ),
+    "tables_resource": ("resource", "oceanbase://tables", None),
+    "sample_resource": ("resource", "oceanbase://sample/bench_events", None),
+}
+
+
+def start_fake_oceanbase(
+    latency_ms: float, rows: int
+) -> tuple[multiprocessing.Process, int]:
+    """The stand-in in its own process, so that it does not compete with the client's loop."""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=fake_mysql.run,
+        kwargs={"latency_ms": latency_ms, "rows": rows, "ready": ready},
+        daemon=True,
+    )
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def server_env(ob_port: int) -> dict:
+    return {
+        **os.environ,
+        "OB_HOST": "127.0.0.1",
+        "OB_PORT": str(ob_port),
+        "OB_USER": "bench",
+        "OB_PASSWORD": "bench",
+        "OB_DATABASE": "bench",
+        "ENABLE_MEMORY": "0",
+    }
+
+
+def server_pids() -> list[int]:
+    """Child processes of this one running `python -m oceanbase_mcp`, from /proc (Linux only)."""
+    pids = []
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, IndexError, ValueError):
+            continue
+        # The stand-in is a fork of this process, with the same command line.
+        if ppid == os.getpid() and b"-m\x00oceanbase_mcp" in cmdline:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_mb(pid: int) -> tuple[float, float]:
+    """(current, peak) resident memory of a process in MB, NaN where /proc is unavailable."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return values.get("VmRSS", float("nan")), values.get("VmHWM", float("nan"))
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"The server did not listen on port {port} within {timeout}s")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def call(session: ClientSession, operation: str) -> bool:
+    """Run one operation, True when it succeeded."""
+    kind, target, arguments = OPERATIONS[operation]
+    if kind == "resource":
+        result = await session.read_resource(target)
+        text = result.contents[0].text if result.contents else ""
+        return not text.startswith("Failed")
+    result = await session.call_tool(target, arguments)
+    text = result.content[0].text if result.content else ""
+    return not result.isError and not text.startswith("Error")
+
+
+async def run_level(
+    session: ClientSession, operation: str, concurrency: int, requests: int
+):
+    """Latencies in ms and error count of requests calls, concurrency at a time."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                ok = await call(session, operation)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(worker)
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_benchmark(session: ClientSession, args) -> list[dict]:
+    await session.initialize()
+    pids = server_pids()
+    results = []
+    for operation in args.operations:
+        # Opens the pools and reflects the tables before measuring.
+        if not await call(session, operation):
+            print(f"{operation}: the warm-up call failed, is the server configured?")
+        for concurrency in args.concurrency:
+            latencies, errors, elapsed = await run_level(
+                session, operation, concurrency, args.requests
+            )
+            rss, peak = memory_mb(pids[0]) if pids else (float("nan"), float("nan"))
+            results.append(
+                {
+                    "operation": operation,
+                    "concurrency": concurrency,
+                    "calls": len(latencies),
+                    "errors": errors,
+                    "p50_ms": statistics.median(latencies),
+                    "p99_ms": statistics.quantiles(latencies, n=100)[98]
+                    if len(latencies) > 1
+                    else latencies[0],
+                    "calls_per_s": len(latencies) / elapsed,
+                    "rss_mb": rss,
+                    "peak_rss_mb": peak,
+                }
+            )
+            print_row(results[-1])
+    return results
+
+
+async def run_stdio(args, ob_port: int) -> list[dict]:
+    params = StdioServerParameters(
+        command=sys.executable, args=["-m", "oceanbase_mcp"], env=server_env(ob_port)
+    )
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                return await run_benchmark(session, args)
+
+
+async def run_sse(args, ob_port: int) -> list[dict]:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "oceanbase_mcp",
+            "--transport",
+            "sse",
+            "--port",
+            str(port),
+        ],
+        env=server_env(ob_port),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        async with sse_client(f"http://127.0.0.1:{port}/sse") as (read, write):
+            async with ClientSession(read, write) as session:
+                return await run_benchmark(session, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def print_row(row: dict):
+    print(
+        f"{row['operation']:<16} {row['concurrency']:>5} {row['calls']:>6} {row['errors']:>6} "
+        f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['calls_per_s']:>9.1f} "
+        f"{row['rss_mb']:>8.1f} {row['peak_rss_mb']:>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transport", choices=("stdio", "sse"), default="stdio")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 4, 16],
+        help="comma separated concurrent calls of each level",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="calls per level")
+    parser.add_argument(
+        "--operations",
+        type=lambda value: value.split(","),
+        default=list(OPERATIONS),
+        help=f"comma separated subset of {','.join(OPERATIONS)}",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=2.0, help="latency of each query"
+    )
+    parser.add_argument("--rows", type=int, default=20, help="rows of each SELECT")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    unknown = set(args.operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {sorted(unknown)}")
+
+    fake, ob_port = start_fake_oceanbase(args.latency_ms, args.rows)
+    print(
+        f"{args.transport} transport, {args.latency_ms} ms per query, {args.rows} rows, "
+        f"{args.requests} calls per level"
+    )
+    print(
+        f"{'operation':<16} {'conc':>5} {'calls':>6} {'errors':>6} {'p50 ms':>9} {'p99 ms':>9} "
+        f"{'calls/s':>9} {'rss MB':>8} {'peak MB':>8}"
+    )
+    try:
+        runner = run_stdio if args.transport == "stdio" else run_sse
+        results = anyio.run(runner, args, ob_port)
+    finally:
+        fake.terminate()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"options": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+A stand-in OceanBase server speaking enough of the MySQL client/server protocol for the
+benchmarks: any user and password are accepted, session statements succeed, and queries get
+synthetic results of a fixed number of rows after a configurable latency.
+
+    python benchmarks/oceanbase_mcp_server/fake_mysql.py --port 3307 --latency-ms 2 --rows 20
+
+Tables are fixed: bench_docs (id, content, vector VECTOR(8)) with a full text index on
+content, and bench_events (id, name, created_at). SELECTs return columns named after their
+select list, so the search tools, the resources and execute_sql all get well-formed results.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import re
+import struct
+
+SERVER_VERSION = "5.7.25-OceanBase_CE-v4.3.5.0"
+OB_VERSION = "4.3.5.0"
+VECTOR_DIMENSION = 8
+
+TABLES = {
+    "bench_docs": (
+        "CREATE TABLE `bench_docs` (\n"
+        "  `id` bigint NOT NULL AUTO_INCREMENT,\n"
+        "  `content` text DEFAULT NULL,\n"
+        f"  `vector` VECTOR({VECTOR_DIMENSION}) DEFAULT NULL,\n"
+        "  PRIMARY KEY (`id`),\n"
+        "  FULLTEXT KEY `ft_content` (`content`) WITH PARSER ik\n"
+        ") DEFAULT CHARSET = utf8mb4"
+    ),
+    "bench_events": (
+        "CREATE TABLE `bench_events` (\n"
+        "  `id` bigint NOT NULL AUTO_INCREMENT,\n"
+        "  `name` varchar(255) DEFAULT NULL,\n"
+        "  `created_at` datetime DEFAULT NULL,\n"
+        "  PRIMARY KEY (`id`)\n"
+        ") DEFAULT CHARSET = utf8mb4"
+    ),
+}
+TABLE_COLUMNS = {
+    "bench_docs": ["id", "content", "vector"],
+    "bench_events": ["id", "name", "created_at"],
+}
+VARIABLES = {
+    "sql_mode": "STRICT_TRANS_TABLES",
+    "lower_case_table_names": "1",
+    "transaction_isolation": "READ-COMMITTED",
+    "tx_isolation": "READ-COMMITTED",
+    "version": SERVER_VERSION,
+    "version_comment": "OceanBase_CE",
+    "character_set_client": "utf8mb4",
+    "character_set_connection": "utf8mb4",
+    "character_set_results": "utf8mb4",
+    "collation_connection": "utf8mb4_general_ci",
+    "max_allowed_packet": "16777216",
+    "autocommit": "1",
+    "ob_hnsw_ef_search": "64",
+}
+
+# Capabilities: LONG_PASSWORD, FOUND_ROWS, LONG_FLAG, CONNECT_WITH_DB, PROTOCOL_41,
+# TRANSACTIONS, SECURE_CONNECTION, MULTI_RESULTS, PLUGIN_AUTH, CONNECT_ATTRS and
+# PLUGIN_AUTH_LENENC_CLIENT_DATA. No SSL, so that clients stay in plain text.
+CAPABILITIES = (
+    0x1 | 0x2 | 0x4 | 0x8 | 0x200 | 0x2000 | 0x8000 | 0x20000 | 0x80000 | 0x100000
+)
+CAPABILITIES |= 0x200000
+UTF8MB4_GENERAL_CI = 45
+STATUS_AUTOCOMMIT = 0x0002
+
+COM_QUIT, COM_INIT_DB, COM_QUERY, COM_PING = 0x01, 0x02, 0x03, 0x0E
+COM_CHANGE_USER, COM_RESET_CONNECTION = 0x11, 0x1F
+
+TYPE_DOUBLE, TYPE_LONGLONG, TYPE_DATETIME, TYPE_VAR_STRING = 0x05, 0x08, 0x0C, 0xFD
+
+_SESSION = re.compile(
+    r"^(SET|BEGIN|START|COMMIT|ROLLBACK|USE|SAVEPOINT|RELEASE)\b", re.I
+)
+_SYSTEM_VARIABLES = re.compile(r"^SELECT\s+(@@[\w.]+(\s+AS\s+\w+)?\s*,?\s*)+$", re.I)
+_SHOW_VARIABLES = re.compile(
+    r"^SHOW\s+(?:SESSION\s+|GLOBAL\s+)?VARIABLES\s+LIKE\s+'([^']+)'", re.I
+)
+_SHOW_CREATE = re.compile(r"^SHOW\s+CREATE\s+TABLE\s+`?(?:\w+`?\.`?)?(\w+)`?", re.I)
+_SHOW_TABLES = re.compile(r"^SHOW\s+(FULL\s+)?TABLES", re.I)
+_DESCRIBE = re.compile(
+    r"^(?:DESCRIBE|DESC|SHOW\s+(?:FULL\s+)?COLUMNS\s+FROM)\s+`?(\w+)`?", re.I
+)
+_FUNCTION_CALL = re.compile(
+    r"^SELECT\s+(OB_VERSION|VERSION|DATABASE|LAST_TRACE_ID)\(\)", re.I
+)
+_LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*(?:,\s*(\d+))?\s*$", re.I)
+_HINT = re.compile(r"/\*.*?\*/", re.S)
+_ALIAS = re.compile(r"\s+AS\s+`?(\w+)`?\s*$", re.I)
+
+
+def _lenenc_int(value: int) -> bytes:
+    if value < 251:
+        return bytes([value])
+    if value < 1 << 16:
+        return b"\xfc" + struct.pack("<H", value)
+    if value < 1 << 24:
+        return b"\xfd" + struct.pack("<I", value)[:3]
+    return b"\xfe" + struct.pack("<Q", value)
+
+
+def _lenenc_str(value) -> bytes:
+    if value is None:
+        return b"\xfb"
+    data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+    return _lenenc_int(len(data)) + data
+
+
+def _ok(affected_rows: int = 0) -> bytes:
+    return (
+        b"\x00"
+        + _lenenc_int(affected_rows)
+        + b"\x00"
+        + struct.pack("<HH", STATUS_AUTOCOMMIT, 0)
+    )
+
+
+def _eof() -> bytes:
+    return b"\xfe" + struct.pack("<HH", 0, STATUS_AUTOCOMMIT)
+
+
+def _error(message: str, code: int = 1064) -> bytes:
+    return b"\xff" + struct.pack("<H", code) + b"#42000" + message.encode("utf-8")
+
+
+def _column_definition(name: str, column_type: int) -> bytes:
+    return (
+        _lenenc_str("def")
+        + _lenenc_str("bench")
+        + _lenenc_str("")
+        + _lenenc_str("")
+        + _lenenc_str(name)
+        + _lenenc_str(name)
+        + b"\x0c"
+        + struct.pack("<HIBHB", UTF8MB4_GENERAL_CI, 65535, column_type, 0, 0)
+        + b"\x00\x00"
+    )
+
+
+def _split_select_list(sql: str) -> list[str]:
+    """Top-level items of the select list of a statement, [] when it has none."""
+    sql = _HINT.sub(" ", sql).strip()
+    match = re.match(r"SELECT\s+(?:DISTINCT\s+)?", sql, re.I)
+    if not match:
+        return []
+    items, depth, quote, start = [], 0, None, match.end()
+    i = start
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and char == ",":
+            items.append(sql[start:i])
+            start = i + 1
+        elif depth == 0 and re.match(r"\sFROM\s", sql[i : i + 6], re.I):
+            break
+        i += 1
+    items.append(sql[start:i])
+    return [item.strip() for item in items if item.strip()]
+
+
+def _column_name(item: str) -> str:
+    alias = _ALIAS.search(item)
+    if alias:
+        return alias.group(1)
+    if re.fullmatch(r"[\w`.]+", item):
+        return item.rsplit(".", 1)[-1].strip("`")
+    # Expressions are named after their text, as MySQL does.
+    return item
+
+
+def _table_of(sql: str) -> str:
+    match = re.search(r"\bFROM\s+`?(?:\w+`?\.`?)?(\w+)`?", sql, re.I)
+    return match.group(1) if match else "bench_docs"
+
+
+def _value(name: str, expression: str, row: int):
+    """Type and value of a column of a synthetic row, guessed from its name and expression."""
+    lowered, expression = name.lower(), expression.lower()
+    if re.fullmatch(r"-?\d+", expression):
+        return TYPE_LONGLONG, int(expression)
+    if lowered == "id" or lowered.endswith("_id") or expression.startswith("count("):
+        return TYPE_LONGLONG, row + 1
+    if any(word in expression for word in ("distance", "score", "match")):
+        return TYPE_DOUBLE, round(0.1 + row * 0.05, 4)
+    if lowered == "created_at":
+        return TYPE_DATETIME, f"2024-01-01 00:{row % 60:02d}:00"
+    if lowered == "vector":
+        values = ",".join(f"{(row + i) % 10 / 10:.1f}" for i in range(VECTOR_DIMENSION))
+        return TYPE_VAR_STRING, f"[{values}]"
+    return TYPE_VAR_STRING, f"{name} of row {row + 1}, synthetic text for the benchmark"
+
+
+class FakeOceanBase:
+    """Answers every connection on an asyncio server, see the module docstring."""
+
+    def __init__(self, latency_ms: float = 1.0, rows: int = 20):
+        self.latency = latency_ms / 1000
+        self.rows = rows
+        self.queries = 0
+        self._connection_ids = itertools.count(1)
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 0
+    ) -> asyncio.base_events.Server:
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await self._session(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _session(self, reader, writer):
+        salt = os.urandom(20).replace(b"\x00", b"\x01")
+        handshake = (
+            b"\x0a"
+            + SERVER_VERSION.encode()
+            + b"\x00"
+            + struct.pack("<I", next(self._connection_ids))
+            + salt[:8]
+            + b"\x00"
+            + struct.pack(
+                "<HBHH",
+                CAPABILITIES & 0xFFFF,
+                UTF8MB4_GENERAL_CI,
+                STATUS_AUTOCOMMIT,
+                CAPABILITIES >> 16,
+            )
+            + bytes([21])
+            + b"\x00" * 10
+            + salt[8:]
+            + b"\x00"
+            + b"mysql_native_password\x00"
+        )
+        self._send(writer, 0, handshake)
+        seq, _ = await self._read(reader)
+        # Any credentials are accepted.
+        self._send(writer, seq + 1, _ok())
+        await writer.drain()
+        while True:
+            seq, payload = await self._read(reader)
+            command, argument = payload[0], payload[1:]
+            if command == COM_QUIT:
+                return
+            if command == COM_QUERY:
+                packets = await self._query(argument.decode("utf-8", errors="replace"))
+            elif command in (
+                COM_INIT_DB,
+                COM_PING,
+                COM_RESET_CONNECTION,
+                COM_CHANGE_USER,
+            ):
+                packets = [_ok()]
+            else:
+                packets = [_error(f"Command {command} is not supported", 1047)]
+            for i, packet in enumerate(packets):
+                self._send(writer, seq + 1 + i, packet)
+            await writer.drain()
+
+    @staticmethod
+    async def _read(reader) -> tuple[int, bytes]:
+        header = await reader.readexactly(4)
+        length = int.from_bytes(header[:3], "little")
+        return header[3], await reader.readexactly(length)
+
+    @staticmethod
+    def _send(writer, seq: int, payload: bytes):
+        writer.write(len(payload).to_bytes(3, "little") + bytes([seq & 0xFF]) + payload)
+
+    async def _query(self, sql: str) -> list[bytes]:
+        self.queries += 1
+        sql = sql.strip().rstrip(";")
+        if _SESSION.match(sql):
+            return [_ok()]
+        if _SYSTEM_VARIABLES.match(sql):
+            items = _split_select_list(sql)
+            names = [_column_name(item) for item in items]
+            values = [
+                VARIABLES.get(item.split()[0][2:].split(".")[-1].lower(), "0")
+                for item in items
+            ]
+            return self._result_set(
+                [(name, TYPE_VAR_STRING) for name in names], [values]
+            )
+        match = _SHOW_VARIABLES.match(sql)
+        if match:
+            pattern = re.compile(
+                match.group(1).replace("%", ".*").replace("_", "."), re.I
+            )
+            rows = [
+                [name, value]
+                for name, value in VARIABLES.items()
+                if pattern.fullmatch(name)
+            ]
+            return self._result_set(
+                [("Variable_name", TYPE_VAR_STRING), ("Value", TYPE_VAR_STRING)], rows
+            )
+        match = _FUNCTION_CALL.match(sql)
+        if match:
+            function = match.group(1).upper()
+            value = {
+                "OB_VERSION": OB_VERSION,
+                "VERSION": SERVER_VERSION,
+                "DATABASE": "bench",
+                "LAST_TRACE_ID": "YB420A000001-000000000000BE01-0-0",
+            }[function]
+            return self._result_set([(f"{function}()", TYPE_VAR_STRING)], [[value]])
+        match = _SHOW_CREATE.match(sql)
+        if match:
+            table = match.group(1)
+            if table not in TABLES:
+                return [_error(f"Table 'bench.{table}' doesn't exist", 1146)]
+            return self._result_set(
+                [("Table", TYPE_VAR_STRING), ("Create Table", TYPE_VAR_STRING)],
+                [[table, TABLES[table]]],
+            )
+        if _SHOW_TABLES.match(sql):
+            like = re.search(r"LIKE\s+'([^']+)'", sql, re.I)
+            names = [name for name in TABLES if not like or name == like.group(1)]
+            columns = [("Tables_in_bench", TYPE_VAR_STRING)]
+            if re.match(r"SHOW\s+FULL", sql, re.I):
+                columns.append(("Table_type", TYPE_VAR_STRING))
+                return self._result_set(
+                    columns, [[name, "BASE TABLE"] for name in names]
+                )
+            return self._result_set(columns, [[name] for name in names])
+        match = _DESCRIBE.match(sql)
+        if match:
+            columns = TABLE_COLUMNS.get(match.group(1), [])
+            return self._result_set(
+                [
+                    (name, TYPE_VAR_STRING)
+                    for name in ("Field", "Type", "Null", "Key", "Default", "Extra")
+                ],
+                [[column, "text", "YES", "", None, ""] for column in columns],
+            )
+        if re.match(r"^(SHOW|SELECT)\b", sql, re.I):
+            await asyncio.sleep(self.latency)
+            return self._select(sql)
+        # DML and DDL
+        await asyncio.sleep(self.latency)
+        return [_ok(affected_rows=1)]
+
+    def _select(self, sql: str) -> list[bytes]:
+        columns = []
+        for item in _split_select_list(sql) or ["Value"]:
+            if item == "*" or item.endswith(".*"):
+                columns.extend(
+                    (name, name) for name in TABLE_COLUMNS.get(_table_of(sql), ["id"])
+                )
+            else:
+                columns.append((_column_name(item), item))
+        names = [name for name, _ in columns]
+        # Selects without a table, e.g. SELECT 1, have a single row.
+        count = self.rows if re.search(r"\bFROM\b", sql, re.I) else 1
+        limit = _LIMIT.search(sql)
+        if limit:
+            count = min(count, int(limit.group(2) or limit.group(1)))
+        typed = [
+            [_value(name, item, row) for name, item in columns] for row in range(count)
+        ]
+        types = (
+            [column_type for column_type, _ in typed[0]]
+            if typed
+            else [TYPE_VAR_STRING] * len(names)
+        )
+        return self._result_set(
+            list(zip(names, types)), [[value for _, value in row] for row in typed]
+        )
+
+    @staticmethod
+    def _result_set(columns: list[tuple[str, int]], rows: list[list]) -> list[bytes]:
+        packets = [_lenenc_int(len(columns))]
+        packets.extend(
+            _column_definition(name, column_type) for name, column_type in columns
+        )
+        packets.append(_eof())
+        packets.extend(b"".join(_lenenc_str(value) for value in row) for row in rows)
+        packets.append(_eof())
+        return packets
+
+
+async def _serve_forever(
+    host: str, port: int, latency_ms: float, rows: int, ready=None
+):
+    server = await FakeOceanBase(latency_ms, rows).serve(host, port)
+    bound = server.sockets[0].getsockname()[1]
+    if ready is not None:
+        ready.put(bound)
+    else:
+        print(f"Fake OceanBase listening on {host}:{bound}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def run(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_ms: float = 1.0,
+    rows: int = 20,
+    ready=None,
+):
+    """Serve until killed, putting the bound port on the ready queue when given."""
+    asyncio.run(_serve_forever(host, port, latency_ms, rows, ready))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3307)
+    parser.add_argument(
+        "--latency-ms", type=float, default=1.0, help="latency of each query"
+    )
+    parser.add_argument("--rows", type=int, default=20, help="rows of each SELECT")
+    args = parser.parse_args()
+    run(args.host, args.port, args.latency_ms, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Admission control of tool calls: concurrency limits and a bounded priority wait queue."""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Mapping, Optional
+
+import anyio
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+# Priority classes, lower runs first: metadata lookups are cheap and unblock an agent quickly,
+# reports and index builds may hold a connection for minutes.
+PRIORITY_METADATA = 0
+PRIORITY_QUERY = 1
+PRIORITY_REPORT = 2
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised instead of running a tool call the server has no capacity for."""
+
+
+def parse_tool_limits(value: str) -> dict[str, int]:
+    """Parse "tool=limit,tool=limit" into {tool: limit}, a limit of 0 lifts the tool's limit."""
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        tool, sep, limit = item.partition("=")
+        if not sep or not tool.strip() or not limit.strip().isdigit():
+            raise ValueError(f"Invalid tool limit {item.strip()!r}, expected tool=limit")
+        limits[tool.strip()] = int(limit)
+    return limits
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tool: str = field(compare=False)
+    event: anyio.Event = field(compare=False, default_factory=anyio.Event)
+    admitted: bool = field(compare=False, default=False)
+    shed: bool = field(compare=False, default=False)
+
+
+class AdmissionController:
+    """
+    Limit the tool calls running at once, max_in_flight in total and tool_limits[tool] per tool
+    (0 or missing: no limit). A call without a free slot waits in a queue ordered by priority
+    class, then arrival, for at most max_wait seconds.
+
+    Load is shed early rather than queued without bound: when max_queue calls are waiting, a
+    new call is rejected at once, unless a waiting call of a lower priority class can be
+    rejected in its place. Rejections raise AdmissionRejected.
+
+    All methods run on the event loop, the controller is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 0,
+        tool_limits: Optional[Mapping[str, int]] = None,
+        max_queue: int = 32,
+        max_wait: float = 10.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.tool_limits = dict(tool_limits or {})
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._tool_in_flight: Counter = Counter()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "tools": {tool: n for tool, n in self._tool_in_flight.items() if n},
+        }
+
+    @asynccontextmanager
+    async def admit(
+        self, tool: str, priority: int = PRIORITY_QUERY, max_wait: Optional[float] = None
+    ):
+        """Hold a slot of the tool while the block runs, waiting for one if none is free."""
+        if self._has_capacity(tool):
+            self._acquire(tool)
+        else:
+            await self._wait(tool, priority, self.max_wait if max_wait is None else max_wait)
+        try:
+            yield
+        finally:
+            self._release(tool)
+
+    def _has_capacity(self, tool: str) -> bool:
+        if self.max_in_flight and self._in_flight >= self.max_in_flight:
+            return False
+        limit = self.tool_limits.get(tool)
+        return not limit or self._tool_in_flight[tool] < limit
+
+    def _acquire(self, tool: str):
+        self._in_flight += 1
+        self._tool_in_flight[tool] += 1
+
+    def _release(self, tool: str):
+        self._in_flight -= 1
+        self._tool_in_flight[tool] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        # Waiters are sorted by priority class: admit the first ones whose tool has a free slot.
+        for waiter in list(self._waiters):
+            if self.max_in_flight and self._in_flight >= self.max_in_flight:
+                break
+            if self._has_capacity(waiter.tool):
+                self._waiters.remove(waiter)
+                self._acquire(waiter.tool)
+                waiter.admitted = True
+                waiter.event.set()
+
+    async def _wait(self, tool: str, priority: int, max_wait: float):
+        if len(self._waiters) >= self.max_queue:
+            victim = self._waiters[-1] if self._waiters else None
+            if victim is None or victim.priority <= priority:
+                raise AdmissionRejected(
+                    f"Server busy: {tool} rejected, {len(self._waiters)} calls are already "
+                    f"waiting and {self._in_flight} running. Retry later."
+                )
+            self._waiters.pop()
+            victim.shed = True
+            victim.event.set()
+        waiter = _Waiter(priority, next(self._seq), tool)
+        bisect.insort(self._waiters, waiter)
+        try:
+            with anyio.move_on_after(max_wait):
+                await waiter.event.wait()
+        except BaseException:
+            # Cancelled while waiting, possibly right after being admitted.
+            if waiter.admitted:
+                self._release(tool)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        if waiter.admitted:
+            return
+        if waiter.shed:
+            logger.warning(f"Shed queued call of {tool} for a call of a higher priority class")
+            raise AdmissionRejected(
+                f"Server busy: {tool} was dropped from the wait queue for more urgent calls. "
+                "Retry later."
+            )
+        self._waiters.remove(waiter)
+        raise AdmissionRejected(
+            f"Server busy: {tool} waited {max_wait:g}s without a free slot, "
+            f"{self._in_flight} calls are running. Retry later."
+        )
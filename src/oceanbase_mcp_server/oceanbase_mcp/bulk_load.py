@@ -0,0 +1,427 @@
+"""Streaming CSV / NDJSON / Parquet readers and the parallel loader of the load_table tool."""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Sequence
+
+LOAD_FORMATS = ("csv", "ndjson", "parquet")
+LOAD_METHODS = ("insert", "load_data")
+# Rows per INSERT statement or LOAD DATA file, statements must stay below max_allowed_packet.
+MAX_BATCH_ROWS = 10_000
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".tsv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".json": "ndjson",
+    ".parquet": "parquet",
+}
+
+
+def detect_load_format(path: str, file_format: Optional[str] = None) -> str:
+    """Use the explicit format, otherwise guess it from the file extension."""
+    if file_format:
+        file_format = file_format.lower()
+    else:
+        file_format = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if file_format is None:
+            raise ValueError(f"Cannot tell the format of {path}, pass one of {LOAD_FORMATS}")
+    if file_format not in LOAD_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}, expected one of {LOAD_FORMATS}")
+    return file_format
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet files require pyarrow, install it with `pip install pyarrow`"
+        ) from e
+    return pyarrow
+
+
+def _db_value(value):
+    # Nested NDJSON and Parquet values go to JSON columns as text.
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+class TableFile:
+    """
+    A data file read chunk by chunk, each chunk a list of row tuples in the order of columns.
+    Only one chunk is held at a time, whatever the size of the file.
+
+    CSV files have a header line unless their columns are given, empty fields are NULL.
+    NDJSON files have one object per line, their columns are the keys of the first one unless
+    given. Of NDJSON and Parquet files, given columns are the ones read, others are ignored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        file_format: Optional[str] = None,
+        delimiter: str = ",",
+        columns: Optional[Sequence[str]] = None,
+    ):
+        self.path = path
+        self.file_format = detect_load_format(path, file_format)
+        self.delimiter = "\t" if path.lower().endswith(".tsv") and delimiter == "," else delimiter
+        self._columns = list(columns) if columns else None
+        self._columns_given = self._columns is not None
+        self.total_rows: Optional[int] = None
+        if self.file_format == "parquet":
+            metadata = _import_pyarrow().parquet.ParquetFile(path).metadata
+            self.total_rows = metadata.num_rows
+
+    @property
+    def columns(self) -> list[str]:
+        if self._columns is None:
+            self._columns = self._read_columns()
+        return self._columns
+
+    def _read_columns(self) -> list[str]:
+        if self.file_format == "csv":
+            with open(self.path, newline="", encoding="utf-8-sig") as f:
+                header = next(csv.reader(f, delimiter=self.delimiter), None)
+            if not header:
+                raise ValueError(f"{self.path} is empty")
+            return header
+        if self.file_format == "ndjson":
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        return list(json.loads(line))
+            raise ValueError(f"{self.path} is empty")
+        return list(_import_pyarrow().parquet.read_schema(self.path).names)
+
+    def chunks(self, chunk_rows: int) -> Iterator[list[tuple]]:
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        columns = self.columns
+        if self.file_format == "csv":
+            yield from self._csv_chunks(chunk_rows, len(columns))
+        elif self.file_format == "ndjson":
+            yield from self._ndjson_chunks(chunk_rows, columns)
+        else:
+            yield from self._parquet_chunks(chunk_rows, columns)
+
+    def _csv_chunks(self, chunk_rows: int, width: int) -> Iterator[list[tuple]]:
+        chunk = []
+        with open(self.path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f, delimiter=self.delimiter)
+            if not self._columns_given:
+                next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) != width:
+                    raise ValueError(
+                        f"Line {reader.line_num} of {self.path} has {len(row)} fields, "
+                        f"expected {width}"
+                    )
+                chunk.append(tuple(value if value != "" else None for value in row))
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _ndjson_chunks(self, chunk_rows: int, columns: list[str]) -> Iterator[list[tuple]]:
+        known = set(columns)
+        chunk = []
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, Mapping):
+                    raise ValueError(f"Line {line_number} of {self.path} is not an object")
+                unknown = set(record) - known
+                if unknown and not self._columns_given:
+                    raise ValueError(
+                        f"Line {line_number} of {self.path} has keys {sorted(unknown)} "
+                        f"that the first line has not"
+                    )
+                chunk.append(tuple(_db_value(record.get(column)) for column in columns))
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _parquet_chunks(self, chunk_rows: int, columns: list[str]) -> Iterator[list[tuple]]:
+        parquet_file = _import_pyarrow().parquet.ParquetFile(self.path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            values = [batch.column(column).to_pylist() for column in columns]
+            yield [tuple(_db_value(value) for value in row) for row in zip(*values)]
+
+
+def quote_identifier(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def quote_table_name(name: str) -> str:
+    """`db`.`table` of db.table, `table` of a table of the current database."""
+    return ".".join(quote_identifier(part) for part in name.split(".", 1))
+
+
+def map_columns(
+    source_columns: Sequence[str],
+    table_columns: Sequence[str],
+    column_map: Optional[Mapping[str, Optional[str]]] = None,
+) -> list[tuple[int, str]]:
+    """
+    (index in the rows of the file, table column) of each file column to load. Columns match
+    by name, case-insensitively, or through column_map {file column: table column}, where an
+    empty table column skips the file column. File columns the table has not are an error
+    rather than silently dropped.
+    """
+    column_map = dict(column_map or {})
+    unknown = set(column_map) - set(source_columns)
+    if unknown:
+        raise ValueError(
+            f"column_map has columns {sorted(unknown)} the file has not, "
+            f"its columns are {list(source_columns)}"
+        )
+    by_name = {column.lower(): column for column in table_columns}
+    mapping, missing, sources = [], [], {}
+    for index, source in enumerate(source_columns):
+        target = column_map.get(source, source)
+        if not target:
+            continue
+        column = by_name.get(target.lower())
+        if column is None:
+            missing.append(source)
+            continue
+        if column in sources:
+            raise ValueError(
+                f"File columns {sources[column]!r} and {source!r} both map to {column}"
+            )
+        sources[column] = source
+        mapping.append((index, column))
+    if missing:
+        raise ValueError(
+            f"File columns {missing} are not in the table, whose columns are "
+            f"{list(table_columns)}: map them with column_map, or to null to skip them"
+        )
+    if not mapping:
+        raise ValueError("No column of the file maps to a column of the table")
+    return mapping
+
+
+def select_columns(chunks: Iterable[list[tuple]], indices: Sequence[int]) -> Iterator[list[tuple]]:
+    """The chunks with the values at indices only, unchanged when that is all of them."""
+    for chunk in chunks:
+        if chunk and list(indices) == list(range(len(chunk[0]))):
+            yield chunk
+        else:
+            yield [tuple(row[index] for index in indices) for row in chunk]
+
+
+def insert_statement(table: str, columns: Sequence[str], rows: int) -> str:
+    """A multi-row INSERT of rows rows, with %s placeholders."""
+    values = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    return (
+        f"INSERT INTO {quote_table_name(table)} "
+        f"({', '.join(quote_identifier(column) for column in columns)}) "
+        f"VALUES {', '.join([values] * rows)}"
+    )
+
+
+def load_data_statement(table: str, columns: Sequence[str]) -> str:
+    """LOAD DATA LOCAL INFILE of a file written by write_load_data_file, its path bound to %s."""
+    return (
+        f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote_table_name(table)} CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+        "LINES TERMINATED BY '\\n' "
+        f"({', '.join(quote_identifier(column) for column in columns)})"
+    )
+
+
+_LOAD_DATA_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "\0": "\\0"}
+)
+
+
+def _load_data_field(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8", errors="replace")
+    return '"' + str(value).translate(_LOAD_DATA_ESCAPES) + '"'
+
+
+def write_load_data_file(f, rows: Iterable[Sequence]):
+    """Rows as the quoted, backslash escaped lines load_data_statement reads, NULL as \\N."""
+    for row in rows:
+        f.write(",".join(_load_data_field(value) for value in row) + "\n")
+
+
+@dataclass
+class LoadResult:
+    rows: int
+    chunks: int
+    elapsed_s: float
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s > 0 else float(self.rows)
+
+
+class LoadFailed(RuntimeError):
+    """A load stopped by an error, after rows rows in chunks chunks were committed."""
+
+    def __init__(self, message: str, rows: int, chunks: int):
+        super().__init__(message)
+        self.rows = rows
+        self.chunks = chunks
+
+
+class ParallelLoader:
+    """
+    Load chunks of rows into a table on up to workers connections of its own, each chunk in
+    its own transaction, as one multi-row INSERT or, with the load_data method, as a temporary
+    file sent with LOAD DATA LOCAL INFILE (connect must then allow local infile).
+
+    At most two chunks per worker are read ahead of the loaded ones, so memory use depends on
+    the chunk size and not on the size of the file.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        table: str,
+        columns: Sequence[str],
+        method: str = "insert",
+        workers: int = 4,
+        tmp_dir: Optional[str] = None,
+    ):
+        if method not in LOAD_METHODS:
+            raise ValueError(f"method must be one of {list(LOAD_METHODS)}, not {method!r}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self._connect = connect
+        self.table = table
+        self.columns = list(columns)
+        self.method = method
+        self.workers = workers
+        self.tmp_dir = tmp_dir
+        self._local = threading.local()
+        self._connections: list = []
+        self._lock = threading.Lock()
+
+    def load(
+        self,
+        chunks: Iterable[list[tuple]],
+        on_progress: Optional[Callable[[int, int, float], None]] = None,
+    ) -> LoadResult:
+        """
+        Load every chunk, calling on_progress(rows, chunks, elapsed seconds) on the calling
+        thread as chunks complete. Raises LoadFailed, with what was committed, on the first
+        error of a chunk or of reading the file.
+        """
+        start = time.perf_counter()
+        rows = done = 0
+
+        def collect(futures, raise_error: bool = True):
+            nonlocal rows, done
+            error = None
+            for future in futures:
+                if future.cancelled():
+                    continue
+                try:
+                    rows += future.result()
+                    done += 1
+                except Exception as e:
+                    error = error or e
+            if error is not None and raise_error:
+                raise error
+            if on_progress is not None:
+                on_progress(rows, done, time.perf_counter() - start)
+
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ob_mcp_load")
+        pending: set = set()
+        try:
+            for chunk in chunks:
+                if len(pending) >= 2 * self.workers:
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(completed)
+                pending.add(pool.submit(self._load_chunk, chunk))
+            while pending:
+                completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(completed)
+        except Exception as e:
+            # Chunks already sent complete, the queued ones are dropped.
+            pool.shutdown(wait=True, cancel_futures=True)
+            collect(pending, raise_error=False)
+            raise LoadFailed(str(e), rows, done) from e
+        finally:
+            pool.shutdown(wait=True)
+            self._close()
+        return LoadResult(rows, done, time.perf_counter() - start)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _load_chunk(self, rows: list[tuple]) -> int:
+        connection = self._connection()
+        cursor = connection.cursor()
+        try:
+            if self.method == "insert":
+                cursor.execute(
+                    insert_statement(self.table, self.columns, len(rows)),
+                    [value for row in rows for value in row],
+                )
+                loaded = len(rows)
+            else:
+                loaded = self._load_data(cursor, rows)
+            connection.commit()
+            return loaded
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            cursor.close()
+
+    def _load_data(self, cursor, rows: list[tuple]) -> int:
+        import tempfile
+
+        fd, path = tempfile.mkstemp(prefix="ob_mcp_load_", suffix=".csv", dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                write_load_data_file(f, rows)
+            cursor.execute(load_data_statement(self.table, self.columns), (path,))
+            # Rows LOAD DATA LOCAL skipped, e.g. duplicate keys, are warnings, not errors.
+            return cursor.rowcount if cursor.rowcount >= 0 else len(rows)
+        finally:
+            os.remove(path)
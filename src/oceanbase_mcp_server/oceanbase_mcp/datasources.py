@@ -0,0 +1,271 @@
+"""Named OceanBase data sources, each with its own lazily created connection pools."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+DEFAULT_DATASOURCE = "default"
+DEFAULT_POOL_SIZE = 5
+# mysql.connector caps pools at 32 connections and restricts the characters of pool names.
+MAX_POOL_SIZE = 32
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.\-]{1,48}$")
+# Sessions of read pools may be served by followers, with data up to ob_max_read_stale_time old.
+WEAK_READ_INIT_COMMAND = "SET SESSION ob_read_consistency = 'WEAK'"
+# Seconds reads go to the primary after the read endpoint failed, before it is tried again.
+READ_RETRY_INTERVAL = 30.0
+
+
+@dataclass(frozen=True)
+class DataSource:
+    name: str
+    host: str
+    port: int
+    user: str
+    password: str = ""
+    database: str = ""
+    pool_size: int = DEFAULT_POOL_SIZE
+    # Route read-only statements to a weak-consistency pool, on read_host:read_port (e.g. a
+    # read-only OBProxy) when given, otherwise on the same endpoint.
+    read_routing: bool = False
+    read_host: Optional[str] = None
+    read_port: Optional[int] = None
+
+    def connect_args(self) -> dict:
+        return {
+            "host": self.host,
+            "port": self.port,
+            "user": self.user,
+            "password": self.password,
+            "database": self.database,
+        }
+
+    def read_connect_args(self) -> dict:
+        return {
+            **self.connect_args(),
+            "host": self.read_host or self.host,
+            "port": self.read_port or self.port,
+            "init_command": WEAK_READ_INIT_COMMAND,
+        }
+
+    def describe(self) -> dict:
+        """Everything but the password, for listing the data sources to a client."""
+        return {
+            "name": self.name,
+            "host": self.host,
+            "port": self.port,
+            "database": self.database,
+            "read_routing": self.read_routing,
+        }
+
+
+def parse_datasource(name: str, value: Mapping, environ: Mapping = os.environ) -> DataSource:
+    """
+    Validate one data source of the configuration file. The password is given either inline
+    as "password" or as the name of an environment variable in "password_env".
+    """
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Invalid data source name {name!r}, use up to 48 letters, digits, '_', '.' or '-'"
+        )
+    for key in ("host", "user"):
+        if not value.get(key):
+            raise ValueError(f"Data source {name!r} has no {key}")
+    password = value.get("password", "")
+    if value.get("password_env"):
+        password = environ.get(value["password_env"], "")
+    pool_size = int(value.get("pool_size", DEFAULT_POOL_SIZE))
+    if not 1 <= pool_size <= MAX_POOL_SIZE:
+        raise ValueError(f"pool_size of data source {name!r} must be between 1 and {MAX_POOL_SIZE}")
+    read_port = value.get("read_port")
+    return DataSource(
+        name=name,
+        host=value["host"],
+        port=int(value.get("port", 2881)),
+        user=value["user"],
+        password=password,
+        database=value.get("database", ""),
+        pool_size=pool_size,
+        # A read endpoint implies read routing.
+        read_routing=bool(value.get("read_routing") or value.get("read_host")),
+        read_host=value.get("read_host"),
+        read_port=int(read_port) if read_port else None,
+    )
+
+
+def parse_datasources(
+    config: Mapping, environ: Mapping = os.environ
+) -> tuple[dict[str, DataSource], Optional[str]]:
+    """
+    Parse {"default": name, "datasources": {name: {host, port, user, password | password_env,
+    database, pool_size, read_routing, read_host, read_port}}} into data sources and the name
+    of the default one, if given.
+    """
+    sources = {
+        name: parse_datasource(name, value, environ)
+        for name, value in (config.get("datasources") or {}).items()
+    }
+    default = config.get("default")
+    if default is not None and default not in sources:
+        raise ValueError(f"Default data source {default!r} is not defined")
+    return sources, default
+
+
+def _import_tomllib():
+    try:
+        import tomllib
+    except ImportError:
+        # tomllib is part of the standard library from Python 3.11 on, tomli is its backport.
+        try:
+            import tomli as tomllib
+        except ImportError as e:
+            raise ImportError(
+                "TOML data source files require Python 3.11 or tomli, install it with "
+                "`pip install tomli` or use a JSON file"
+            ) from e
+    return tomllib
+
+
+def load_datasources_file(
+    path: str, environ: Mapping = os.environ
+) -> tuple[dict[str, DataSource], Optional[str]]:
+    """Read a JSON or, by its .toml extension, TOML data source file."""
+    if path.endswith(".toml"):
+        with open(path, "rb") as f:
+            config = _import_tomllib().load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    return parse_datasources(config, environ)
+
+
+class DataSourceRegistry:
+    """
+    The data sources one server process serves. Nothing is opened up front: the first call
+    that targets a data source creates its mysql.connector pool or its ObVecClient.
+    """
+
+    def __init__(
+        self, sources: Optional[dict[str, DataSource]] = None, default: Optional[str] = None
+    ):
+        self._sources: dict[str, DataSource] = dict(sources or {})
+        self._default = default
+        self._pools: dict = {}
+        self._vec_clients: dict = {}
+        self._read_down_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, source: DataSource, replace: bool = True):
+        if replace or source.name not in self._sources:
+            self._sources[source.name] = source
+
+    @property
+    def default(self) -> str:
+        if self._default is not None:
+            return self._default
+        if DEFAULT_DATASOURCE in self._sources or not self._sources:
+            return DEFAULT_DATASOURCE
+        return next(iter(self._sources))
+
+    def names(self) -> list[str]:
+        return list(self._sources)
+
+    def get(self, name: Optional[str] = None) -> DataSource:
+        source = self._sources.get(name or self.default)
+        if source is None:
+            raise ValueError(
+                f"Unknown data source {name or self.default!r}, available: {self.names()}"
+            )
+        return source
+
+    def connect(self, name: Optional[str] = None, read_only: bool = False):
+        """
+        A mysql.connector connection from the pool of the data source, returned to the pool
+        (with its session reset) on close. When all pooled connections are busy, a dedicated
+        connection is opened instead of failing the call.
+
+        With read_only, data sources with read routing hand out a connection of their weak
+        consistency pool, or of the primary pool while the read endpoint is unreachable.
+        """
+        from mysql.connector import Error
+
+        source = self.get(name)
+        if (
+            read_only
+            and source.read_routing
+            and time.monotonic() >= self._read_down_until.get(source.name, 0.0)
+        ):
+            try:
+                return self._pooled_connection(source, read=True)
+            except Error as e:
+                self._read_down_until[source.name] = time.monotonic() + READ_RETRY_INTERVAL
+                logger.warning(f"Read pool of {source.name} unavailable, using the primary: {e}")
+        return self._pooled_connection(source, read=False)
+
+    def dedicated_connection(self, name: Optional[str] = None, **options):
+        """
+        A new mysql.connector connection to the primary of the data source, outside of its
+        pool, e.g. for long loads or with options the pool was not created with.
+        """
+        from mysql.connector import connect
+
+        return connect(**self.get(name).connect_args(), **options)
+
+    def _pooled_connection(self, source: DataSource, read: bool):
+        from mysql.connector import connect
+        from mysql.connector.errors import PoolError
+        from mysql.connector.pooling import MySQLConnectionPool
+
+        connect_args = source.read_connect_args() if read else source.connect_args()
+        key = (source.name, read)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = MySQLConnectionPool(
+                        pool_name=f"ob_mcp_{source.name}{'_read' if read else ''}",
+                        pool_size=source.pool_size,
+                        # Resetting the session would drop the weak consistency of read pools,
+                        # whose read-only statements leave no other session state behind:
+                        # is_read_only sends user variable assignments and named locks to the
+                        # primary.
+                        pool_reset_session=not read,
+                        **connect_args,
+                    )
+                    self._pools[key] = pool
+        try:
+            return pool.get_connection()
+        except PoolError:
+            logger.debug(f"Connection pool of {source.name} exhausted, opening a dedicated one")
+            return connect(**connect_args)
+
+    def vec_client(self, name: Optional[str] = None):
+        """
+        The ObVecClient of the data source. Creating a client reflects the whole schema and
+        opens a new engine, so each data source has one, shared by all tools.
+        """
+        source = self.get(name)
+        client = self._vec_clients.get(source.name)
+        if client is None:
+            with self._lock:
+                client = self._vec_clients.get(source.name)
+                if client is None:
+                    from pyobvector import ObVecClient
+
+                    client = ObVecClient(
+                        uri=f"{source.host}:{source.port}",
+                        user=source.user,
+                        password=source.password or "",
+                        db_name=source.database or "",
+                    )
+                    self._vec_clients[source.name] = client
+        return client
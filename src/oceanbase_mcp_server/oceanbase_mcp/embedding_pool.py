@@ -0,0 +1,143 @@
+"""Embedding inference on worker threads, coalescing concurrent requests into micro-batches."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Sequence
+
+
+class EmbeddingQueueFull(RuntimeError):
+    """Raised when more embedding requests are waiting than the pool accepts."""
+
+
+class _Request:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = list(texts)
+        self.future: Future = Future()
+
+
+class EmbeddingPool:
+    """
+    Drop-in wrapper of an embedding client (embed_query / embed_documents) that runs the
+    model on `workers` dedicated threads. A worker takes the oldest request, then keeps
+    collecting the requests arriving within max_wait seconds until max_batch texts, and embeds
+    them all in one embed_documents call: under concurrency each inference amortizes its fixed
+    cost over many texts, while a lone request waits at most max_wait.
+
+    Model runtimes release the GIL during inference, so the workers run in parallel with each
+    other and with the event loop. At most max_queue requests wait, further ones are rejected
+    with EmbeddingQueueFull instead of piling up.
+    """
+
+    def __init__(
+        self,
+        client,
+        workers: int = 2,
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+        max_queue: int = 256,
+    ):
+        self.client = client
+        self.workers = max(int(workers), 1)
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue(maxsize=max(int(max_queue), 1))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Queue texts for embedding, the future resolves to one vector per text."""
+        request = _Request(texts)
+        if not request.texts:
+            request.future.set_result([])
+            return request.future
+        self._start()
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            raise EmbeddingQueueFull(
+                f"{self._queue.maxsize} embedding requests are already waiting, retry later"
+            ) from None
+        return request.future
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit([text]).result()[0]
+
+    def close(self):
+        """Let the workers finish the queued requests and stop."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def _start(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The embedding pool is closed")
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"ob-embedding-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _next_batch(self) -> tuple[List[_Request], bool]:
+        """The next micro-batch, and whether the worker got the stop signal."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            size += len(request.texts)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self.client.embed_documents(
+                    [text for request in batch for text in request.texts]
+                )
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            start = 0
+            for request in batch:
+                end = start + len(request.texts)
+                request.future.set_result(list(vectors[start:end]))
+                start = end
@@ -0,0 +1,79 @@
+"""Rank fusion helpers used to merge full text and vector search results."""
+
+from __future__ import annotations
+
+from typing import Hashable, Mapping, Optional, Sequence
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> list[tuple[Hashable, float]]:
+    """
+    Merge several ranked lists with Reciprocal Rank Fusion.
+
+    Args:
+        rankings: Each item is a list of keys ordered from best to worst.
+        k: Smoothing constant, larger values flatten the contribution of top ranks.
+        weights: Optional weight for each ranking, defaults to 1.0.
+
+    Returns:
+        (key, score) pairs sorted by fused score, best first. Keys appearing in
+        several rankings are de-duplicated and their contributions summed.
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+    if len(weights) != len(rankings):
+        raise ValueError("The number of weights must match the number of rankings")
+    fused: dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def min_max_normalize(
+    scores: Mapping[Hashable, float], higher_is_better: bool = True
+) -> dict[Hashable, float]:
+    """
+    Scale scores into [0, 1] so that 1 is always the best result.
+    When all scores are equal every key gets 1.0.
+    """
+    if not scores:
+        return {}
+    low = min(scores.values())
+    high = max(scores.values())
+    if high == low:
+        return {key: 1.0 for key in scores}
+    span = high - low
+    if higher_is_better:
+        return {key: (value - low) / span for key, value in scores.items()}
+    return {key: (high - value) / span for key, value in scores.items()}
+
+
+def weighted_score_fusion(
+    scores: Sequence[Mapping[Hashable, float]],
+    weights: Sequence[float],
+    higher_is_better: Sequence[bool],
+) -> list[tuple[Hashable, float]]:
+    """
+    Merge several score maps by min-max normalizing each one and summing the weighted values.
+    A key missing from one of the maps contributes 0 for that map.
+
+    Args:
+        scores: Each item maps a key to its raw score (e.g. text relevance or vector distance).
+        weights: Weight for each score map.
+        higher_is_better: For each score map, whether a larger raw score is better.
+            Use False for distances.
+
+    Returns:
+        (key, score) pairs sorted by fused score, best first.
+    """
+    if not (len(scores) == len(weights) == len(higher_is_better)):
+        raise ValueError("scores, weights and higher_is_better must have the same length")
+    fused: dict[Hashable, float] = {}
+    for score_map, weight, higher in zip(scores, weights, higher_is_better):
+        for key, value in min_max_normalize(score_map, higher).items():
+            fused[key] = fused.get(key, 0.0) + weight * value
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,134 @@
+"""In-process hot set of memory embeddings searched exactly with NumPy."""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from oceanbase_mcp.vector_codec import VectorLike
+
+
+class HotMemorySet:
+    """
+    Fixed-capacity set of recently written or recently hit memories. Embeddings live in one
+    preallocated float32 matrix, a search is a single matrix-vector product over the rows of
+    a namespace. When full, the least recently used memory is replaced; every hit refreshes
+    a memory, so frequently hit memories stay resident.
+
+    A capacity of 0 disables the set: writes are ignored and searches return nothing.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(int(capacity), 0)
+        self._lock = threading.Lock()
+        self.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def clear(self):
+        """Forget every memory, e.g. after the embedding model changed."""
+        with self._lock:
+            self._vectors: Optional[np.ndarray] = None
+            self._norms = np.zeros(self.capacity, dtype=np.float32)
+            self._mem_ids = np.full(self.capacity, -1, dtype=np.int64)
+            self._namespaces = np.full(self.capacity, None, dtype=object)
+            self._contents: list[Optional[str]] = [None] * self.capacity
+            self._last_used = np.zeros(self.capacity, dtype=np.int64)
+            self._slots: dict[int, int] = {}
+            self._clock = 0
+
+    def put(self, mem_id: int, namespace: str, content: str, embedding: VectorLike):
+        """Add or refresh a memory, write paths call it after their transaction commits."""
+        if not self.enabled:
+            return
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                if self._vectors is not None:
+                    # A vector of another dimension means the embedding model changed.
+                    self._reset_locked()
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            slot = self._slots.get(mem_id)
+            if slot is None:
+                slot = self._free_slot_locked()
+                self._slots[mem_id] = slot
+            self._vectors[slot] = vector
+            self._norms[slot] = float(vector @ vector)
+            self._mem_ids[slot] = mem_id
+            self._namespaces[slot] = namespace
+            self._contents[slot] = content
+            self._touch_locked([slot])
+
+    def discard(self, mem_ids: Iterable[int]):
+        if not self.enabled:
+            return
+        with self._lock:
+            for mem_id in mem_ids:
+                slot = self._slots.pop(mem_id, None)
+                if slot is not None:
+                    self._mem_ids[slot] = -1
+                    self._namespaces[slot] = None
+                    self._contents[slot] = None
+                    self._last_used[slot] = 0
+
+    def search(
+        self, namespace: str, embedding: VectorLike, topk: int
+    ) -> list[tuple[int, str, float]]:
+        """Exact l2 top-k among the memories of a namespace, as (mem_id, content, distance)."""
+        if not self.enabled or topk <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                return []
+            slots = np.flatnonzero((self._mem_ids >= 0) & (self._namespaces == namespace))
+            if slots.size == 0:
+                return []
+            # |m - q|^2 = |m|^2 - 2 m.q + |q|^2, one matrix-vector product for all rows.
+            squared = self._norms[slots] - 2.0 * (self._vectors[slots] @ query) + query @ query
+            distances = np.sqrt(np.maximum(squared, 0.0))
+            k = min(topk, slots.size)
+            best = np.argpartition(distances, k - 1)[:k]
+            best = best[np.argsort(distances[best], kind="stable")]
+            hit_slots = slots[best]
+            self._touch_locked(hit_slots)
+            return [
+                (int(self._mem_ids[slot]), self._contents[slot], float(distance))
+                for slot, distance in zip(hit_slots, distances[best])
+            ]
+
+    def _touch_locked(self, slots):
+        for slot in slots:
+            self._clock += 1
+            self._last_used[slot] = self._clock
+
+    def _free_slot_locked(self) -> int:
+        if len(self._slots) < self.capacity:
+            return int(np.flatnonzero(self._mem_ids < 0)[0])
+        slot = int(np.argmin(self._last_used))
+        self._slots.pop(int(self._mem_ids[slot]), None)
+        return slot
+
+    def _reset_locked(self):
+        self._mem_ids.fill(-1)
+        self._namespaces.fill(None)
+        self._contents = [None] * self.capacity
+        self._last_used.fill(0)
+        self._slots.clear()
+
+
+def hot_results_confident(
+    results: list[tuple[int, str, float]], topk: int, max_distance: float
+) -> bool:
+    """
+    Whether hot set results can be returned without asking the database: all topk results
+    must be found and even the farthest of them must be within max_distance.
+    """
+    return len(results) >= topk and results[-1][2] <= max_distance
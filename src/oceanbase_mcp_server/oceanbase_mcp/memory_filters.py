@@ -0,0 +1,87 @@
+"""Metadata filters of the memory search, compiled to generated columns on meta keys."""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Mapping
+
+from sqlalchemy import Table, literal_column
+
+META_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,55}$")
+# Length of the generated columns, longer meta values are cut to it on both sides of a filter.
+META_VALUE_LENGTH = 255
+
+
+def check_meta_key(key: str) -> str:
+    if not isinstance(key, str) or not META_KEY_PATTERN.match(key):
+        raise ValueError(
+            f"Invalid meta key: {key!r}, expected letters, digits and underscores only"
+        )
+    return key
+
+
+def parse_indexed_meta_keys(value: str) -> list[str]:
+    """Parse MEMORY_INDEXED_META_KEYS, a comma-separated list of meta keys."""
+    keys = [key.strip() for key in (value or "").split(",") if key.strip()]
+    return list(dict.fromkeys(check_meta_key(key) for key in keys))
+
+
+def meta_column_name(key: str) -> str:
+    return f"meta_{check_meta_key(key)}"
+
+
+def meta_index_name(key: str) -> str:
+    return f"idx_{meta_column_name(key)}"
+
+
+def meta_value_expr(key: str) -> str:
+    """SQL expression of a meta key as text, shared by the generated columns and ad hoc filters."""
+    return (
+        f"SUBSTR(JSON_UNQUOTE(JSON_EXTRACT(meta, '$.{check_meta_key(key)}')), "
+        f"1, {META_VALUE_LENGTH})"
+    )
+
+
+def generated_column_ddl(table_name: str, key: str) -> list[str]:
+    """
+    Statements adding the virtual generated column of a meta key and its index.
+    The index leads with namespace so that a filtered search stays within one tenant.
+    """
+    column = meta_column_name(key)
+    return [
+        f"ALTER TABLE `{table_name}` ADD COLUMN `{column}` VARCHAR({META_VALUE_LENGTH}) "
+        f"GENERATED ALWAYS AS ({meta_value_expr(key)}) VIRTUAL",
+        f"CREATE INDEX `{meta_index_name(key)}` ON `{table_name}` (namespace, `{column}`)",
+    ]
+
+
+def _filter_value(value: Any) -> str:
+    # Same text JSON_UNQUOTE produces for scalar JSON values.
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None or isinstance(value, (dict, list)):
+        raise ValueError(f"Unsupported meta filter value: {value!r}")
+    return str(value)[:META_VALUE_LENGTH]
+
+
+def compile_meta_filters(table: Table, filters: Mapping[str, Any]) -> list:
+    """
+    Compile {"key": value} or {"key": [value, ...]} filters to WHERE clauses.
+    Keys with a generated column use it, and so its index; other keys fall back to
+    extracting the value from meta on each row.
+    """
+    clauses = []
+    for key, value in (filters or {}).items():
+        column_name = meta_column_name(key)
+        if column_name in table.c:
+            column = table.c[column_name]
+        else:
+            column = literal_column(meta_value_expr(key))
+        if isinstance(value, (list, tuple, set)):
+            values = [_filter_value(v) for v in value]
+            if not values:
+                raise ValueError(f"Empty value list for meta filter {key!r}")
+            clauses.append(column.in_(values))
+        else:
+            clauses.append(column == _filter_value(value))
+    return clauses
@@ -0,0 +1,57 @@
+"""Bookkeeping of the embedding model migrations of the memory table."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+DEFAULT_EMBEDDING_COLUMN = "embedding"
+DEFAULT_EMBEDDING_INDEX = "vidx"
+_GENERATION_PATTERN = re.compile(r"^embedding_v(\d+)$")
+
+
+@dataclass(frozen=True)
+class EmbeddingSpace:
+    """
+    A vector column of the memory table, its vector index and the model that produced it.
+    model is None when the model of a table created by an earlier version is unknown.
+    """
+
+    model: Optional[str]
+    dimension: int
+    column: str = DEFAULT_EMBEDDING_COLUMN
+    index: str = DEFAULT_EMBEDDING_INDEX
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, value: dict) -> "EmbeddingSpace":
+        return cls(
+            model=value.get("model"),
+            dimension=int(value["dimension"]),
+            column=value.get("column", DEFAULT_EMBEDDING_COLUMN),
+            index=value.get("index", DEFAULT_EMBEDDING_INDEX),
+        )
+
+
+def next_space(current: EmbeddingSpace, model: str, dimension: int) -> EmbeddingSpace:
+    """
+    Shadow column and index for a new model, named after the generation of the current
+    column: embedding -> embedding_v2 -> embedding_v3, vidx -> vidx_v2 -> vidx_v3.
+    """
+    match = _GENERATION_PATTERN.match(current.column)
+    generation = int(match.group(1)) + 1 if match else 2
+    return EmbeddingSpace(model, dimension, f"embedding_v{generation}", f"vidx_v{generation}")
+
+
+def new_migration(target: EmbeddingSpace) -> dict:
+    """State of a migration that has not re-embedded any memory yet."""
+    return {"target": target.to_json(), "checkpoint": 0}
+
+
+def migration_target(migration: Optional[dict]) -> Optional[EmbeddingSpace]:
+    if not migration:
+        return None
+    return EmbeddingSpace.from_json(migration["target"])
@@ -0,0 +1,100 @@
+"""Retention and compaction policies of the memory maintenance job."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+# meta key of a memory listing the contents of the near-duplicates merged into it.
+MERGED_CONTENTS_KEY = "merged_contents"
+
+
+def parse_ttl_days_by_type(value: str) -> dict[str, float]:
+    """
+    Parse MEMORY_TTL_DAYS_BY_TYPE, a JSON object mapping meta["type"] to a TTL in days,
+    e.g. '{"event": 30, "*": 365}'. "*" applies to memories of any other type.
+    """
+    if not value or not value.strip():
+        return {}
+    policies = json.loads(value)
+    if not isinstance(policies, dict):
+        raise ValueError("MEMORY_TTL_DAYS_BY_TYPE must be a JSON object")
+    return {str(key): float(days) for key, days in policies.items()}
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            return datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+def memory_expired(
+    meta: Optional[dict],
+    updated_at: Optional[datetime],
+    now: datetime,
+    ttl_days_by_type: Optional[dict[str, float]] = None,
+) -> bool:
+    """
+    Decide whether a memory is past its retention, in order of precedence:
+    meta["expires_at"] (ISO date or datetime), meta["ttl_days"] counted from the last update,
+    then the TTL configured for meta["type"] or "*". Memories without a policy never expire.
+    """
+    meta = meta or {}
+    expires_at = _parse_datetime(meta.get("expires_at"))
+    if expires_at is not None:
+        if expires_at.tzinfo is not None:
+            expires_at = expires_at.astimezone().replace(tzinfo=None)
+        return now >= expires_at
+    ttl_days = meta.get("ttl_days")
+    if ttl_days is None and ttl_days_by_type:
+        ttl_days = ttl_days_by_type.get(str(meta.get("type")), ttl_days_by_type.get("*"))
+    if ttl_days is None or updated_at is None:
+        return False
+    try:
+        return now - updated_at >= timedelta(days=float(ttl_days))
+    except (TypeError, ValueError):
+        return False
+
+
+def merge_metas(survivor: Optional[dict], others: Iterable[Optional[dict]]) -> dict:
+    """Union of the metas of merged memories, keys of the surviving memory win."""
+    merged: dict = {}
+    for meta in others:
+        merged.update(meta or {})
+    merged.update(survivor or {})
+    return merged
+
+
+def merged_contents(
+    survivor_content: str,
+    survivor_meta: Optional[dict],
+    others: Iterable[tuple[str, Optional[dict]]],
+) -> list[str]:
+    """
+    Contents of the (content, meta) memories merged into a surviving one, with the contents
+    they had merged themselves, for meta[MERGED_CONTENTS_KEY] of the survivor. Merging keeps
+    the content of the survivor only, this way the others are not lost.
+    """
+    contents = list((survivor_meta or {}).get(MERGED_CONTENTS_KEY) or [])
+    for content, meta in others:
+        contents.extend((meta or {}).get(MERGED_CONTENTS_KEY) or [])
+        contents.append(content)
+    kept, seen = [], {survivor_content}
+    for content in contents:
+        if content not in seen:
+            seen.add(content)
+            kept.append(content)
+    return kept
+
+
+def should_rebuild_index(deleted_rows: int, total_rows: int, delete_ratio: float) -> bool:
+    """Rebuild the vector index once the deleted share of the table reaches delete_ratio."""
+    if deleted_rows <= 0:
+        return False
+    return deleted_rows / max(total_rows + deleted_rows, 1) >= delete_ratio
@@ -0,0 +1,47 @@
+"""Resolution of the namespace that scopes the memories of a caller."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+DEFAULT_NAMESPACE = "default"
+MAX_NAMESPACE_LENGTH = 255
+
+
+def token_client_id(token: str) -> str:
+    """
+    Stable client id of a bearer token. Only a digest is kept so that the token itself
+    never ends up in the memory table or in logs.
+    """
+    return "token-" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def resolve_namespace(
+    caller: Optional[str],
+    requested: Optional[str] = None,
+    default: str = DEFAULT_NAMESPACE,
+) -> str:
+    """
+    Namespace of the memories a call may read and write.
+
+    Authenticated callers are always confined to their own namespace, a requested namespace
+    only selects a sub namespace below it ("<caller>/<requested>"), so that one token can
+    never reach the memories of another. Without authentication the requested namespace is
+    used as is, falling back to default.
+
+    Args:
+        caller: Client id of the access token of the request, None without authentication.
+        requested: Namespace passed explicitly to the tool.
+        default: Namespace of unauthenticated calls that do not request one.
+    """
+    requested = (requested or "").strip() or None
+    if requested is not None and any(not ch.isprintable() for ch in requested):
+        raise ValueError("Namespace must not contain control characters")
+    if caller:
+        namespace = f"{caller}/{requested}" if requested else caller
+    else:
+        namespace = requested or default
+    if len(namespace) > MAX_NAMESPACE_LENGTH:
+        raise ValueError(f"Namespace is longer than {MAX_NAMESPACE_LENGTH} characters")
+    return namespace
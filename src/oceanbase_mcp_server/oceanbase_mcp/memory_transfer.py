@@ -0,0 +1,176 @@
+"""Chunked JSONL / Parquet files used by the memory export and import tools."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Iterator, Optional
+
+from oceanbase_mcp.vector_codec import decode_base64_vector, encode_base64_vector
+
+TRANSFER_FORMATS = ("jsonl", "parquet")
+FORMAT_VERSION = 1
+# Key of the first JSONL line, and of the Parquet schema metadata, describing the export.
+HEADER_KEY = "ob_memory_export"
+
+
+def detect_format(path: str, file_format: Optional[str] = None) -> str:
+    """Use the explicit format, otherwise guess it from the file extension."""
+    if file_format:
+        file_format = file_format.lower()
+    elif path.lower().endswith(".parquet"):
+        file_format = "parquet"
+    else:
+        file_format = "jsonl"
+    if file_format not in TRANSFER_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}, expected one of {TRANSFER_FORMATS}")
+    return file_format
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet files require pyarrow, install it with `pip install pyarrow`"
+        ) from e
+    return pyarrow
+
+
+def make_header(embedding_model: str, dimension: Optional[int], with_embeddings: bool) -> dict:
+    return {
+        "version": FORMAT_VERSION,
+        "embedding_model": embedding_model,
+        "dimension": dimension,
+        "with_embeddings": with_embeddings,
+    }
+
+
+class MemoryFileWriter:
+    """
+    Write memory records batch by batch, each batch is flushed before the next one is read,
+    so memory use only depends on the batch size.
+    Records are dicts with content, meta, updated_at and optionally embedding (float32 array).
+    """
+
+    def __init__(self, path: str, file_format: str, header: dict):
+        self.path = path
+        self.file_format = file_format
+        self.header = header
+        self.rows = 0
+        self._file = None
+        self._parquet_writer = None
+
+    def __enter__(self) -> "MemoryFileWriter":
+        if self.file_format == "jsonl":
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps({HEADER_KEY: self.header}) + "\n")
+        else:
+            pa = _import_pyarrow()
+            fields = [
+                pa.field("content", pa.string()),
+                pa.field("meta", pa.string()),
+                pa.field("updated_at", pa.string()),
+            ]
+            if self.header["with_embeddings"]:
+                fields.append(pa.field("embedding", pa.list_(pa.float32())))
+            schema = pa.schema(fields, metadata={HEADER_KEY: json.dumps(self.header)})
+            self._parquet_writer = pa.parquet.ParquetWriter(self.path, schema)
+        return self
+
+    def write_batch(self, records: list[dict[str, Any]]):
+        if not records:
+            return
+        if self._file is not None:
+            lines = []
+            for record in records:
+                record = dict(record)
+                embedding = record.pop("embedding", None)
+                if embedding is not None:
+                    record["embedding_base64"] = encode_base64_vector(embedding)
+                lines.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._file.writelines(lines)
+        else:
+            pa = _import_pyarrow()
+            columns = {
+                "content": [record["content"] for record in records],
+                "meta": [json.dumps(record.get("meta") or {}) for record in records],
+                "updated_at": [
+                    None if record.get("updated_at") is None else str(record["updated_at"])
+                    for record in records
+                ],
+            }
+            if self.header["with_embeddings"]:
+                columns["embedding"] = [
+                    None if record.get("embedding") is None else record["embedding"].tolist()
+                    for record in records
+                ]
+            batch = pa.RecordBatch.from_pydict(columns, schema=self._parquet_writer.schema)
+            self._parquet_writer.write_batch(batch)
+        self.rows += len(records)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if exc_type is not None and os.path.exists(self.path):
+            # Do not leave a truncated export behind.
+            os.remove(self.path)
+
+
+def read_header(path: str, file_format: str) -> dict:
+    if file_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            first = json.loads(f.readline() or "{}")
+        return first.get(HEADER_KEY) or {}
+    pa = _import_pyarrow()
+    metadata = pa.parquet.read_schema(path).metadata or {}
+    header = metadata.get(HEADER_KEY.encode())
+    return json.loads(header) if header else {}
+
+
+def read_batches(path: str, file_format: str, batch_size: int) -> Iterator[list[dict[str, Any]]]:
+    """
+    Yield lists of at most batch_size records, reading the file incrementally.
+    meta is returned as a dict and embedding, when present, as a float32 array.
+    """
+    if file_format == "jsonl":
+        yield from _read_jsonl_batches(path, batch_size)
+    else:
+        yield from _read_parquet_batches(path, batch_size)
+
+
+def _read_jsonl_batches(path: str, batch_size: int) -> Iterator[list[dict[str, Any]]]:
+    batch = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if HEADER_KEY in record:
+                continue
+            if not isinstance(record.get("content"), str):
+                raise ValueError(f"Line {line_number} of {path} has no content")
+            embedding = record.pop("embedding_base64", None)
+            if embedding is not None:
+                record["embedding"] = decode_base64_vector(embedding)
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _read_parquet_batches(path: str, batch_size: int) -> Iterator[list[dict[str, Any]]]:
+    pa = _import_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        batch = []
+        for record in record_batch.to_pylist():
+            meta = record.get("meta")
+            record["meta"] = json.loads(meta) if meta else {}
+            batch.append(record)
+        yield batch
@@ -0,0 +1,195 @@
+"""Write-behind queue batching memory inserts and updates."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+
+@dataclass
+class PendingWrite:
+    """
+    An acknowledged memory write not yet stored. mem_id is None for inserts; on_duplicate is
+    "insert" or "merge" for inserts, see OBMemory.insert_deduplicated.
+    """
+
+    namespace: str
+    content: str
+    meta: dict
+    mem_id: Optional[int] = None
+    on_duplicate: str = "insert"
+    seq: int = field(default=0, compare=False)
+    # Failed attempts to store this write on its own.
+    attempts: int = field(default=0, compare=False)
+
+    @property
+    def key(self) -> tuple:
+        # Updates of the same memory replace each other, inserts are never coalesced.
+        if self.mem_id is not None:
+            return ("update", self.namespace, self.mem_id)
+        return ("insert", self.seq)
+
+
+class WriteBehindQueue:
+    """
+    Acknowledge memory writes immediately and store them in batches: a background thread calls
+    flush_func with all pending writes every interval seconds, or as soon as batch_size writes
+    are pending. When a batch fails, its writes are stored one by one, so that one bad write
+    does not hold back the others; a write that fails max_attempts times is dropped and logged
+    with its content.
+
+    Readers call sync(namespace) first: it waits for a flush in progress and flushes the
+    pending writes when some belong to the namespace, so a caller always sees its own writes.
+    An interval of 0 disables the queue, callers then write synchronously.
+    """
+
+    def __init__(
+        self,
+        flush_func: Callable[[List[PendingWrite]], None],
+        interval: float,
+        batch_size: int = 64,
+        max_pending: Optional[int] = None,
+        max_attempts: int = 5,
+    ):
+        self.interval = interval
+        self.batch_size = max(int(batch_size), 1)
+        self.max_attempts = max(int(max_attempts), 1)
+        # Beyond this many pending writes, submit flushes inline instead of queueing more.
+        self.max_pending = max_pending or 4 * self.batch_size
+        self._flush_func = flush_func
+        self._pending: dict = {}
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Held for a whole flush, sync waits on it for writes already taken off the queue.
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="ob-memory-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, write: PendingWrite) -> int:
+        """
+        Queue a write and return the number of pending writes. Once queued, the write is
+        acknowledged: storing it may still fail later, but submit never raises for it.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The memory write queue is closed")
+            write.seq = next(self._seq)
+            self._pending[write.key] = write
+            pending = len(self._pending)
+            if pending >= self.batch_size:
+                self._wakeup.notify()
+        if pending >= self.max_pending:
+            # The flusher falls behind (or the database fails): push back on the writers.
+            self.flush()
+        return pending
+
+    def has_pending(self, namespace: str) -> bool:
+        with self._lock:
+            return any(write.namespace == namespace for write in self._pending.values())
+
+    def sync(self, namespace: str):
+        """
+        Make every acknowledged write of namespace visible to the next query, except writes
+        that fail to store: those stay queued for a retry and are logged.
+        """
+        with self._flush_lock:
+            if self.has_pending(namespace):
+                self._flush_locked()
+
+    def flush(self) -> int:
+        """Store all pending writes now, return how many were stored."""
+        with self._flush_lock:
+            return self._flush_locked()[0]
+
+    def close(self):
+        """Stop the background thread and store the remaining writes."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        flushed = self.flush()
+        if flushed:
+            logger.info(f"Flushed {flushed} pending memory writes on shutdown")
+        with self._lock:
+            writes, self._pending = list(self._pending.values()), {}
+        for write in writes:
+            self._drop(write, "the server shut down")
+
+    def _flush_locked(self) -> tuple[int, int]:
+        """Store the pending writes, return how many were stored and how many failed."""
+        with self._lock:
+            writes = sorted(self._pending.values(), key=lambda write: write.seq)
+            self._pending = {}
+        if not writes:
+            return 0, 0
+        try:
+            self._flush_func(writes)
+            return len(writes), 0
+        except Exception as e:
+            if len(writes) == 1:
+                self._failed(writes[0], e)
+                return 0, 1
+            logger.warning(
+                f"Failed to store {len(writes)} memory writes, storing them one by one: {e}"
+            )
+        stored = 0
+        for write in writes:
+            try:
+                self._flush_func([write])
+                stored += 1
+            except Exception as e:
+                self._failed(write, e)
+        return stored, len(writes) - stored
+
+    def _failed(self, write: PendingWrite, error: Exception):
+        write.attempts += 1
+        if write.attempts >= self.max_attempts:
+            self._drop(write, f"{write.attempts} failed attempts, last: {error}")
+            return
+        logger.error(f"Failed to store a memory write, retrying later: {error}")
+        with self._lock:
+            # A newer write of the same memory queued meanwhile wins over the failed one.
+            self._pending.setdefault(write.key, write)
+
+    @staticmethod
+    def _drop(write: PendingWrite, reason: str):
+        # The only trace of an acknowledged write, logged in full so that it can be replayed.
+        logger.error(
+            f"Dropped memory write after {reason}: namespace={write.namespace!r} "
+            f"mem_id={write.mem_id} content={write.content!r} meta={write.meta!r}"
+        )
+
+    def _run(self):
+        failed = False
+        while True:
+            with self._lock:
+                if not self._closed and (failed or len(self._pending) < self.batch_size):
+                    self._wakeup.wait(self.interval)
+                if self._closed:
+                    return
+            with self._flush_lock:
+                # Failed writes are retried after the next interval, not in a busy loop.
+                failed = self._flush_locked()[1] > 0
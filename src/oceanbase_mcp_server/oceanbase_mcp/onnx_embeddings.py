@@ -0,0 +1,219 @@
+"""Sentence embeddings with ONNX Runtime, int8 quantized, without torch."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+ONNX_MODEL_FILE = "onnx/model.onnx"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "oceanbase_mcp", "onnx")
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_BATCH_SIZE = 32
+# Flags of sentence-transformers' 1_Pooling/config.json and the pooling they select here.
+POOLING_MODES = {
+    "pooling_mode_cls_token": "cls",
+    "pooling_mode_max_tokens": "max",
+    "pooling_mode_mean_tokens": "mean",
+    "pooling_mode_mean_sqrt_len_tokens": None,
+    "pooling_mode_weightedmean_tokens": None,
+    "pooling_mode_lasttoken": None,
+}
+
+
+def read_pooling_mode(config: Optional[dict]) -> str:
+    """
+    Pooling of a sentence-transformers model from its 1_Pooling/config.json, mean by default.
+    Raises ValueError for poolings that are not implemented, or several at once, rather than
+    computing embeddings that do not match the model's.
+    """
+    flags = [flag for flag in POOLING_MODES if (config or {}).get(flag)]
+    if not flags:
+        return "mean"
+    if len(flags) > 1 or POOLING_MODES[flags[0]] is None:
+        raise ValueError(
+            f"Unsupported pooling {', '.join(flags)}, the ONNX provider supports one of "
+            f"cls, max or mean pooling, use the huggingface provider for this model"
+        )
+    return POOLING_MODES[flags[0]]
+
+
+def quantized_model_path(model_path: str, model_name: str, cache_dir: str) -> str:
+    """
+    Cache path of the int8 copy of model_path. The key includes the resolved source path, its
+    size and mtime, so a re-exported or updated model is quantized again.
+    """
+    source = os.path.realpath(model_path)
+    stat = os.stat(source)
+    key = hashlib.sha256(f"{source}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+    return os.path.join(cache_dir, model_name.replace("/", "__"), key[:16], "model_int8.onnx")
+
+
+def pool_embeddings(
+    hidden_states: np.ndarray, attention_mask: np.ndarray, mode: str = "mean"
+) -> np.ndarray:
+    """
+    Pool token embeddings (batch, tokens, dim) into sentence embeddings (batch, dim),
+    ignoring padding tokens.
+    """
+    if mode == "cls":
+        return hidden_states[:, 0]
+    mask = attention_mask[..., None].astype(hidden_states.dtype)
+    if mode == "max":
+        return np.where(mask > 0, hidden_states, -np.inf).max(axis=1)
+    summed = (hidden_states * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+class OnnxEmbeddings:
+    """
+    Drop-in replacement of HuggingFaceEmbeddings (embed_query / embed_documents) running the
+    ONNX export of a Hugging Face model. The weights are quantized to int8 once with
+    onnxruntime's dynamic quantization and cached.
+
+    Inference runs on a dedicated single-thread executor so that concurrent callers queue
+    instead of oversubscribing the CPU; ONNX Runtime parallelizes each batch over its own
+    intra-op pool of `threads` threads.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        model_dir: Optional[str] = None,
+        quantize: bool = True,
+        threads: Optional[int] = None,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        normalize_embeddings: bool = True,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.normalize_embeddings = normalize_embeddings
+        model_path, tokenizer_path, pooling_config = self._locate_files(model_name, model_dir)
+        self.pooling_mode = read_pooling_mode(pooling_config)
+        if quantize:
+            model_path = self._quantized_model(model_path, model_name, cache_dir)
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or max((os.cpu_count() or 2) // 2, 1)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="onnx-inference")
+        logger.info(
+            f"ONNX embedding model {model_name} loaded from {model_path} "
+            f"({options.intra_op_num_threads} threads, {self.pooling_mode} pooling)"
+        )
+
+    @staticmethod
+    def _locate_files(model_name: str, model_dir: Optional[str]):
+        if model_dir:
+            pooling_path = os.path.join(model_dir, "1_Pooling", "config.json")
+            pooling = None
+            if os.path.exists(pooling_path):
+                with open(pooling_path) as f:
+                    pooling = json.load(f)
+            return (
+                os.path.join(model_dir, ONNX_MODEL_FILE),
+                os.path.join(model_dir, "tokenizer.json"),
+                pooling,
+            )
+        from huggingface_hub import hf_hub_download
+
+        try:
+            model_path = hf_hub_download(model_name, ONNX_MODEL_FILE)
+        except Exception as e:
+            raise ValueError(
+                f"{model_name} has no {ONNX_MODEL_FILE}, export it with "
+                f"`optimum-cli export onnx --model {model_name} <dir>` and set EMBEDDING_ONNX_DIR"
+            ) from e
+        tokenizer_path = hf_hub_download(model_name, "tokenizer.json")
+        try:
+            with open(hf_hub_download(model_name, "1_Pooling/config.json")) as f:
+                pooling = json.load(f)
+        except Exception:
+            pooling = None
+        return model_path, tokenizer_path, pooling
+
+    @staticmethod
+    def _quantized_model(model_path: str, model_name: str, cache_dir: str) -> str:
+        quantized_path = quantized_model_path(model_path, model_name, cache_dir)
+        if os.path.exists(quantized_path):
+            return quantized_path
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        os.makedirs(os.path.dirname(quantized_path), exist_ok=True)
+        # Write to a temporary name first, a concurrent server must never load a partial file.
+        partial_path = f"{quantized_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        quantize_dynamic(model_path, partial_path, weight_type=QuantType.QInt8)
+        os.replace(partial_path, quantized_path)
+        logger.info(f"Quantized {model_name} to int8 in {quantized_path}")
+        return quantized_path
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64
+        )
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feed["token_type_ids"] = np.array(
+                [encoding.type_ids for encoding in encodings], dtype=np.int64
+            )
+        output = self.session.run(None, feed)[0]
+        # Exports with a pooling head already return (batch, dim).
+        embeddings = (
+            output
+            if output.ndim == 2
+            else pool_embeddings(output, attention_mask, self.pooling_mode)
+        )
+        if self.normalize_embeddings:
+            embeddings = normalize(embeddings)
+        return embeddings.astype(np.float32, copy=False)
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts in batches on the inference thread, as a (len(texts), dim) array."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        def run() -> np.ndarray:
+            return np.concatenate(
+                [
+                    self._embed_batch(texts[start : start + self.batch_size])
+                    for start in range(0, len(texts), self.batch_size)
+                ]
+            )
+
+        return self._executor.submit(run).result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
@@ -0,0 +1,156 @@
+"""MCP progress notifications, with previews of partial rows, for long-running tool calls."""
+
+from __future__ import annotations
+
+import contextvars
+import datetime
+import decimal
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, Mapping, Optional, Sequence
+
+import anyio
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+# _meta key of the partial rows in progress notifications: {"columns": [..], "rows": [[..]]}.
+PARTIAL_ROWS_META_KEY = "oceanbase/partial_rows"
+
+# Sends (progress, total, message, _meta) for the current request.
+SendProgress = Callable[[float, Optional[float], str, Optional[dict]], Awaitable[None]]
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+class ProgressReporter:
+    """
+    Progress of one tool call that the client asked progress for. Tools report from their
+    worker thread; while they run, a heartbeat reports the elapsed time whenever nothing was
+    reported for interval seconds, so that clients resetting their timeout on progress keep
+    waiting instead of retrying.
+
+    Progress values only grow, as the protocol requires: they count the completed items when
+    the tool reports them and are bumped by one otherwise; the message carries the details.
+    Up to max_partial_rows rows per call are attached to the notifications, so clients that
+    read them can show the first results before the call completes.
+    """
+
+    def __init__(self, send: SendProgress, interval: float = 2.0, max_partial_rows: int = 200):
+        self._send = send
+        self.interval = interval
+        self.partial_rows_left = max_partial_rows
+        self._progress = 0.0
+        self._started = self._last_sent = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _next(
+        self,
+        message: str,
+        completed: Optional[float],
+        total: Optional[float],
+        columns: Optional[Sequence[str]],
+        rows: Optional[Sequence[Sequence]],
+        heartbeat: bool = False,
+    ) -> Optional[tuple]:
+        with self._lock:
+            now = time.monotonic()
+            meta = None
+            if rows and columns is not None and self.partial_rows_left > 0:
+                # Rows of dictionary cursors are mappings of the columns.
+                batch = [
+                    [
+                        _json_value(value)
+                        for value in (row.values() if isinstance(row, Mapping) else row)
+                    ]
+                    for row in rows[: self.partial_rows_left]
+                ]
+                self.partial_rows_left -= len(batch)
+                meta = {PARTIAL_ROWS_META_KEY: {"columns": list(columns), "rows": batch}}
+            # Reports without rows are throttled to one per interval.
+            if meta is None and now - self._last_sent < self.interval:
+                return None
+            if heartbeat and total is None:
+                message = f"{message}, running for {now - self._started:.0f}s"
+            self._progress = max(float(completed or 0), self._progress + 1)
+            self._last_sent = now
+            return self._progress, total, message, meta
+
+    def report(
+        self,
+        message: str,
+        completed: Optional[float] = None,
+        total: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+        rows: Optional[Sequence[Sequence]] = None,
+    ):
+        """Send progress from the worker thread of the tool call."""
+        notification = self._next(message, completed, total, columns, rows)
+        if notification is not None:
+            try:
+                anyio.from_thread.run(self._send_safely, *notification)
+            except RuntimeError:
+                # Not on a worker thread of the event loop, e.g. a tool called directly.
+                pass
+
+    async def heartbeat(self, message: str):
+        while True:
+            await anyio.sleep(self.interval / 2)
+            notification = self._next(message, None, None, None, None, heartbeat=True)
+            if notification is not None:
+                await self._send_safely(*notification)
+
+    async def _send_safely(self, progress, total, message, meta):
+        try:
+            await self._send(progress, total, message, meta)
+        except Exception as e:
+            # A client that went away must not fail the call, its result is simply dropped.
+            logger.debug(f"Failed to send progress: {e}")
+
+
+_reporter: contextvars.ContextVar[Optional[ProgressReporter]] = contextvars.ContextVar(
+    "ob_mcp_progress", default=None
+)
+
+
+def report_progress(
+    message: str,
+    completed: Optional[float] = None,
+    total: Optional[float] = None,
+    columns: Optional[Sequence[str]] = None,
+    rows: Optional[Sequence[Sequence]] = None,
+):
+    """Report progress of the current tool call, a no-op when the client did not ask for it."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.report(message, completed, total, columns, rows)
+
+
+def progress_requested() -> bool:
+    return _reporter.get() is not None
+
+
+async def run_with_progress(call: Callable, reporter: Optional[ProgressReporter], name: str):
+    """Run a blocking tool call on a worker thread, reporting its progress to the client."""
+    if reporter is None:
+        return await anyio.to_thread.run_sync(call)
+    token = _reporter.set(reporter)
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(reporter.heartbeat, name)
+            try:
+                return await anyio.to_thread.run_sync(call)
+            finally:
+                tg.cancel_scope.cancel()
+    finally:
+        _reporter.reset(token)
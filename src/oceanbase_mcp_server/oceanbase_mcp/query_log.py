@@ -0,0 +1,300 @@
+"""Recorder of the SQL statements the server executes, for finding slow queries afterwards."""
+
+from __future__ import annotations
+
+import collections
+import contextvars
+import json
+import logging
+import logging.handlers
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Mapping, Optional
+
+from oceanbase_mcp.sql_text import normalize_sql, sql_digest
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+# Normalized statements are cut to this length in records, the digest covers the whole text.
+MAX_RECORDED_SQL_LENGTH = 2000
+TRACE_ID_SQL = "SELECT last_trace_id()"
+
+
+@dataclass
+class QueryRecord:
+    started_at: float
+    datasource: Optional[str]
+    digest: str
+    sql: str
+    elapsed_ms: float
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    # OceanBase trace id of slow statements, to look them up in GV$OB_SQL_AUDIT or the logs.
+    trace_id: Optional[str] = None
+    error: Optional[str] = None
+    client_id: Optional[str] = None
+
+
+class QueryRecorder:
+    """
+    The last capacity statements in a ring buffer, and every statement as a JSON line in an
+    optional file rotated at max_bytes, keeping backup_count old files. Statements taking
+    slow_ms or longer are slow: they are logged and their trace id is recorded.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        slow_ms: float = 1000.0,
+        path: Optional[str] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.slow_ms = slow_ms
+        self._records: collections.deque[QueryRecord] = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._file_logger = None
+        if path:
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger(f"oceanbase_mcp_server.query_log.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    @property
+    def enabled(self) -> bool:
+        return self._records.maxlen > 0 or self._file_logger is not None
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return elapsed_ms >= self.slow_ms
+
+    def record(
+        self,
+        sql: str,
+        elapsed_ms: float,
+        datasource: Optional[str] = None,
+        rows: Optional[int] = None,
+        nbytes: Optional[int] = None,
+        trace_id: Optional[str] = None,
+        error: Optional[str] = None,
+        client_id: Optional[str] = None,
+        started_at: Optional[float] = None,
+    ) -> QueryRecord:
+        normalized = normalize_sql(sql)
+        record = QueryRecord(
+            started_at=started_at if started_at is not None else time.time(),
+            datasource=datasource,
+            digest=sql_digest(sql),
+            sql=normalized[:MAX_RECORDED_SQL_LENGTH],
+            elapsed_ms=round(elapsed_ms, 3),
+            rows=rows,
+            bytes=nbytes,
+            trace_id=trace_id,
+            error=error,
+            client_id=client_id,
+        )
+        with self._lock:
+            self._records.append(record)
+        if self.is_slow(elapsed_ms):
+            logger.warning(
+                f"Slow query {record.digest} took {elapsed_ms:.0f} ms "
+                f"(trace id {trace_id}): {record.sql[:200]}"
+            )
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(asdict(record), ensure_ascii=False))
+        return record
+
+    def recent(
+        self,
+        min_elapsed_ms: float = 0.0,
+        digest: Optional[str] = None,
+        limit: int = 50,
+        client_id: Optional[str] = None,
+    ) -> list[QueryRecord]:
+        """Newest first, the records at least min_elapsed_ms slow, of a digest or a client."""
+        with self._lock:
+            records = list(self._records)
+        matching = []
+        for record in reversed(records):
+            if record.elapsed_ms < min_elapsed_ms:
+                continue
+            if digest is not None and record.digest != digest:
+                continue
+            if client_id is not None and record.client_id != client_id:
+                continue
+            matching.append(record)
+            if len(matching) >= limit:
+                break
+        return matching
+
+
+class QueryResult:
+    """Size of the result of the current statement, see note_result."""
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+        self.nbytes: Optional[int] = None
+
+
+_current_result: contextvars.ContextVar[Optional[QueryResult]] = contextvars.ContextVar(
+    "ob_mcp_query_result", default=None
+)
+
+
+def note_result(rows: int, nbytes: int):
+    """Record the size of the result the current recorded statement returned."""
+    result = _current_result.get()
+    if result is not None:
+        result.rows = rows
+        result.nbytes = nbytes
+
+
+def result_bytes(rows: list) -> int:
+    """Approximate size of fetched rows: their values as text, binary values by length."""
+    total = 0
+    for row in rows:
+        for value in row.values() if isinstance(row, Mapping) else row:
+            if value is None:
+                continue
+            total += len(value) if isinstance(value, (bytes, bytearray)) else len(str(value))
+    return total
+
+
+def fetch_trace_id(cursor) -> Optional[str]:
+    """last_trace_id() of the session of a DB-API cursor, None when it cannot be read."""
+    try:
+        cursor.execute(TRACE_ID_SQL)
+        row = cursor.fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        logger.debug(f"Could not read the trace id: {e}")
+        return None
+
+
+def connection_trace_id(connection) -> Optional[str]:
+    """
+    last_trace_id() of the session of a DB-API connection, read on a cursor of its own so that
+    the cursors of the caller keep their results. None when it cannot be read.
+    """
+    try:
+        cursor = connection.cursor()
+    except Exception as e:
+        logger.debug(f"Could not open a cursor for the trace id: {e}")
+        return None
+    try:
+        return fetch_trace_id(cursor)
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def recorded(
+    recorder: QueryRecorder,
+    cursor,
+    sql: str,
+    datasource: Optional[str] = None,
+    client_id: Optional[str] = None,
+    connection=None,
+):
+    """
+    Record the statement executed on cursor within the block. Its result size is the one
+    passed to note_result, else the row count of the cursor. The trace id of a slow statement
+    is read on another cursor of connection, the connection of cursor, when given.
+    """
+    result = QueryResult()
+    token = _current_result.set(result)
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield result
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _current_result.reset(token)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        rows = result.rows
+        if rows is None and getattr(cursor, "rowcount", -1) not in (None, -1):
+            rows = cursor.rowcount
+        trace_id = None
+        if connection is not None and recorder.is_slow(elapsed_ms):
+            trace_id = connection_trace_id(connection)
+        recorder.record(
+            sql,
+            elapsed_ms,
+            datasource=datasource,
+            rows=rows,
+            nbytes=result.nbytes,
+            trace_id=trace_id,
+            error=error,
+            client_id=client_id,
+            started_at=started_at,
+        )
+
+
+_instrumented_engines: weakref.WeakSet = weakref.WeakSet()
+_START_KEY = "ob_mcp_query_start"
+
+
+def instrument_engine(
+    engine,
+    recorder: QueryRecorder,
+    datasource: Optional[str] = None,
+    client_id: Optional[Callable[[], Optional[str]]] = None,
+):
+    """
+    Record the statements of a SQLAlchemy engine, once per engine. The trace id of slow
+    statements is read on a second cursor of the connection, except for streamed results
+    still being read on it.
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    from sqlalchemy import event
+
+    def caller() -> Optional[str]:
+        return client_id() if client_id is not None else None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_KEY, []).append((time.time(), time.perf_counter()))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at, start = conn.info[_START_KEY].pop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        trace_id = None
+        streamed = context is not None and context.execution_options.get("stream_results")
+        if recorder.is_slow(elapsed_ms) and not streamed:
+            trace_id = connection_trace_id(cursor.connection)
+        recorder.record(
+            statement,
+            elapsed_ms,
+            datasource=datasource,
+            rows=cursor.rowcount if cursor.rowcount >= 0 else None,
+            trace_id=trace_id,
+            client_id=caller(),
+            started_at=started_at,
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get(_START_KEY) if context.connection else None
+        if not starts or context.statement is None:
+            return
+        started_at, start = starts.pop()
+        recorder.record(
+            context.statement,
+            (time.perf_counter() - start) * 1000,
+            datasource=datasource,
+            error=str(context.original_exception),
+            client_id=caller(),
+            started_at=started_at,
+        )
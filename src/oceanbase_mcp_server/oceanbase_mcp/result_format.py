@@ -0,0 +1,43 @@
+"""Structured JSON output shared by the search tools."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence
+
+if TYPE_CHECKING:
+    from sqlalchemy import Table
+
+TRUNCATED_SUFFIX = "...[truncated]"
+
+
+def scalar_column_names(table: Table) -> list[str]:
+    """Names of the table columns that are not vectors, used as the default projection."""
+    from pyobvector import VECTOR
+
+    return [column.name for column in table.columns if not isinstance(column.type, VECTOR)]
+
+
+def truncate_value(value: Any, max_field_length: Optional[int]) -> Any:
+    """Shorten long text and binary values, other values are returned unchanged."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8", errors="replace")
+    if max_field_length and isinstance(value, str) and len(value) > max_field_length:
+        return value[:max_field_length] + TRUNCATED_SUFFIX
+    return value
+
+
+def row_to_record(
+    row: Sequence[Any],
+    column_names: Sequence[str],
+    max_field_length: Optional[int] = None,
+) -> dict[str, Any]:
+    """Map the leading values of a row to column names, truncating long fields."""
+    return {name: truncate_value(value, max_field_length) for name, value in zip(column_names, row)}
+
+
+def dump_results(table_name: str, records: Iterable[dict[str, Any]], **extra: Any) -> str:
+    """Serialize search results in one json.dumps call."""
+    records = list(records)
+    payload = {"table": table_name, **extra, "count": len(records), "results": records}
+    return json.dumps(payload, ensure_ascii=False, default=str)
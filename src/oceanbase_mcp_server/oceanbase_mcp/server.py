@@ -1,23 +1,88 @@
 from __future__ import annotations
 import logging
 import os
+import posixpath
+import re
+import signal
+import tempfile
+import threading
 import time
-from typing import Optional, List, Tuple
-from urllib import request, error
+from typing import TYPE_CHECKING, Optional, List, Tuple
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+from mcp.server.auth.middleware.auth_context import get_access_token
 from mcp.server.auth.provider import AccessToken, TokenVerifier
 from mcp.server.auth.settings import AuthSettings
-from mysql.connector import Error, connect
-from bs4 import BeautifulSoup
-import certifi
-import ssl
 from pydantic import BaseModel
-from pyobvector import ObVecClient, MatchAgainst, l2_distance, inner_product, cosine_distance
-from sqlalchemy import text
 import ast
+import contextlib
+import functools
+
+from oceanbase_mcp.admission import (
+    PRIORITY_METADATA,
+    PRIORITY_QUERY,
+    PRIORITY_REPORT,
+    AdmissionController,
+    parse_tool_limits,
+)
+from oceanbase_mcp.bulk_load import (
+    MAX_BATCH_ROWS,
+    LoadFailed,
+    ParallelLoader,
+    TableFile,
+    insert_statement,
+    map_columns,
+    quote_table_name,
+    select_columns,
+)
+from oceanbase_mcp.datasources import (
+    DEFAULT_DATASOURCE,
+    DataSource,
+    DataSourceRegistry,
+    load_datasources_file,
+)
+from oceanbase_mcp.fusion import reciprocal_rank_fusion, weighted_score_fusion
+from oceanbase_mcp.memory_scope import token_client_id
+from oceanbase_mcp.progress import (
+    ProgressReporter,
+    progress_requested,
+    report_progress,
+    run_with_progress,
+)
+from oceanbase_mcp.query_log import (
+    QueryRecorder,
+    instrument_engine,
+    note_result,
+    recorded,
+    result_bytes,
+)
+from oceanbase_mcp.result_format import (
+    dump_results,
+    row_to_record,
+    scalar_column_names,
+    truncate_value,
+)
+from oceanbase_mcp.sql_text import is_read_only
+from oceanbase_mcp.token_limits import (
+    DatabaseUsageStore,
+    TokenLimiter,
+    TokenLimits,
+    record_rows,
+)
+from oceanbase_mcp.top_sql import build_top_sql_query
+
+# Drivers, pyobvector (and with it SQLAlchemy and numpy), bs4 and certifi are imported by the
+# tools that use them: stdio clients start a server per session, and a deployment that only
+# runs execute_sql should not pay for the rest on every start.
+if TYPE_CHECKING:
+    from pyobvector import ObVecClient
+    from sqlalchemy import Connection, Table
+
+    from oceanbase_mcp.vector_codec import VectorLike
 
 # Configure logging
 logging.basicConfig(
@@ -29,9 +94,31 @@ load_dotenv()
 
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-small-en-v1.5")
 EMBEDDING_MODEL_PROVIDER = os.getenv("EMBEDDING_MODEL_PROVIDER", "huggingface")
+# Optional, skip resolving the dimension from the model when set.
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", 0))
 ENABLE_MEMORY = int(os.getenv("ENABLE_MEMORY", 0))
+# Options of the "onnx" provider: a local directory with onnx/model.onnx and tokenizer.json
+# instead of the Hugging Face repository, int8 quantization, and inference threads (0: auto).
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR")
+EMBEDDING_ONNX_QUANTIZE = bool(int(os.getenv("EMBEDDING_ONNX_QUANTIZE", 1)))
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", 0))
+# Threads running embedding inference, concurrent requests are coalesced into batches of up to
+# EMBEDDING_MAX_BATCH texts waiting at most EMBEDDING_MAX_WAIT_MS. 0 embeds in the caller.
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", 2))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", 32))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", 5))
+# Embedding requests allowed to wait for a worker, more are rejected.
+EMBEDDING_QUEUE_SIZE = int(os.getenv("EMBEDDING_QUEUE_SIZE", 256))
 
 TABLE_NAME_MEMORY = os.getenv("TABLE_NAME_MEMORY", "ob_mcp_memory")
+# Text fields longer than this are truncated in search results.
+DEFAULT_MAX_FIELD_LENGTH = int(os.getenv("SEARCH_MAX_FIELD_LENGTH", 2000))
+# Memories closer than this l2 distance to a new one are treated as near-duplicates on insert.
+MEMORY_DUPLICATE_DISTANCE = float(os.getenv("MEMORY_DUPLICATE_DISTANCE", 0.35))
+# Vector index parameters of the memory table, memory search uses l2 distance.
+MEMORY_VECTOR_INDEX_PARAMS = os.getenv(
+    "MEMORY_VECTOR_INDEX_PARAMS", "distance=l2, type=hnsw, lib=vsag"
+)
 
 logger.info(
     f" ENABLE_MEMORY: {ENABLE_MEMORY},EMBEDDING_MODEL_NAME: {EMBEDDING_MODEL_NAME}, EMBEDDING_MODEL_PROVIDER: {EMBEDDING_MODEL_PROVIDER}"
@@ -48,15 +135,65 @@ class OBConnection(BaseModel):
 
 class OBMemoryItem(BaseModel):
     mem_id: int = None
+    namespace: Optional[str] = None
     content: str
     meta: dict
     embedding: List[float]
 
 
+# Admission control of the tools: calls running at once in total (0: no limit) and per tool,
+# e.g. "get_ob_ash_report=2,execute_sql=8". Calls beyond the limits wait, cheap metadata calls
+# first, up to ADMISSION_QUEUE_SIZE calls for at most ADMISSION_MAX_WAIT seconds, more are
+# rejected with a "Server busy" error.
+MAX_INFLIGHT_TOOLS = int(os.getenv("MAX_INFLIGHT_TOOLS", 16))
+TOOL_CONCURRENCY = parse_tool_limits(
+    os.getenv(
+        "TOOL_CONCURRENCY",
+        "get_ob_ash_report=2,top_sql=2,search_oceanbase_document=4,execute_sql=8,load_table=2",
+    )
+)
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 32))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", 10))
+# Tool calls of clients that send a progress token report progress at most every
+# PROGRESS_INTERVAL seconds, and a heartbeat while nothing else is reported. The first
+# PROGRESS_PARTIAL_ROWS rows of large results are sent ahead in the notifications.
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", 2))
+PROGRESS_PARTIAL_ROWS = int(os.getenv("PROGRESS_PARTIAL_ROWS", 200))
+# Rows fetched per round trip by execute_sql when the client asked for progress.
+PROGRESS_FETCH_BATCH = 500
+# The last QUERY_LOG_SIZE statements the server executed are kept for recent_queries, those
+# taking SLOW_QUERY_MS or longer with their trace id. QUERY_LOG_FILE also appends every
+# statement as a JSON line to a file rotated at QUERY_LOG_FILE_MAX_MB, keeping
+# QUERY_LOG_FILE_BACKUPS old files.
+QUERY_LOG_SIZE = int(os.getenv("QUERY_LOG_SIZE", 1000))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 1000))
+QUERY_LOG_FILE = os.getenv("QUERY_LOG_FILE")
+QUERY_LOG_FILE_MAX_MB = float(os.getenv("QUERY_LOG_FILE_MAX_MB", 10))
+QUERY_LOG_FILE_BACKUPS = int(os.getenv("QUERY_LOG_FILE_BACKUPS", 5))
+# load_table reads files of the server host, only under LOAD_TABLE_DIR (none when it is unset),
+# on up to LOAD_TABLE_WORKERS connections of its own per call.
+LOAD_TABLE_DIR = os.getenv("LOAD_TABLE_DIR")
+LOAD_TABLE_WORKERS = int(os.getenv("LOAD_TABLE_WORKERS", 4))
+LOAD_TABLE_BATCH_ROWS = int(os.getenv("LOAD_TABLE_BATCH_ROWS", 1000))
+
+
 # Check if authentication should be enabled based on ALLOWED_TOKENS
 # This check happens after load_dotenv() so it can read from .env file
 allowed_tokens_str = os.getenv("ALLOWED_TOKENS", "")
 enable_auth = bool(allowed_tokens_str.strip())
+# Limits of each token when authentication is enabled, 0 lifts a limit: tool calls per second
+# (with bursts of TOKEN_RATE_BURST, default one second's worth), concurrent calls, and rows
+# fetched and result bytes per UTC day. TOKEN_LIMITS overrides them per token, a JSON object
+# keyed by token or by its client id: {"<token>": {"rate": 20, "daily_rows": 10000000}}.
+TOKEN_RATE_LIMIT = float(os.getenv("TOKEN_RATE_LIMIT", 0))
+TOKEN_RATE_BURST = int(os.getenv("TOKEN_RATE_BURST", 0))
+TOKEN_MAX_CONCURRENT = int(os.getenv("TOKEN_MAX_CONCURRENT", 0))
+TOKEN_DAILY_ROWS = int(os.getenv("TOKEN_DAILY_ROWS", 0))
+TOKEN_DAILY_BYTES = int(os.getenv("TOKEN_DAILY_BYTES", 0))
+TOKEN_LIMITS = json.loads(os.getenv("TOKEN_LIMITS", "{}"))
+# "memory" counts the daily usage per process, "database" in a table of the default data source
+# shared by all server processes using it.
+TOKEN_USAGE_STORE = os.getenv("TOKEN_USAGE_STORE", "memory")
 
 
 class SimpleTokenVerifier(TokenVerifier):
@@ -96,18 +233,143 @@ class SimpleTokenVerifier(TokenVerifier):
 
         logger.debug(f"Valid token accepted: {token[:10]}...")
         return AccessToken(
-            token=token, client_id="authenticated_client", scopes=["read", "write"], expires_at=None
+            token=token,
+            client_id=token_client_id(token),
+            scopes=["read", "write"],
+            expires_at=None,
         )
 
 
-db_conn_info = OBConnection(
-    host=os.getenv("OB_HOST", "localhost"),
-    port=os.getenv("OB_PORT", 2881),
-    user=os.getenv("OB_USER"),
-    password=os.getenv("OB_PASSWORD"),
-    database=os.getenv("OB_DATABASE"),
+# Optional JSON or TOML file of named data sources, so that one server serves several tenants
+# or clusters: {"default": "tp", "datasources": {"tp": {"host": ..., "port": ..., "user": ...,
+# "password_env": "TP_PASSWORD", "database": ..., "pool_size": 5}, ...}}
+OB_DATASOURCES_FILE = os.getenv("OB_DATASOURCES_FILE")
+# Size of the connection pool of the OB_HOST data source.
+OB_POOL_SIZE = int(os.getenv("OB_POOL_SIZE", 5))
+# Opt-in read/write splitting of execute_sql for the OB_HOST data source: read-only statements
+# run with ob_read_consistency=weak, on OB_READ_HOST:OB_READ_PORT (e.g. a read-only OBProxy)
+# when set, otherwise on the same endpoint. Data sources of the file use read_routing,
+# read_host and read_port.
+OB_READ_ROUTING = bool(int(os.getenv("OB_READ_ROUTING", 0)))
+OB_READ_HOST = os.getenv("OB_READ_HOST")
+OB_READ_PORT = int(os.getenv("OB_READ_PORT", 0)) or None
+
+datasources = (
+    DataSourceRegistry(*load_datasources_file(OB_DATASOURCES_FILE))
+    if OB_DATASOURCES_FILE
+    else DataSourceRegistry()
+)
+if not OB_DATASOURCES_FILE or os.getenv("OB_USER"):
+    env_conn_info = OBConnection(
+        host=os.getenv("OB_HOST", "localhost"),
+        port=os.getenv("OB_PORT", 2881),
+        user=os.getenv("OB_USER"),
+        password=os.getenv("OB_PASSWORD"),
+        database=os.getenv("OB_DATABASE"),
+    )
+    # A data source of the file with the same name takes precedence.
+    datasources.add(
+        DataSource(
+            DEFAULT_DATASOURCE,
+            **env_conn_info.model_dump(),
+            pool_size=OB_POOL_SIZE,
+            read_routing=OB_READ_ROUTING or bool(OB_READ_HOST),
+            read_host=OB_READ_HOST,
+            read_port=OB_READ_PORT,
+        ),
+        replace=False,
+    )
+# The default data source, also used by the resources and the memory tools.
+db_conn_info = OBConnection(**datasources.get().connect_args())
+logger.info(f"Data sources: {datasources.names()}, default: {datasources.default}")
+
+if TOKEN_USAGE_STORE not in ("memory", "database"):
+    raise ValueError(f"TOKEN_USAGE_STORE must be memory or database, not {TOKEN_USAGE_STORE!r}")
+_default_token_limits = TokenLimits(
+    rate=TOKEN_RATE_LIMIT,
+    burst=TOKEN_RATE_BURST,
+    max_concurrent=TOKEN_MAX_CONCURRENT,
+    daily_rows=TOKEN_DAILY_ROWS,
+    daily_bytes=TOKEN_DAILY_BYTES,
+)
+token_limiter = TokenLimiter(
+    _default_token_limits,
+    overrides={
+        # Raw tokens are keyed by their client id, which is what the access token carries.
+        (key if key.startswith("token-") else token_client_id(key)): TokenLimits.from_dict(
+            value, base=_default_token_limits
+        )
+        for key, value in TOKEN_LIMITS.items()
+    },
+    store=DatabaseUsageStore(lambda: _connect()) if TOKEN_USAGE_STORE == "database" else None,
 )
 
+
+query_recorder = QueryRecorder(
+    capacity=QUERY_LOG_SIZE,
+    slow_ms=SLOW_QUERY_MS,
+    path=QUERY_LOG_FILE,
+    max_bytes=int(QUERY_LOG_FILE_MAX_MB * 1024 * 1024),
+    backup_count=QUERY_LOG_FILE_BACKUPS,
+)
+
+
+def _caller_client_id() -> Optional[str]:
+    access_token = get_access_token()
+    return access_token.client_id if access_token is not None else None
+
+
+def _recorded(conn, cursor, sql: str, datasource: Optional[str] = None):
+    """Record the statement executed on cursor, a cursor of conn, within the block."""
+    if not query_recorder.enabled:
+        return contextlib.nullcontext()
+    return recorded(
+        query_recorder,
+        cursor,
+        sql,
+        datasource=datasources.get(datasource).name,
+        client_id=_caller_client_id(),
+        connection=conn,
+    )
+
+
+def _connect(datasource: Optional[str] = None, read_only: bool = False):
+    """
+    A pooled mysql.connector connection to a data source, the default one when None. With
+    read_only, data sources with read routing use their weak-consistency pool.
+    """
+    return datasources.connect(datasource, read_only=read_only)
+
+
+def _fetchall(cursor) -> list:
+    """
+    All rows of a cursor, counted against the daily row quota of the caller's token and noted
+    in the query log. When the client asked for progress, rows are fetched in batches and the
+    first ones sent ahead.
+    """
+    if not progress_requested() or cursor.description is None:
+        rows = cursor.fetchall()
+    else:
+        columns = [desc[0] for desc in cursor.description]
+        rows = []
+        while batch := cursor.fetchmany(PROGRESS_FETCH_BATCH):
+            rows.extend(batch)
+            report_progress(f"Fetched {len(rows)} rows", len(rows), columns=columns, rows=batch)
+    record_rows(len(rows))
+    note_result(len(rows), result_bytes(rows))
+    return rows
+
+
+def _db_error() -> type:
+    """
+    mysql.connector.Error for `except _db_error()`, the clause is only evaluated when an
+    exception is raised, so the driver is not imported before the first query.
+    """
+    from mysql.connector import Error
+
+    return Error
+
+
 if enable_auth:
     logger.info("Authentication enabled - ALLOWED_TOKENS configured")
     # Initialize server with token verifier and minimal auth settings
@@ -125,19 +387,108 @@ else:
     # Initialize server without authentication
     app = FastMCP("oceanbase_mcp_server")
 
+admission = AdmissionController(
+    max_in_flight=MAX_INFLIGHT_TOOLS,
+    tool_limits=TOOL_CONCURRENCY,
+    max_queue=ADMISSION_QUEUE_SIZE,
+    max_wait=ADMISSION_MAX_WAIT,
+)
+
+
+def _admitted(func, priority: int = PRIORITY_QUERY):
+    """
+    The tool func, run on a worker thread once `admission` grants it a slot, so that a slow
+    call neither blocks the event loop nor takes more than its share of connections. The
+    context, and with it the access token of the call, is carried over to the thread.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        call = functools.partial(func, *args, **kwargs)
+        reporter = _progress_reporter()
+        access_token = get_access_token()
+        if access_token is None or not token_limiter.enabled:
+            async with admission.admit(func.__name__, priority):
+                return await run_with_progress(call, reporter, func.__name__)
+        # Limits of the token are checked first, a throttled client does not queue for a slot.
+        with token_limiter.call(access_token.client_id):
+            async with admission.admit(func.__name__, priority):
+                return await run_with_progress(
+                    functools.partial(_metered, access_token.client_id, call),
+                    reporter,
+                    func.__name__,
+                )
+
+    return wrapper
+
+
+def _progress_reporter() -> Optional[ProgressReporter]:
+    """A reporter of the current request, None when its client did not send a progress token."""
+    try:
+        request_context = app.get_context().request_context
+    except ValueError:
+        # Called outside of a request, e.g. through app.call_tool.
+        return None
+    if request_context.meta is None:
+        return None
+    progress_token = request_context.meta.progressToken
+    if progress_token is None:
+        return None
+    import mcp.types as types
+
+    async def send(progress, total, message, meta):
+        await request_context.session.send_notification(
+            types.ServerNotification(
+                types.ProgressNotification(
+                    params=types.ProgressNotificationParams(
+                        progressToken=progress_token,
+                        progress=progress,
+                        total=total,
+                        message=message,
+                        _meta=meta,
+                    )
+                )
+            ),
+            related_request_id=request_context.request_id,
+        )
+
+    return ProgressReporter(send, PROGRESS_INTERVAL, PROGRESS_PARTIAL_ROWS)
+
+
+def _metered(client_id: str, call):
+    """Run a tool call, counting its rows and result bytes against the quotas of the token."""
+    with token_limiter.metered(client_id) as usage:
+        result = call()
+        usage.nbytes = len(str(result).encode("utf-8"))
+    return result
+
+
+def _tool(priority: int = PRIORITY_QUERY, **kwargs):
+    """
+    Like app.tool(), with admission control. The decorated function stays a plain function,
+    other tools call it directly without taking a second slot.
+    """
+
+    def decorator(func):
+        app.add_tool(_admitted(func, priority), **kwargs)
+        return func
+
+    return decorator
+
 
 @app.resource("oceanbase://sample/{table}", description="table sample")
 def table_sample(table: str) -> str:
     try:
-        with connect(**db_conn_info.model_dump()) as conn:
+        with _connect() as conn:
             with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM `%s` LIMIT 100", params=(table,))
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
+                with _recorded(conn, cursor, "SELECT * FROM `%s` LIMIT 100"):
+                    cursor.execute("SELECT * FROM `%s` LIMIT 100", params=(table,))
+                    columns = [desc[0] for desc in cursor.description]
+                    rows = _fetchall(cursor)
                 result = [",".join(map(str, row)) for row in rows]
                 return "\n".join([",".join(columns)] + result)
 
-    except Error:
+    except _db_error():
         return f"Failed to sample table: {table}"
 
 
@@ -145,85 +496,96 @@ def table_sample(table: str) -> str:
 def list_tables() -> str:
     """List OceanBase tables as resources."""
     try:
-        with connect(**db_conn_info.model_dump()) as conn:
+        with _connect() as conn:
             with conn.cursor() as cursor:
-                cursor.execute("SHOW TABLES")
-                tables = cursor.fetchall()
+                with _recorded(conn, cursor, "SHOW TABLES"):
+                    cursor.execute("SHOW TABLES")
+                    tables = _fetchall(cursor)
+                    columns = [desc[0] for desc in cursor.description]
+                    rows = cursor.fetchall()
                 logger.info(f"Found tables: {tables}")
                 resp_header = "Tables of this table: \n"
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
                 result = [",".join(map(str, row)) for row in rows]
                 return resp_header + ("\n".join([",".join(columns)] + result))
-    except Error as e:
+    except _db_error() as e:
         logger.error(f"Failed to list tables: {str(e)}")
         return "Failed to list tables"
 
 
-@app.tool()
-def execute_sql(sql: str) -> str:
-    """Execute an SQL on the OceanBase server."""
+@_tool()
+def execute_sql(sql: str, datasource: Optional[str] = None, strong_read: bool = False) -> str:
+    """
+    Execute an SQL on the OceanBase server.
+
+    Args:
+        sql: The SQL statement.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
+        strong_read: When read/write splitting is enabled, read-only statements may see data a
+            few seconds old; set true to read from the leader, e.g. right after a write.
+    """
     logger.info(f"Calling tool: execute_sql  with arguments: {sql}")
 
     try:
-        with connect(**db_conn_info.model_dump()) as conn:
+        with _connect(datasource, read_only=not strong_read and is_read_only(sql)) as conn:
             with conn.cursor() as cursor:
-                cursor.execute(sql)
-
-                # Special handling for SHOW TABLES
-                if sql.strip().upper().startswith("SHOW TABLES"):
-                    tables = cursor.fetchall()
-                    result = [f"Tables in {db_conn_info.database}: "]  # Header
-                    result.extend([table[0] for table in tables])
-                    return "\n".join(result)
-
-                elif sql.strip().upper().startswith("SHOW COLUMNS"):
-                    resp_header = "Columns info of this table: \n"
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return resp_header + ("\n".join([",".join(columns)] + result))
-
-                elif sql.strip().upper().startswith("DESCRIBE"):
-                    resp_header = "Description of this table: \n"
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return resp_header + ("\n".join([",".join(columns)] + result))
-
-                # Regular SELECT queries
-                elif sql.strip().upper().startswith("SELECT"):
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return "\n".join([",".join(columns)] + result)
-
-                # Regular SHOW queries
-                elif sql.strip().upper().startswith("SHOW"):
-                    rows = cursor.fetchall()
-                    return rows
-                # process procedural invoke
-                elif sql.strip().upper().startswith("CALL"):
-                    rows = cursor.fetchall()
-                    if not rows:
-                        return "No result return."
-                    # the first column contains the report text
-                    return rows[0]
-                # Non-SELECT queries
-                else:
-                    conn.commit()
-                    return f"Sql executed successfully. Rows affected: {cursor.rowcount}"
-
-    except Error as e:
+                with _recorded(conn, cursor, sql, datasource):
+                    cursor.execute(sql)
+
+                    # Special handling for SHOW TABLES
+                    if sql.strip().upper().startswith("SHOW TABLES"):
+                        tables = _fetchall(cursor)
+                        result = [f"Tables in {datasources.get(datasource).database}: "]  # Header
+                        result.extend([table[0] for table in tables])
+                        return "\n".join(result)
+
+                    elif sql.strip().upper().startswith("SHOW COLUMNS"):
+                        resp_header = "Columns info of this table: \n"
+                        columns = [desc[0] for desc in cursor.description]
+                        rows = _fetchall(cursor)
+                        result = [",".join(map(str, row)) for row in rows]
+                        return resp_header + ("\n".join([",".join(columns)] + result))
+
+                    elif sql.strip().upper().startswith("DESCRIBE"):
+                        resp_header = "Description of this table: \n"
+                        columns = [desc[0] for desc in cursor.description]
+                        rows = _fetchall(cursor)
+                        result = [",".join(map(str, row)) for row in rows]
+                        return resp_header + ("\n".join([",".join(columns)] + result))
+
+                    # Regular SELECT queries
+                    elif sql.strip().upper().startswith("SELECT"):
+                        columns = [desc[0] for desc in cursor.description]
+                        rows = _fetchall(cursor)
+                        result = [",".join(map(str, row)) for row in rows]
+                        return "\n".join([",".join(columns)] + result)
+
+                    # Regular SHOW queries
+                    elif sql.strip().upper().startswith("SHOW"):
+                        rows = _fetchall(cursor)
+                        return rows
+                    # process procedural invoke
+                    elif sql.strip().upper().startswith("CALL"):
+                        rows = _fetchall(cursor)
+                        if not rows:
+                            return "No result return."
+                        # the first column contains the report text
+                        return rows[0]
+                    # Non-SELECT queries
+                    else:
+                        conn.commit()
+                        return f"Sql executed successfully. Rows affected: {cursor.rowcount}"
+
+    except _db_error() as e:
         logger.error(f"Error executing SQL '{sql}': {e}")
         return f"Error executing sql: {str(e)}"
 
 
-@app.tool()
+@_tool(PRIORITY_REPORT)
 def get_ob_ash_report(
     start_time: str,
     end_time: str,
     tenant_id: Optional[str] = None,
+    datasource: Optional[str] = None,
 ) -> str:
     """
     Get OceanBase Active Session History report.
@@ -239,26 +601,256 @@ def get_ob_ash_report(
         start_time: Sample Start Time,Format: yyyy-MM-dd HH:mm:ss.
         end_time: Sample End Time,Format: yyyy-MM-dd HH:mm:ss.
         tenant_id: Used to specify the tenant ID for generating the ASH Report. Leaving this field blank or setting it to NULL indicates no restriction on the TENANT_ID.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
     logger.info(
         f"Calling tool: get_ob_ash_report  with arguments: {start_time}, {end_time}, {tenant_id}"
     )
     if tenant_id is None:
         tenant_id = "NULL"
+    report_progress(f"Generating ASH report from {start_time} to {end_time}")
     # Construct the SQL query
     sql_query = f"""
         CALL DBMS_WORKLOAD_REPOSITORY.ASH_REPORT('{start_time}','{end_time}', NULL, NULL, NULL, 'TEXT', NULL, NULL, {tenant_id});
     """
     try:
-        result = execute_sql(sql_query)
+        result = execute_sql(sql_query, datasource)
         logger.info(f"ASH report result: {result}")
         return result
-    except Error as e:
+    except _db_error() as e:
         logger.error(f"Error get ASH report,executing SQL '{sql_query}': {e}")
         return f"Error get ASH report,{str(e)}"
 
 
-@app.tool(name="get_current_time", description="Get current time")
+@_tool(PRIORITY_REPORT)
+def top_sql(
+    order_by: str = "elapsed",
+    window_minutes: int = 15,
+    top_n: int = 10,
+    source: str = "sql_audit",
+    tenant_id: Optional[int] = None,
+    datasource: Optional[str] = None,
+) -> str:
+    """
+    Find the SQL statements that load the database most, aggregated by SQL id on the server.
+    Use it to answer "why is the database slow" before writing queries against the audit
+    views, which are large and slow to scan. Times are in microseconds.
+
+    Args:
+        order_by: Ranking, "elapsed" (total elapsed time), "cpu", "executions" or "rows_read".
+        window_minutes: Only statements executed in the last window_minutes, at most 1440.
+        top_n: Number of statements to return, at most 100.
+        source: "sql_audit" aggregates the executions recorded in GV$OB_SQL_AUDIT, exact but
+            limited to what the audit buffer still holds. "plan_cache" aggregates the totals of
+            the plans in GV$OB_PLAN_CACHE_PLAN_STAT active within the window, which cover
+            longer periods but count since the plan was loaded.
+        tenant_id: Only statements of this tenant, only the sys tenant sees other tenants.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
+    """
+    logger.info(
+        f"Calling tool: top_sql with arguments: {order_by}, {window_minutes}, {top_n}, {source}"
+    )
+    sql, params = build_top_sql_query(source, order_by, window_minutes, top_n, tenant_id)
+    report_progress(f"Aggregating {source} of the last {window_minutes} minutes")
+    try:
+        with _connect(datasource) as conn:
+            with conn.cursor(dictionary=True) as cursor:
+                with _recorded(conn, cursor, sql, datasource):
+                    cursor.execute(sql, params)
+                    rows = _fetchall(cursor)
+    except _db_error() as e:
+        logger.error(f"Error executing top_sql on {source}: {e}")
+        return f"Error executing top_sql: {str(e)}"
+    return json.dumps(
+        {
+            "source": source,
+            "order_by": order_by,
+            "window_minutes": window_minutes,
+            "statements": rows,
+        },
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+@_tool(PRIORITY_METADATA)
+def recent_queries(
+    min_elapsed_ms: float = 0,
+    digest: Optional[str] = None,
+    limit: int = 20,
+) -> str:
+    """
+    List the SQL statements this server executed recently, newest first, to find out what ran
+    and how long it took after the fact. Each record has the normalized statement, its digest
+    (the same for all executions of one statement shape), the elapsed time in milliseconds,
+    rows and result bytes, an error if it failed, and for slow statements the OceanBase trace
+    id, to look the execution up in GV$OB_SQL_AUDIT or the server logs.
+
+    Args:
+        min_elapsed_ms: Only statements that took at least this long.
+        digest: Only executions of the statement with this digest.
+        limit: Number of statements to return, at most 500.
+    """
+    logger.info(f"Calling tool: recent_queries with arguments: {min_elapsed_ms}, {digest}")
+    records = query_recorder.recent(
+        min_elapsed_ms=min_elapsed_ms,
+        digest=digest,
+        limit=max(1, min(limit, 500)),
+        # Authenticated callers only see their own statements.
+        client_id=_caller_client_id() if enable_auth else None,
+    )
+    return json.dumps(
+        {
+            "slow_query_ms": query_recorder.slow_ms,
+            "queries": [
+                {
+                    **asdict(record),
+                    "started_at": time.strftime(
+                        "%Y-%m-%d %H:%M:%S", time.localtime(record.started_at)
+                    ),
+                }
+                for record in records
+            ],
+        },
+        ensure_ascii=False,
+    )
+
+
+def _path_under(directory: Optional[str], setting: str, path: str) -> str:
+    """
+    The real path of a file of the server host a tool reads or writes, relative paths are under
+    directory. Tools only touch files under the directory their setting names, none when unset.
+    """
+    if not directory:
+        raise ValueError(f"Set {setting} to the directory of the files this tool may access")
+    root = os.path.realpath(directory)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([resolved, root]) != root:
+        raise ValueError(f"Only files under {directory} are allowed")
+    return resolved
+
+
+def _load_table_path(path: str) -> str:
+    """The real path of a file to load, relative paths are under LOAD_TABLE_DIR."""
+    resolved = _path_under(LOAD_TABLE_DIR, "LOAD_TABLE_DIR", path)
+    if not os.path.isfile(resolved):
+        raise ValueError(f"No such file: {path}")
+    return resolved
+
+
+@_tool(PRIORITY_REPORT)
+def load_table(
+    path: str,
+    table_name: str,
+    file_format: Optional[str] = None,
+    column_map: Optional[dict[str, Optional[str]]] = None,
+    columns: Optional[list[str]] = None,
+    delimiter: str = ",",
+    method: str = "insert",
+    batch_rows: int = LOAD_TABLE_BATCH_ROWS,
+    datasource: Optional[str] = None,
+) -> str:
+    """
+    Load a CSV, NDJSON or Parquet file of the server host into an existing table, instead of
+    generating INSERT statements with execute_sql. The file is streamed in chunks of batch_rows
+    rows, loaded in parallel on several connections, and each chunk is committed on its own:
+    when a load fails, the result tells how many rows were committed before.
+
+    Args:
+        path: Path of the file under LOAD_TABLE_DIR on the server host, e.g. "orders.csv".
+        table_name: Table to load into, "db.table" for a table of another database.
+        file_format: "csv", "ndjson" or "parquet", guessed from the extension when omitted.
+        column_map: {file column: table column} for file columns named differently in the
+            table, null to skip a file column. Other columns load into the column of their name.
+        columns: Column names of a CSV file without header line, or the columns to read of an
+            NDJSON or Parquet file.
+        delimiter: Field delimiter of CSV files, tab for .tsv files.
+        method: "insert" runs multi-row INSERT statements. "load_data" sends each chunk with
+            LOAD DATA LOCAL INFILE, faster for large files, which the server must allow; rows
+            with duplicate keys are then skipped instead of failing the load.
+        batch_rows: Rows per statement, at most 10000.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
+    """
+    logger.info(f"Calling tool: load_table with arguments: {path}, {table_name}, {method}")
+    if not 1 <= batch_rows <= MAX_BATCH_ROWS:
+        raise ValueError(f"batch_rows must be between 1 and {MAX_BATCH_ROWS}")
+    table_file = TableFile(
+        _load_table_path(path), file_format, delimiter=delimiter, columns=columns
+    )
+    try:
+        with _connect(datasource) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT * FROM {quote_table_name(table_name)} LIMIT 0")
+                table_columns = [desc[0] for desc in cursor.description]
+                cursor.fetchall()
+    except _db_error() as e:
+        logger.error(f"Error reading the columns of {table_name}: {e}")
+        return f"Error loading table: {str(e)}"
+    mapping = map_columns(table_file.columns, table_columns, column_map)
+    target_columns = [column for _, column in mapping]
+    # LOAD DATA LOCAL may only send the chunk files the loader writes to a directory of its own,
+    # whatever file the server asks for.
+    tmp_dir = tempfile.TemporaryDirectory(prefix="ob_mcp_load_") if method == "load_data" else None
+    connect_options = {"allow_local_infile_in_path": tmp_dir.name} if tmp_dir else {}
+    loader = ParallelLoader(
+        lambda: datasources.dedicated_connection(datasource, **connect_options),
+        table_name,
+        target_columns,
+        method=method,
+        workers=LOAD_TABLE_WORKERS,
+        tmp_dir=tmp_dir.name if tmp_dir else None,
+    )
+
+    def on_progress(rows: int, chunks: int, elapsed: float):
+        rate = rows / elapsed if elapsed > 0 else 0
+        report_progress(
+            f"Loaded {rows} rows in {chunks} chunks, {rate:.0f} rows/s", rows, table_file.total_rows
+        )
+
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        result = loader.load(
+            select_columns(table_file.chunks(batch_rows), [index for index, _ in mapping]),
+            on_progress,
+        )
+        rows, chunks = result.rows, result.chunks
+    except LoadFailed as e:
+        logger.error(f"Loading {path} into {table_name} failed after {e.rows} rows: {e}")
+        rows, chunks, error = e.rows, e.chunks, str(e)
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    elapsed = time.perf_counter() - start
+    if query_recorder.enabled:
+        # One record for the whole load, of the statement shape the chunks ran.
+        query_recorder.record(
+            insert_statement(table_name, target_columns, 1),
+            elapsed * 1000,
+            datasource=datasources.get(datasource).name,
+            rows=rows,
+            error=error,
+            client_id=_caller_client_id(),
+            started_at=started_at,
+        )
+    summary = {
+        "table": table_name,
+        "path": table_file.path,
+        "format": table_file.file_format,
+        "method": method,
+        "columns": {table_file.columns[index]: column for index, column in mapping},
+        "rows": rows,
+        "chunks": chunks,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else rows,
+    }
+    if error is not None:
+        summary["error"] = f"{error}, the {rows} rows of the committed chunks stay loaded"
+    return json.dumps(summary, ensure_ascii=False)
+
+
+@_tool(PRIORITY_METADATA, name="get_current_time", description="Get current time")
 def get_current_time() -> str:
     local_time = time.localtime()
     formatted_time = time.strftime("%Y-%m-%d %H:%M:%S", local_time)
@@ -266,60 +858,85 @@ def get_current_time() -> str:
     return formatted_time
 
 
-@app.tool()
-def get_current_tenant() -> str:
+@_tool(PRIORITY_METADATA)
+def list_datasources() -> str:
+    """
+    List the data sources this server can query, pass their name as `datasource` to the SQL
+    and search tools.
+    """
+    default = datasources.default
+    return json.dumps(
+        [
+            {**datasources.get(name).describe(), "default": name == default}
+            for name in datasources.names()
+        ],
+        ensure_ascii=False,
+    )
+
+
+@_tool(PRIORITY_METADATA)
+def get_current_tenant(datasource: Optional[str] = None) -> str:
     """
     Get the current tenant name from oceanbase.
+
+    Args:
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
     logger.info("Calling tool: get_current_tenant")
     sql_query = "show tenant"
     try:
-        result = ast.literal_eval(execute_sql(sql_query))
+        result = ast.literal_eval(execute_sql(sql_query, datasource))
         logger.info(f"Current tenant: {result}")
         return result[0][0]
-    except Error as e:
+    except _db_error() as e:
         logger.error(f"Error executing SQL '{sql_query}': {e}")
         return f"Error executing query: {str(e)}"
 
 
-@app.tool()
-def get_all_server_nodes():
+@_tool(PRIORITY_METADATA)
+def get_all_server_nodes(datasource: Optional[str] = None):
     """
     Get all server nodes from oceanbase.
     You need to be sys tenant to get all server nodes.
+
+    Args:
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
-    tenant = get_current_tenant()
+    tenant = get_current_tenant(datasource)
     if tenant != "sys":
         raise ValueError("Only sys tenant can get all server nodes")
 
     logger.info("Calling tool: get_all_server_nodes")
     sql_query = "select * from oceanbase.DBA_OB_SERVERS"
     try:
-        return execute_sql(sql_query)
-    except Error as e:
+        return execute_sql(sql_query, datasource)
+    except _db_error() as e:
         logger.error(f"Error executing SQL '{sql_query}': {e}")
         return f"Error executing query: {str(e)}"
 
 
-@app.tool()
-def get_resource_capacity():
+@_tool(PRIORITY_METADATA)
+def get_resource_capacity(datasource: Optional[str] = None):
     """
     Get resource capacity from oceanbase.
     You need to be sys tenant to get resource capacity.
+
+    Args:
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
-    tenant = get_current_tenant()
+    tenant = get_current_tenant(datasource)
     if tenant != "sys":
         raise ValueError("Only sys tenant can get resource capacity")
     logger.info("Calling tool: get_resource_capacity")
     sql_query = "select * from oceanbase.GV$OB_SERVERS"
     try:
-        return execute_sql(sql_query)
-    except Error as e:
+        return execute_sql(sql_query, datasource)
+    except _db_error() as e:
         logger.error(f"Error executing SQL '{sql_query}': {e}")
         return f"Error executing query: {str(e)}"
 
 
-@app.tool()
+@_tool(PRIORITY_REPORT)
 def search_oceanbase_document(keyword: str) -> str:
     """
     This tool is designed to provide context-specific information about OceanBase to a large language model (LLM) to enhance the accuracy and relevance of its responses.
@@ -347,6 +964,11 @@ def search_oceanbase_document(keyword: str) -> str:
     }
     # Turn the dictionary into a JSON string, then change it to bytes
     qeury_param = json.dumps(qeury_param).encode("utf-8")
+    import ssl
+    from urllib import error, request
+
+    import certifi
+
     req = request.Request(search_api_url, data=qeury_param, headers=headers, method="POST")
     # Create an SSL context using certifi to fix HTTPS errors.
     context = ssl.create_default_context(cafile=certifi.where())
@@ -372,6 +994,12 @@ def search_oceanbase_document(keyword: str) -> str:
 
 
 def get_ob_doc_content(doc_url: str, doc_id: str) -> dict:
+    import ssl
+    from urllib import error, request
+
+    import certifi
+    from bs4 import BeautifulSoup
+
     doc_param = {"id": doc_id, "url": doc_url}
     doc_param = json.dumps(doc_param).encode("utf-8")
     headers = {
@@ -427,7 +1055,7 @@ def get_ob_doc_content(doc_url: str, doc_id: str) -> dict:
         return {"result": "No results were found"}
 
 
-@app.tool()
+@_tool()
 def oceanbase_text_search(
     table_name: str,
     full_text_search_column_name: list[str],
@@ -435,9 +1063,14 @@ def oceanbase_text_search(
     other_where_clause: Optional[list[str]] = None,
     limit: int = 5,
     output_column_name: Optional[list[str]] = None,
+    with_score: bool = False,
+    max_field_length: Optional[int] = DEFAULT_MAX_FIELD_LENGTH,
+    datasource: Optional[str] = None,
 ) -> str:
     """
     Search for documents using full text search in an OceanBase table.
+    Returns JSON with one object per matching row. Vector columns are left out unless
+    they are listed in output_column_name.
 
     Args:
         table_name: Name of the table to search.
@@ -446,178 +1079,1011 @@ def oceanbase_text_search(
         other_where_clause: Other WHERE condition query statements except full-text search.
         limit: Maximum number of results to return.
         output_column_name: columns to include in results.
+        with_score: Whether to output the full text relevance score as "_score", results are then
+            ordered by it.
+        max_field_length: Text fields longer than this are truncated, empty to disable.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
     logger.info(
         f"Calling tool: oceanbase_text_search  with arguments: {table_name}, {full_text_search_column_name}, {full_text_search_expr}"
     )
-    config = db_conn_info.model_dump()
-    client = ObVecClient(
-        uri=config["host"] + ":" + str(config["port"]),
-        user=config["user"],
-        password=config.get("password", ""),
-        db_name=config.get("database", ""),
-    )
-    where_clause = [MatchAgainst(full_text_search_expr, *full_text_search_column_name)]
+    from pyobvector import MatchAgainst
+    from sqlalchemy import literal_column, select, text
+
+    client = _get_vec_client(datasource)
+    table = _reflect_table(client, table_name)
+    column_names = output_column_name or scalar_column_names(table)
+    match_expr = MatchAgainst(full_text_search_expr, *full_text_search_column_name)
+    where_clause = [match_expr]
     for item in other_where_clause or []:
         where_clause.append(text(item))
-    results = client.get(
-        table_name=table_name,
-        ids=None,
-        where_clause=where_clause,
-        output_column_name=output_column_name,
-        n_limits=limit,
+    columns = [table.c[name] for name in column_names]
+    if with_score:
+        columns.append(match_expr.label("_score"))
+    stmt = select(*columns).where(*where_clause)
+    if with_score:
+        stmt = stmt.order_by(literal_column("_score").desc())
+    stmt = stmt.limit(limit)
+    with client.engine.connect() as conn:
+        results = conn.execute(stmt).fetchall()
+    record_rows(len(results))
+    records = []
+    for row in results:
+        record = row_to_record(row, column_names, max_field_length)
+        if with_score:
+            record["_score"] = row[-1]
+        records.append(record)
+    return dump_results(
+        table_name,
+        records,
+        query=full_text_search_expr,
+        filters=other_where_clause or [],
     )
-    output = f"Search results for '{full_text_search_expr}'"
-    if other_where_clause:
-        output += " and " + ",".join(other_where_clause)
-    output += f" in table '{table_name}':\n\n"
-    for result in results:
-        output += str(result) + "\n\n"
-    return output
 
 
-@app.tool()
+@_tool()
 def oceabase_vector_search(
     table_name: str,
-    vector_data: list[float],
+    vector_data: Optional[list[float]] = None,
     vec_column_name: str = "vector",
     distance_func: Optional[str] = "l2",
     with_distance: Optional[bool] = True,
     topk: int = 5,
     output_column_name: Optional[list[str]] = None,
+    ef_search: Optional[int] = None,
+    vector_base64: Optional[str] = None,
+    vector_dtype: str = "float32",
+    max_field_length: Optional[int] = DEFAULT_MAX_FIELD_LENGTH,
+    datasource: Optional[str] = None,
 ) -> str:
     """
     Perform vector similarity search on an OceanBase table.
+    Returns JSON with one object per row, nearest first. Vector columns are left out unless
+    they are listed in output_column_name.
 
     Args:
         table_name: Name of the table to search.
         vector_data: Query vector.
+        vector_base64: Query vector as base64 of packed little-endian floats, an alternative to
+            vector_data that is much smaller and faster to parse for large dimensions.
+        vector_dtype: Element type of vector_base64, float32 or float16.
         vec_column_name: column name containing vectors to search.
         distance_func: The index distance algorithm used when comparing the distance between two vectors.
-        with_distance: Whether to output distance data.
+        with_distance: Whether to output distance data as "_distance".
         topk: Number of results returned.
         output_column_name: Returned table fields.
+        ef_search: HNSW search queue size for this query only. Larger values improve recall
+            at the cost of latency, leave empty to use the session default.
+        max_field_length: Text fields longer than this are truncated, empty to disable.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
+    from oceanbase_mcp.vector_codec import describe_vector, resolve_vector
+
+    query_vector = resolve_vector(vector_data, vector_base64, vector_dtype)
     logger.info(
-        f"Calling tool: oceabase_vector_search  with arguments: {table_name}, {vector_data[:10]}, {vec_column_name}"
-    )
-    config = db_conn_info.model_dump()
-    client = ObVecClient(
-        uri=config["host"] + ":" + str(config["port"]),
-        user=config["user"],
-        password=config.get("password", ""),
-        db_name=config.get("database", ""),
+        f"Calling tool: oceabase_vector_search  with arguments: {table_name}, {describe_vector(query_vector)}, {vec_column_name}"
     )
-    match distance_func:
-        case "l2":
-            search_distance_func = l2_distance
-        case "inner product":
-            search_distance_func = inner_product
-        case "cosine":
-            search_distance_func = cosine_distance
-        case _:
-            raise ValueError("Unkown distance function")
-
-    results = client.ann_search(
+    client = _get_vec_client(datasource)
+    column_names = output_column_name or scalar_column_names(_reflect_table(client, table_name))
+    results = _ann_search(
+        client,
         table_name=table_name,
-        vec_data=vector_data,
+        vec_data=query_vector,
         vec_column_name=vec_column_name,
-        distance_func=search_distance_func,
+        distance_func=_get_distance_func(distance_func),
         with_dist=with_distance,
         topk=topk,
-        output_column_names=output_column_name,
+        output_column_names=column_names,
+        ef_search=ef_search,
+    )
+    return dump_results(
+        table_name, _ann_records(results, column_names, with_distance, max_field_length)
     )
-    output = f"Vector search results for '{table_name}:\n\n'"
-    for result in results:
-        output += str(result) + "\n\n"
-    return output
 
 
-@app.tool()
+@_tool()
 def oceanbase_hybrid_search(
     table_name: str,
-    vector_data: list[float],
+    vector_data: Optional[list[float]] = None,
     vec_column_name: str = "vector",
     distance_func: Optional[str] = "l2",
     with_distance: Optional[bool] = True,
     filter_expr: Optional[list[str]] = None,
     topk: int = 5,
     output_column_name: Optional[list[str]] = None,
+    full_text_search_column_name: Optional[list[str]] = None,
+    full_text_search_expr: Optional[str] = None,
+    fusion_method: str = "rrf",
+    vector_weight: float = 0.5,
+    text_weight: float = 0.5,
+    ef_search: Optional[int] = None,
+    vector_base64: Optional[str] = None,
+    vector_dtype: str = "float32",
+    max_field_length: Optional[int] = DEFAULT_MAX_FIELD_LENGTH,
+    datasource: Optional[str] = None,
 ) -> str:
     """
     Perform hybird search combining relational condition filtering(that is, scalar) and vector search.
+    When full_text_search_expr is given, a full text search runs concurrently with the vector search
+    and both result lists are fused into a single ranking.
+    Returns JSON with one object per row, best first. Vector columns are left out unless
+    they are listed in output_column_name.
 
     Args:
         table_name: Name of the table to search.
         vector_data: Query vector.
+        vector_base64: Query vector as base64 of packed little-endian floats, an alternative to
+            vector_data that is much smaller and faster to parse for large dimensions.
+        vector_dtype: Element type of vector_base64, float32 or float16.
         vec_column_name: column name containing vectors to search.
         distance_func: The index distance algorithm used when comparing the distance between two vectors.
-        with_distance: Whether to output distance data.
+        with_distance: Whether to output distance data as "_distance".
         filter_expr: Scalar conditions requiring filtering in where clause.
         topk: Number of results returned.
         output_column_name: Returned table fields,unless explicitly requested, please do not provide.
+        full_text_search_column_name: Columns to be searched in full text, required with full_text_search_expr.
+        full_text_search_expr: Keywords or phrases to search for. Enables fused full text + vector ranking.
+        fusion_method: How to fuse the two result lists: "rrf" (reciprocal rank fusion) or "weighted"
+            (weighted sum of min-max normalized scores).
+        vector_weight: Weight of the vector search results in the fusion.
+        text_weight: Weight of the full text search results in the fusion.
+        ef_search: HNSW search queue size for this query only. Larger values improve recall
+            at the cost of latency, leave empty to use the session default.
+        max_field_length: Text fields longer than this are truncated, empty to disable.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
     """
+    from sqlalchemy import text
+
+    from oceanbase_mcp.vector_codec import describe_vector, resolve_vector
+
+    query_vector = resolve_vector(vector_data, vector_base64, vector_dtype)
     logger.info(
-        f"""Calling tool: oceanbase_hybrid_search  with arguments: {table_name}, {vector_data[:10]}, {vec_column_name}
-        ,{filter_expr}"""
-    )
-    config = db_conn_info.model_dump()
-    client = ObVecClient(
-        uri=config["host"] + ":" + str(config["port"]),
-        user=config["user"],
-        password=config.get("password", ""),
-        db_name=config.get("database", ""),
+        f"""Calling tool: oceanbase_hybrid_search  with arguments: {table_name}, {describe_vector(query_vector)}, {vec_column_name}
+        ,{filter_expr}, {full_text_search_expr}"""
     )
-    match distance_func.lower():
-        case "l2":
-            search_distance_func = l2_distance
-        case "inner product":
-            search_distance_func = inner_product
-        case "cosine":
-            search_distance_func = cosine_distance
-        case _:
-            raise ValueError("Unkown distance function")
+    search_distance_func = _get_distance_func(distance_func)
     where_clause = []
     for item in filter_expr or []:
         where_clause.append(text(item))
-    results = client.ann_search(
+    if full_text_search_expr:
+        return _fused_hybrid_search(
+            table_name=table_name,
+            vector_data=query_vector,
+            vec_column_name=vec_column_name,
+            distance_func=search_distance_func,
+            where_clause=where_clause,
+            topk=topk,
+            output_column_name=output_column_name,
+            full_text_search_column_name=full_text_search_column_name,
+            full_text_search_expr=full_text_search_expr,
+            fusion_method=fusion_method,
+            vector_weight=vector_weight,
+            text_weight=text_weight,
+            ef_search=ef_search,
+            max_field_length=max_field_length,
+            datasource=datasource,
+        )
+    client = _get_vec_client(datasource)
+    column_names = output_column_name or scalar_column_names(_reflect_table(client, table_name))
+    results = _ann_search(
+        client,
         table_name=table_name,
-        vec_data=vector_data,
+        vec_data=query_vector,
         vec_column_name=vec_column_name,
         distance_func=search_distance_func,
         with_dist=with_distance,
         where_clause=where_clause,
         topk=topk,
-        output_column_names=output_column_name,
+        output_column_names=column_names,
+        ef_search=ef_search,
+    )
+    return dump_results(
+        table_name,
+        _ann_records(results, column_names, with_distance, max_field_length),
+        filters=filter_expr or [],
+    )
+
+
+def _ann_records(
+    rows: list, column_names: list[str], with_distance: bool, max_field_length: Optional[int]
+) -> list[dict]:
+    record_rows(len(rows))
+    records = []
+    for row in rows:
+        record = row_to_record(row, column_names, max_field_length)
+        if with_distance:
+            record["_distance"] = row[-1]
+        records.append(record)
+    return records
+
+
+def _get_distance_func(distance_func: Optional[str]):
+    from pyobvector import cosine_distance, inner_product, l2_distance
+
+    match (distance_func or "l2").lower():
+        case "l2":
+            return l2_distance
+        case "inner product":
+            return inner_product
+        case "cosine":
+            return cosine_distance
+        case _:
+            raise ValueError("Unkown distance function")
+
+
+_vec_client_lock = threading.Lock()
+
+
+def _get_vec_client(datasource: Optional[str] = None) -> ObVecClient:
+    """
+    Return the ObVecClient of a data source, shared by the tools that can run several queries
+    on its pool.
+    """
+    client = datasources.vec_client(datasource)
+    if query_recorder.enabled:
+        instrument_engine(
+            client.engine,
+            query_recorder,
+            datasources.get(datasource).name,
+            client_id=_caller_client_id,
+        )
+    return client
+
+
+def _reflect_table(client: ObVecClient, table_name: str) -> Table:
+    """Load a table definition into the shared metadata, serialized across threads."""
+    from sqlalchemy import Table
+
+    with _vec_client_lock:
+        return Table(table_name, client.metadata_obj, autoload_with=client.engine)
+
+
+def _refresh_table(client: ObVecClient, table_name: str) -> Table:
+    """Reload a table definition after DDL, serialized with _reflect_table."""
+    from sqlalchemy import Table
+
+    with _vec_client_lock:
+        client.refresh_metadata([table_name])
+        return Table(table_name, client.metadata_obj, autoload_with=client.engine)
+
+
+def _ann_search(
+    client: ObVecClient,
+    table_name: str,
+    vec_data: VectorLike,
+    vec_column_name: str,
+    distance_func,
+    with_dist: bool = False,
+    topk: int = 10,
+    output_column_names: Optional[list[str]] = None,
+    where_clause: Optional[list] = None,
+    ef_search: Optional[int] = None,
+    conn: Optional[Connection] = None,
+) -> list:
+    """
+    Approximate nearest neighbour search, equivalent to ObVecClient.ann_search.
+    It is built here so that the query and the per-query `ob_hnsw_ef_search` run on the same
+    session, the previous value is restored before the connection returns to the pool.
+    Pass conn to run the search inside a transaction the caller already holds.
+    """
+    from sqlalchemy import select
+
+    from oceanbase_mcp.vector_codec import vector_literal
+
+    table = _reflect_table(client, table_name)
+    columns = [
+        table.c[column_name] for column_name in output_column_names or scalar_column_names(table)
+    ]
+    distance = distance_func(table.c[vec_column_name], vector_literal(vec_data))
+    if with_dist:
+        columns.append(distance)
+    stmt = select(*columns)
+    if where_clause:
+        stmt = stmt.where(*where_clause)
+    stmt = stmt.order_by(distance)
+    sql = (
+        str(stmt.compile(dialect=client.engine.dialect, compile_kwargs={"literal_binds": True}))
+        + f" APPROXIMATE LIMIT {int(topk)}"
+    )
+    if conn is not None:
+        return _execute_ann_sql(conn, sql, ef_search)
+    with client.engine.connect() as conn:
+        return _execute_ann_sql(conn, sql, ef_search)
+
+
+def _execute_ann_sql(conn: Connection, sql: str, ef_search: Optional[int]) -> list:
+    if ef_search is None:
+        return conn.exec_driver_sql(sql).fetchall()
+    previous = conn.exec_driver_sql("SELECT @@ob_hnsw_ef_search").scalar()
+    conn.exec_driver_sql(f"SET @@ob_hnsw_ef_search = {int(ef_search)}")
+    try:
+        return conn.exec_driver_sql(sql).fetchall()
+    finally:
+        conn.exec_driver_sql(f"SET @@ob_hnsw_ef_search = {int(previous)}")
+
+
+VECTOR_INDEX_TYPES = ("hnsw", "hnsw_sq", "hnsw_bq", "ivf_flat", "ivf_sq8", "ivf_pq")
+VECTOR_INDEX_DISTANCES = ("l2", "inner_product", "cosine")
+# HNSW indexes are built by the vsag library, IVF indexes by OceanBase itself.
+VECTOR_INDEX_LIBS = ("vsag", "ob")
+
+
+def _build_vidx_params(
+    distance: str = "l2",
+    index_type: str = "hnsw",
+    lib: Optional[str] = None,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    nlist: Optional[int] = None,
+    sample_per_nlist: Optional[int] = None,
+) -> str:
+    """
+    Build the WITH (...) parameter string of an OceanBase vector index, e.g.
+    "distance=l2, type=hnsw, lib=vsag, m=16, ef_construction=200".
+    """
+    distance = distance.lower()
+    index_type = index_type.lower()
+    if distance not in VECTOR_INDEX_DISTANCES:
+        raise ValueError(f"Unsupported vector index distance: {distance}")
+    if index_type not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+    default_lib = "vsag" if index_type.startswith("hnsw") else "ob"
+    lib = (lib or default_lib).lower()
+    if lib not in VECTOR_INDEX_LIBS:
+        raise ValueError(f"Unsupported vector index lib: {lib}")
+    if lib != default_lib:
+        raise ValueError(f"{index_type} indexes are built by lib={default_lib}, not {lib}")
+    params = [f"distance={distance}", f"type={index_type}", f"lib={lib}"]
+    if index_type.startswith("hnsw"):
+        if nlist is not None or sample_per_nlist is not None:
+            raise ValueError("nlist and sample_per_nlist only apply to IVF indexes")
+        for name, value in (
+            ("m", m),
+            ("ef_construction", ef_construction),
+            ("ef_search", ef_search),
+        ):
+            if value is not None:
+                params.append(f"{name}={int(value)}")
+    else:
+        if ef_construction is not None or ef_search is not None:
+            raise ValueError("ef_construction and ef_search only apply to HNSW indexes")
+        for name, value in (("nlist", nlist), ("sample_per_nlist", sample_per_nlist), ("m", m)):
+            if value is not None:
+                params.append(f"{name}={int(value)}")
+    return ", ".join(params)
+
+
+@_tool(PRIORITY_REPORT)
+def create_vector_index(
+    table_name: str,
+    column_name: str,
+    index_name: str,
+    distance: str = "l2",
+    index_type: str = "hnsw",
+    lib: Optional[str] = None,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    nlist: Optional[int] = None,
+    sample_per_nlist: Optional[int] = None,
+    datasource: Optional[str] = None,
+) -> str:
+    """
+    Create a vector index with explicit parameters on a vector column.
+
+    Args:
+        table_name: Name of the table.
+        column_name: Vector column to index.
+        index_name: Name of the new index.
+        distance: l2, inner_product or cosine. Must match the distance function used by searches.
+        index_type: hnsw, hnsw_sq, hnsw_bq (quantized HNSW), ivf_flat, ivf_sq8 or ivf_pq.
+        lib: Index library, defaults to vsag for HNSW types and ob for IVF types.
+        m: HNSW max neighbours per node, or the number of sub-quantizers for ivf_pq.
+        ef_construction: HNSW build queue size, larger builds a better graph more slowly.
+        ef_search: HNSW default search queue size of this index.
+        nlist: Number of IVF clusters.
+        sample_per_nlist: Number of samples per IVF cluster used for training.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
+    """
+    vidx_params = _build_vidx_params(
+        distance, index_type, lib, m, ef_construction, ef_search, nlist, sample_per_nlist
+    )
+    logger.info(
+        f"Calling tool: create_vector_index  with arguments: {table_name}, {column_name}, {index_name}, {vidx_params}"
+    )
+    client = _get_vec_client(datasource)
+    _reflect_table(client, table_name)
+    client.create_index(
+        table_name,
+        is_vec_index=True,
+        index_name=index_name,
+        column_names=[column_name],
+        vidx_params=vidx_params,
+    )
+    return f"Vector index {index_name} created on {table_name}({column_name}) with {vidx_params}"
+
+
+@_tool(PRIORITY_METADATA)
+def show_vector_indexes(table_name: str, datasource: Optional[str] = None) -> str:
+    """
+    Show the vector indexes of a table and the parameters they were created with.
+
+    Args:
+        table_name: Name of the table.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
+    """
+    logger.info(f"Calling tool: show_vector_indexes  with arguments: {table_name}")
+    try:
+        with _connect(datasource) as conn:
+            with conn.cursor() as cursor:
+                sql = f"SHOW CREATE TABLE `{table_name}`"
+                with _recorded(conn, cursor, sql, datasource):
+                    cursor.execute(sql)
+                    create_sql = cursor.fetchone()[1]
+    except _db_error() as e:
+        logger.error(f"Failed to show vector indexes of {table_name}: {e}")
+        return f"Error executing sql: {str(e)}"
+    indexes = [
+        line.strip().rstrip(",")
+        for line in create_sql.splitlines()
+        if line.strip().upper().startswith("VECTOR KEY")
+    ]
+    if not indexes:
+        return f"No vector index found on table '{table_name}'"
+    return f"Vector indexes of table '{table_name}':\n" + "\n".join(indexes)
+
+
+_VECTOR_KEY = re.compile(
+    r"VECTOR\s+KEY\s+`((?:[^`]|``)+)`\s*\(\s*`((?:[^`]|``)+)`\s*\)\s*WITH\s*\(([^)]*)\)",
+    re.IGNORECASE,
+)
+
+
+def _vector_index_definition(client: ObVecClient, table_name: str, index_name: str):
+    """
+    The column and the WITH parameters of a vector index, from SHOW CREATE TABLE, e.g.
+    ("embedding", {"distance": "cosine", "type": "hnsw", "lib": "vsag", "m": "16"}).
+    """
+    with client.engine.connect() as conn:
+        create_sql = conn.exec_driver_sql(f"SHOW CREATE TABLE `{table_name}`").fetchone()[1]
+    for match in _VECTOR_KEY.finditer(create_sql):
+        if match.group(1).replace("``", "`") == index_name:
+            params = {}
+            for param in match.group(3).split(","):
+                name, _, value = param.partition("=")
+                params[name.strip().lower()] = value.strip().lower()
+            return match.group(2).replace("``", "`"), params
+    raise ValueError(f"No vector index {index_name} on table {table_name}")
+
+
+@_tool(PRIORITY_REPORT)
+def rebuild_vector_index(
+    table_name: str,
+    index_name: str,
+    column_name: Optional[str] = None,
+    delta_rate_threshold: float = 0.2,
+    distance: Optional[str] = None,
+    index_type: Optional[str] = None,
+    lib: Optional[str] = None,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    nlist: Optional[int] = None,
+    sample_per_nlist: Optional[int] = None,
+    datasource: Optional[str] = None,
+) -> str:
+    """
+    Rebuild a vector index.
+    Without new parameters the index is rebuilt in place by DBMS_VECTOR.REBUILD_INDEX when the
+    ratio of changed rows exceeds delta_rate_threshold. When distance or index_type is given,
+    a new index is built with the new parameters under a temporary name, then replaces the old
+    one. Parameters not given keep the value of the old index: its distance always, its other
+    parameters from one HNSW type to another or when the type stays the same. If the build
+    fails, the old index is left as it was.
+
+    Args:
+        table_name: Name of the table.
+        index_name: Name of the vector index.
+        column_name: Vector column of the new index, the column of the old one by default.
+        delta_rate_threshold: Rebuild only when this ratio of rows changed since the last build.
+        distance: New distance, l2, inner_product or cosine.
+        index_type: New index type, see create_vector_index.
+        lib: New index library.
+        m: New HNSW m, or ivf_pq sub-quantizers.
+        ef_construction: New HNSW build queue size.
+        ef_search: New HNSW default search queue size.
+        nlist: New number of IVF clusters.
+        sample_per_nlist: New number of samples per IVF cluster.
+        datasource: Data source to run on, see list_datasources. Empty for the default one.
+    """
+    logger.info(
+        f"Calling tool: rebuild_vector_index  with arguments: {table_name}, {index_name}, {index_type}"
+    )
+    client = _get_vec_client(datasource)
+    if distance is None and index_type is None:
+        client.rebuild_index(table_name, index_name, trigger_threshold=delta_rate_threshold)
+        return f"Vector index {index_name} on {table_name} rebuilt"
+    old_column, old = _vector_index_definition(client, table_name, index_name)
+    column_name = column_name or old_column
+    old_type = old.get("type", "hnsw")
+    index_type = (index_type or old_type).lower()
+    # A search ranks by the distance of the index, it never changes unless asked to. The other
+    # parameters carry over between HNSW types, IVF types differ in what m means.
+    same_kind = index_type == old_type or (
+        index_type.startswith("hnsw") and old_type.startswith("hnsw")
+    )
+    keep = old if same_kind else {"distance": old.get("distance")}
+
+    def kept(name: str, value):
+        return value if value is not None else keep.get(name)
+
+    vidx_params = _build_vidx_params(
+        distance or keep.get("distance") or "l2",
+        index_type,
+        kept("lib", lib),
+        kept("m", m),
+        kept("ef_construction", ef_construction),
+        kept("ef_search", ef_search),
+        kept("nlist", nlist),
+        kept("sample_per_nlist", sample_per_nlist),
+    )
+    building = f"{index_name[:55]}_rebuild"
+
+    def create(name: str):
+        client.create_index(
+            table_name,
+            is_vec_index=True,
+            index_name=name,
+            column_names=[column_name],
+            vidx_params=vidx_params,
+        )
+
+    create(building)
+    try:
+        client.drop_index(table_name, index_name)
+    except Exception:
+        client.drop_index(table_name, building)
+        raise
+    try:
+        with client.engine.connect() as conn:
+            conn.exec_driver_sql(
+                f"ALTER TABLE `{table_name}` RENAME INDEX `{building}` TO `{index_name}`"
+            )
+    except Exception as e:
+        # Searches and later rebuilds look the index up by its name, build it once more.
+        logger.error(f"Failed to rename vector index {building} to {index_name}: {e}")
+        try:
+            create(index_name)
+        except Exception as create_error:
+            raise RuntimeError(
+                f"Renaming vector index {building} to {index_name} failed ({e}) and so did "
+                f"building {index_name} again, the index of {table_name}({column_name}) is "
+                f"now named {building}: {create_error}"
+            ) from create_error
+        client.drop_index(table_name, building)
+    return f"Vector index {index_name} recreated on {table_name}({column_name}) with {vidx_params}"
+
+
+def _fused_hybrid_search(
+    table_name: str,
+    vector_data: VectorLike,
+    vec_column_name: str,
+    distance_func,
+    where_clause: list,
+    topk: int,
+    output_column_name: Optional[list[str]],
+    full_text_search_column_name: Optional[list[str]],
+    full_text_search_expr: str,
+    fusion_method: str,
+    vector_weight: float,
+    text_weight: float,
+    ef_search: Optional[int] = None,
+    max_field_length: Optional[int] = DEFAULT_MAX_FIELD_LENGTH,
+    datasource: Optional[str] = None,
+) -> str:
+    """
+    Run the full text and the vector sub-queries concurrently and fuse them by primary key.
+    Each sub-query fetches more candidates than topk so that fusion has overlap to work with.
+    """
+    if not full_text_search_column_name:
+        raise ValueError("full_text_search_column_name is required for full text fusion")
+    if fusion_method not in ("rrf", "weighted"):
+        raise ValueError(f"Unknown fusion method: {fusion_method}")
+    client = _get_vec_client(datasource)
+    # Reflect before fanning out, SQLAlchemy MetaData must not be mutated concurrently.
+    table = _reflect_table(client, table_name)
+    pk_names = [column.name for column in table.primary_key]
+    if not pk_names:
+        raise ValueError(f"Table '{table_name}' has no primary key to fuse results on")
+    column_names = list(output_column_name or scalar_column_names(table))
+    for pk_name in pk_names:
+        if pk_name not in column_names:
+            column_names.append(pk_name)
+    num_candidates = max(topk * 3, 20)
+
+    def vector_search():
+        return _ann_search(
+            client,
+            table_name=table_name,
+            vec_data=vector_data,
+            vec_column_name=vec_column_name,
+            distance_func=distance_func,
+            with_dist=True,
+            where_clause=where_clause,
+            topk=num_candidates,
+            output_column_names=column_names,
+            ef_search=ef_search,
+        )
+
+    def text_search():
+        from pyobvector import MatchAgainst
+        from sqlalchemy import literal_column, select
+
+        match_expr = MatchAgainst(full_text_search_expr, *full_text_search_column_name)
+        stmt = (
+            select(*[table.c[name] for name in column_names], match_expr.label("_text_score"))
+            .where(match_expr, *where_clause)
+            .order_by(literal_column("_text_score").desc())
+            .limit(num_candidates)
+        )
+        with client.engine.connect() as conn:
+            return conn.execute(stmt).fetchall()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        vector_future = pool.submit(vector_search)
+        text_future = pool.submit(text_search)
+        vector_rows = vector_future.result()
+        text_rows = text_future.result()
+
+    rows: dict = {}
+    distances: dict = {}
+    text_scores: dict = {}
+    for row in vector_rows:
+        record = dict(zip(column_names, row[: len(column_names)]))
+        key = tuple(record[name] for name in pk_names)
+        rows.setdefault(key, record)
+        distances[key] = row[-1]
+    for row in text_rows:
+        record = dict(zip(column_names, row[: len(column_names)]))
+        key = tuple(record[name] for name in pk_names)
+        rows.setdefault(key, record)
+        text_scores[key] = row[-1]
+
+    if fusion_method == "rrf":
+        fused = reciprocal_rank_fusion(
+            [list(distances), list(text_scores)], weights=[vector_weight, text_weight]
+        )
+    else:
+        fused = weighted_score_fusion(
+            [distances, text_scores],
+            weights=[vector_weight, text_weight],
+            higher_is_better=[False, True],
+        )
+
+    record_rows(min(len(fused), topk))
+    records = []
+    for key, score in fused[:topk]:
+        record = {
+            name: truncate_value(value, max_field_length) for name, value in rows[key].items()
+        }
+        record["_score"] = score
+        if key in distances:
+            record["_distance"] = distances[key]
+        if key in text_scores:
+            record["_text_score"] = text_scores[key]
+        records.append(record)
+    return dump_results(
+        table_name,
+        records,
+        query=full_text_search_expr,
+        fusion_method=fusion_method,
     )
-    output = f"Hybrid search results for '{table_name}:\n\n'"
-    for result in results:
-        output += str(result) + "\n\n"
-    return output
+
+
+# Pooling modes of sentence-transformers, whose outputs are concatenated when several are set.
+_POOLING_MODES = (
+    "pooling_mode_cls_token",
+    "pooling_mode_mean_tokens",
+    "pooling_mode_max_tokens",
+    "pooling_mode_mean_sqrt_len_tokens",
+    "pooling_mode_weightedmean_tokens",
+    "pooling_mode_lasttoken",
+)
+
+
+def _sentence_embedding_dimension(read_config, pipeline: bool = True) -> Optional[int]:
+    """
+    Embedding dimension of a Hugging Face model from its config files, read_config(filename)
+    returning a parsed JSON file of the model, None when the model has no such file.
+
+    With pipeline, the modules of a sentence-transformers model are followed: its Dense
+    projections change the dimension of the transformer. None when a module of unknown
+    output size is met, the model has to be loaded then.
+    """
+    dimension = (read_config("config.json") or {}).get("hidden_size")
+    modules = read_config("modules.json") if pipeline else None
+    for module in modules or []:
+        kind = module.get("type", "").rsplit(".", 1)[-1]
+        config_file = posixpath.join(module.get("path", ""), "config.json")
+        if kind == "Transformer":
+            dimension = (read_config(config_file) or {}).get("hidden_size")
+        elif kind == "Pooling":
+            config = read_config(config_file) or {}
+            modes = sum(bool(config.get(mode)) for mode in _POOLING_MODES)
+            dimension = config.get("word_embedding_dimension", dimension)
+            if dimension:
+                dimension *= max(modes, 1)
+        elif kind == "Dense":
+            dimension = (read_config(config_file) or {}).get("out_features")
+        elif kind != "Normalize":
+            return None
+    return int(dimension) if dimension else None
 
 
 if ENABLE_MEMORY:
-    from pyobvector import ObVecClient, l2_distance, VECTOR
-    from sqlalchemy import Column, Integer, JSON, String, text
+    from datetime import datetime
+
+    from pyobvector import VECTOR, ObKeyPartition, ObVecClient, l2_distance
+    from sqlalchemy import (
+        JSON,
+        Column,
+        DateTime,
+        Integer,
+        String,
+        bindparam,
+        delete,
+        func,
+        insert,
+        or_,
+        select,
+        text,
+        update,
+    )
+
+    from oceanbase_mcp.embedding_pool import EmbeddingPool
+    from oceanbase_mcp.memory_cache import HotMemorySet, hot_results_confident
+    from oceanbase_mcp.memory_filters import (
+        compile_meta_filters,
+        generated_column_ddl,
+        meta_column_name,
+        parse_indexed_meta_keys,
+    )
+    from oceanbase_mcp.memory_migration import (
+        DEFAULT_EMBEDDING_COLUMN,
+        DEFAULT_EMBEDDING_INDEX,
+        EmbeddingSpace,
+        migration_target,
+        new_migration,
+        next_space,
+    )
+    from oceanbase_mcp.memory_policy import (
+        MERGED_CONTENTS_KEY,
+        memory_expired,
+        merge_metas,
+        merged_contents,
+        parse_ttl_days_by_type,
+        should_rebuild_index,
+    )
+    from oceanbase_mcp.memory_scope import DEFAULT_NAMESPACE, resolve_namespace
+    from oceanbase_mcp.memory_transfer import (
+        MemoryFileWriter,
+        detect_format,
+        make_header,
+        read_batches,
+        read_header,
+    )
+    from oceanbase_mcp.memory_writes import PendingWrite, WriteBehindQueue
+
+    MEMORY_UPDATED_AT_DEFAULT = text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    # Hash (KEY) partitions of the memory table on namespace, 0 or 1 creates it unpartitioned.
+    MEMORY_PARTITIONS = int(os.getenv("MEMORY_PARTITIONS", 16))
+    # Namespace of memories written without authentication and without an explicit namespace.
+    MEMORY_DEFAULT_NAMESPACE = os.getenv("MEMORY_DEFAULT_NAMESPACE", DEFAULT_NAMESPACE)
+    # meta keys that get an indexed generated column for ob_memory_query filters.
+    MEMORY_INDEXED_META_KEYS = parse_indexed_meta_keys(
+        os.getenv("MEMORY_INDEXED_META_KEYS", "type,category")
+    )
+    # Seconds between two maintenance passes, 0 disables the job.
+    MEMORY_MAINTENANCE_INTERVAL = float(os.getenv("MEMORY_MAINTENANCE_INTERVAL", 3600))
+    MEMORY_MAINTENANCE_BATCH_SIZE = 500
+    MEMORY_TTL_DAYS_BY_TYPE = parse_ttl_days_by_type(os.getenv("MEMORY_TTL_DAYS_BY_TYPE", ""))
+    # Memories one pass checks for expiry, the next pass continues with the following ones.
+    MEMORY_EVICT_MAX_ROWS = int(os.getenv("MEMORY_EVICT_MAX_ROWS", 10000))
+    # Memories closer than this are merged by the maintenance job, 0 disables merging. Set it
+    # stricter than MEMORY_DUPLICATE_DISTANCE, e.g. 0.15.
+    MEMORY_COMPACT_DISTANCE = float(os.getenv("MEMORY_COMPACT_DISTANCE", 0))
+    MEMORY_COMPACT_CANDIDATES = 5
+    # Memories changed since the previous pass that one pass looks for duplicates of, the
+    # next pass continues with the rest.
+    MEMORY_COMPACT_MAX_ROWS = int(os.getenv("MEMORY_COMPACT_MAX_ROWS", 1000))
+    MEMORY_REBUILD_DELETE_RATIO = float(os.getenv("MEMORY_REBUILD_DELETE_RATIO", 0.2))
+    # Memories kept in the in-process hot set searched before OceanBase, 0 disables it.
+    MEMORY_HOT_SET_SIZE = int(os.getenv("MEMORY_HOT_SET_SIZE", 0))
+    # Hot set results are returned only when all topk are within this l2 distance.
+    MEMORY_HOT_MAX_DISTANCE = float(os.getenv("MEMORY_HOT_MAX_DISTANCE", 0.8))
+    # Rows per fetch of the export cursor and per multi-row insert of the import.
+    MEMORY_TRANSFER_BATCH_SIZE = 1000
+    # Directory of the files ob_memory_export writes and ob_memory_import reads, both tools
+    # refuse to run when it is unset.
+    MEMORY_TRANSFER_DIR = os.getenv("MEMORY_TRANSFER_DIR")
+    # Key-value table recording the active embedding column and the pending migration.
+    MEMORY_STATE_TABLE = f"{TABLE_NAME_MEMORY}_state"
+    # Seconds between two reads of the state, so that a cutover done by another process is seen.
+    MEMORY_STATE_REFRESH_INTERVAL = 60
+    # Re-embed all memories into a new column when EMBEDDING_MODEL_NAME changes, 0 keeps
+    # serving the memories with the model that produced them.
+    MEMORY_EMBEDDING_MIGRATION = int(os.getenv("MEMORY_EMBEDDING_MIGRATION", 1))
+    MEMORY_MIGRATION_BATCH_SIZE = 256
+    # Seconds the old embedding column is kept after a cutover, for the other server processes.
+    MEMORY_MIGRATION_DROP_DELAY = float(
+        os.getenv("MEMORY_MIGRATION_DROP_DELAY", 2 * MEMORY_STATE_REFRESH_INTERVAL)
+    )
+    # Seconds memory inserts and updates may wait in the write-behind queue before they are
+    # embedded and stored in one batch, 0 writes them synchronously.
+    MEMORY_WRITE_BEHIND_INTERVAL = float(os.getenv("MEMORY_WRITE_BEHIND_INTERVAL", 0))
+    MEMORY_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("MEMORY_WRITE_BEHIND_BATCH_SIZE", 64))
+    # Failed attempts to store a queued write before it is dropped (and logged in full).
+    MEMORY_WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("MEMORY_WRITE_BEHIND_MAX_ATTEMPTS", 5))
 
     class OBMemory:
+        """
+        Memory backend. The embedding model, the vector client and the memory table are
+        all initialized lazily, so that importing the server and answering `initialize`
+        never waits for a model download or a database round trip.
+        """
+
         def __init__(self):
-            self.embedding_client = self._gen_embedding_client()
-            self.embedding_dimension = len(self.embedding_client.embed_query("test"))
-            logger.info(f"embedding_dimension: {self.embedding_dimension}")
-
-            self.client = ObVecClient(
-                uri=db_conn_info.host + ":" + str(db_conn_info.port),
-                user=db_conn_info.user,
-                password=db_conn_info.password,
-                db_name=db_conn_info.database,
+            self._embedding_clients = {}
+            self._embedding_dimension = EMBEDDING_DIMENSION or None
+            self._client = None
+            self._table_ready = False
+            self._space = None
+            self._migration = None
+            self._state_read_at = 0.0
+            self._migration_thread = None
+            self.hot_set = HotMemorySet(MEMORY_HOT_SET_SIZE)
+            self.write_queue = WriteBehindQueue(
+                self.write_pending,
+                MEMORY_WRITE_BEHIND_INTERVAL,
+                batch_size=MEMORY_WRITE_BEHIND_BATCH_SIZE,
+                max_attempts=MEMORY_WRITE_BEHIND_MAX_ATTEMPTS,
             )
+            self._lock = threading.RLock()
+            self._warmup_thread = None
+            self._maintenance_thread = None
+            self._maintenance_stop = threading.Event()
+            self._deleted_since_rebuild = 0
+            # Progress of _compact_duplicates through the memories changed since _compact_since.
+            self._compact_since = None
+            self._compact_started = None
+            self._compact_after_id = 0
+            # mem_id _evict_expired stopped at, None to start from the first memory.
+            self._evict_after_id = None
+
+        def warmup_in_background(self):
+            """
+            Start loading the embedding model and checking the memory table in a daemon
+            thread. Memory tools called before it finishes simply wait for the same lock.
+            """
+            if self._warmup_thread is not None:
+                return
+            self._warmup_thread = threading.Thread(
+                target=self._warmup, name="ob-memory-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+
+        def _warmup(self):
+            try:
+                self.ensure_ready()
+            except Exception as e:
+                logger.error(f"Failed to warm up memory subsystem: {e}")
+
+        def ensure_ready(self):
+            """
+            Make sure the memory table exists and the model of its active embedding column
+            is loaded.
+            """
             self._init_obvector()
+            self._load_embedding_client(self.space.model or EMBEDDING_MODEL_NAME)
+
+        @property
+        def embedding_client(self):
+            """Client of the model that produced the active embedding column."""
+            space = self.space
+            if space.model is None:
+                raise RuntimeError(
+                    f"The embedding model of {TABLE_NAME_MEMORY}.{space.column} is unknown, "
+                    f"memories are being re-embedded with {EMBEDDING_MODEL_NAME}, retry later"
+                )
+            return self._load_embedding_client(space.model)
+
+        def _load_embedding_client(self, model_name: str = EMBEDDING_MODEL_NAME):
+            embedding_client = self._embedding_clients.get(model_name)
+            if embedding_client is None:
+                with self._lock:
+                    embedding_client = self._embedding_clients.get(model_name)
+                    if embedding_client is None:
+                        start = time.perf_counter()
+                        embedding_client = self._gen_embedding_client(model_name)
+                        if EMBEDDING_WORKERS > 0:
+                            embedding_client = EmbeddingPool(
+                                embedding_client,
+                                workers=EMBEDDING_WORKERS,
+                                max_batch=EMBEDDING_MAX_BATCH,
+                                max_wait=EMBEDDING_MAX_WAIT_MS / 1000,
+                                max_queue=EMBEDDING_QUEUE_SIZE,
+                            )
+                        self._embedding_clients[model_name] = embedding_client
+                        logger.info(
+                            f"Embedding model {model_name} loaded in "
+                            f"{time.perf_counter() - start:.2f}s"
+                        )
+            return embedding_client
+
+        @property
+        def space(self) -> EmbeddingSpace:
+            """
+            The embedding column that queries and writes use. The state is re-read periodically
+            so that a cutover done by another server process is picked up.
+            """
+            self._init_obvector()
+            if time.monotonic() - self._state_read_at > MEMORY_STATE_REFRESH_INTERVAL:
+                with self._lock:
+                    if time.monotonic() - self._state_read_at > MEMORY_STATE_REFRESH_INTERVAL:
+                        with self.client.engine.connect() as conn:
+                            space = EmbeddingSpace.from_json(_read_state(conn, "active"))
+                            self._migration = migration_target(_read_state(conn, "migration"))
+                        if space != self._space:
+                            # Another process cut over to a new model.
+                            self.hot_set.clear()
+                        self._space = space
+                        self._state_read_at = time.monotonic()
+            return self._space
+
+        def shadow_reset_values(self) -> dict:
+            """
+            Values clearing the shadow vector of rewritten memories while a migration runs,
+            so that the migration re-embeds them before the cutover.
+            """
+            if self._migration is None:
+                return {}
+            return {self._migration.column: None}
+
+        @property
+        def embedding_dimension(self) -> int:
+            if self._embedding_dimension is None:
+                with self._lock:
+                    if self._embedding_dimension is None:
+                        self._embedding_dimension = self._resolve_embedding_dimension()
+                        logger.info(f"embedding_dimension: {self._embedding_dimension}")
+            return self._embedding_dimension
+
+        @property
+        def client(self) -> ObVecClient:
+            if self._client is None:
+                with self._lock:
+                    if self._client is None:
+                        client = ObVecClient(
+                            uri=db_conn_info.host + ":" + str(db_conn_info.port),
+                            user=db_conn_info.user,
+                            password=db_conn_info.password,
+                            db_name=db_conn_info.database,
+                        )
+                        if query_recorder.enabled:
+                            instrument_engine(
+                                client.engine,
+                                query_recorder,
+                                datasources.default,
+                                client_id=_caller_client_id,
+                            )
+                        self._client = client
+            return self._client
 
         def gen_embedding(self, text: str) -> List[float]:
             return self.embedding_client.embed_query(text)
 
-        def _gen_embedding_client(self):
+        def _gen_embedding_client(self, model_name: str = EMBEDDING_MODEL_NAME):
             """
             Generate embedding cient.
             """
@@ -625,54 +2091,945 @@ if ENABLE_MEMORY:
                 os.environ["HF_ENDPOINT"] = "https://hf-mirror.com"
                 from langchain_huggingface import HuggingFaceEmbeddings
 
-                logger.info(f"Using HuggingFaceEmbeddings model: {EMBEDDING_MODEL_NAME}")
+                logger.info(f"Using HuggingFaceEmbeddings model: {model_name}")
                 return HuggingFaceEmbeddings(
-                    model_name=EMBEDDING_MODEL_NAME,
+                    model_name=model_name,
                     encode_kwargs={"normalize_embeddings": True},
                 )
+            elif EMBEDDING_MODEL_PROVIDER == "onnx":
+                os.environ.setdefault("HF_ENDPOINT", "https://hf-mirror.com")
+                from oceanbase_mcp.onnx_embeddings import OnnxEmbeddings
+
+                logger.info(f"Using ONNX Runtime embedding model: {model_name}")
+                return OnnxEmbeddings(
+                    model_name=model_name,
+                    # A local export only applies to the configured model.
+                    model_dir=EMBEDDING_ONNX_DIR if model_name == EMBEDDING_MODEL_NAME else None,
+                    quantize=EMBEDDING_ONNX_QUANTIZE,
+                    threads=EMBEDDING_ONNX_THREADS or None,
+                )
             else:
                 raise ValueError(
                     f"Unsupported embedding model provider: {EMBEDDING_MODEL_PROVIDER}"
                 )
 
+        def _resolve_embedding_dimension(self) -> int:
+            """
+            Resolve the embedding dimension of the configured model without running inference
+            when possible: first from the model config files, then from the loaded model, and
+            only as a last resort by embedding a probe string.
+            """
+            if EMBEDDING_MODEL_PROVIDER in ("huggingface", "onnx"):
+                # The ONNX provider pools the transformer output, without the Dense modules.
+                dimension = _read_hf_embedding_dimension(
+                    EMBEDDING_MODEL_NAME, pipeline=EMBEDDING_MODEL_PROVIDER == "huggingface"
+                )
+                if dimension:
+                    return dimension
+            embedding_client = self._load_embedding_client(EMBEDDING_MODEL_NAME)
+            model = getattr(getattr(embedding_client, "client", embedding_client), "_client", None)
+            if model is not None and hasattr(model, "get_sentence_embedding_dimension"):
+                dimension = model.get_sentence_embedding_dimension()
+                if dimension:
+                    return dimension
+            return len(embedding_client.embed_query("test"))
+
         def _init_obvector(self):
             """
             Initialize the OBVector.
             """
-            client = ObVecClient(
-                uri=db_conn_info.host + ":" + str(db_conn_info.port),
-                user=db_conn_info.user,
-                password=db_conn_info.password,
-                db_name=db_conn_info.database,
+            if self._table_ready:
+                return
+            with self._lock:
+                if self._table_ready:
+                    return
+                client = self.client
+                if not client.check_table_exists(TABLE_NAME_MEMORY):
+                    # Get embedding dimension dynamically from model config
+                    cols = [
+                        Column("mem_id", Integer, primary_key=True, autoincrement=True),
+                        # The partition key must be part of the primary key.
+                        Column(
+                            "namespace",
+                            String(255),
+                            primary_key=True,
+                            server_default=MEMORY_DEFAULT_NAMESPACE,
+                        ),
+                        Column("content", String(8000)),
+                        Column(DEFAULT_EMBEDDING_COLUMN, VECTOR(self.embedding_dimension)),
+                        Column("meta", JSON),
+                        Column("updated_at", DateTime, server_default=MEMORY_UPDATED_AT_DEFAULT),
+                    ]
+                    partitions = None
+                    if MEMORY_PARTITIONS > 1:
+                        # namespace = ... predicates prune every memory query to one partition.
+                        partitions = ObKeyPartition(["namespace"], part_count=MEMORY_PARTITIONS)
+                    client.create_table(TABLE_NAME_MEMORY, columns=cols, partitions=partitions)
+
+                    # create vector index
+                    client.create_index(
+                        TABLE_NAME_MEMORY,
+                        is_vec_index=True,
+                        index_name=DEFAULT_EMBEDDING_INDEX,
+                        column_names=[DEFAULT_EMBEDDING_COLUMN],
+                        vidx_params=MEMORY_VECTOR_INDEX_PARAMS,
+                    )
+                else:
+                    self._upgrade_table(client)
+                self._ensure_meta_columns(client)
+                self._resolve_space(client)
+                self._table_ready = True
+                if self._migration is not None:
+                    self._start_migration()
+
+        def _upgrade_table(self, client: ObVecClient):
+            """Add the columns that tables created by earlier versions lack."""
+            columns = _reflect_table(client, TABLE_NAME_MEMORY).c
+            altered = False
+            if "updated_at" not in columns:
+                # Tables created by earlier versions have no timestamp for TTL policies.
+                client.perform_raw_text_sql(
+                    f"ALTER TABLE `{TABLE_NAME_MEMORY}` ADD COLUMN updated_at DATETIME "
+                    f"DEFAULT {MEMORY_UPDATED_AT_DEFAULT.text}"
+                )
+                altered = True
+            if "namespace" not in columns:
+                # Existing memories belong to the default namespace. The table stays
+                # unpartitioned, recreate it to get one partition per namespace hash.
+                client.perform_raw_text_sql(
+                    f"ALTER TABLE `{TABLE_NAME_MEMORY}` ADD COLUMN namespace VARCHAR(255) "
+                    f"NOT NULL DEFAULT '{MEMORY_DEFAULT_NAMESPACE}'"
+                )
+                logger.warning(
+                    f"Added a namespace column to the unpartitioned memory table {TABLE_NAME_MEMORY}"
+                )
+                altered = True
+            if altered:
+                _refresh_table(client, TABLE_NAME_MEMORY)
+
+        def _ensure_meta_columns(self, client: ObVecClient):
+            """
+            Create the generated column and index of every configured meta key that has none.
+            Columns of keys removed from the configuration are kept, filters still use them.
+            """
+            columns = _reflect_table(client, TABLE_NAME_MEMORY).c
+            missing = [
+                key for key in MEMORY_INDEXED_META_KEYS if meta_column_name(key) not in columns
+            ]
+            for key in missing:
+                for statement in generated_column_ddl(TABLE_NAME_MEMORY, key):
+                    client.perform_raw_text_sql(statement)
+                logger.info(
+                    f"Created generated column {meta_column_name(key)} on {TABLE_NAME_MEMORY}"
+                )
+            if missing:
+                _refresh_table(client, TABLE_NAME_MEMORY)
+
+        def _resolve_space(self, client: ObVecClient):
+            """
+            Load the active embedding column from the state table and plan a migration when
+            EMBEDDING_MODEL_NAME differs from the model that produced it. The column of a table
+            created by an earlier version is assumed to hold the configured model, unless its
+            dimension tells otherwise.
+            """
+            client.perform_raw_text_sql(
+                f"CREATE TABLE IF NOT EXISTS `{MEMORY_STATE_TABLE}` ("
+                f"name VARCHAR(64) PRIMARY KEY, value JSON NOT NULL, "
+                f"updated_at DATETIME DEFAULT {MEMORY_UPDATED_AT_DEFAULT.text})"
             )
-            if not client.check_table_exists(TABLE_NAME_MEMORY):
-                # Get embedding dimension dynamically from model config
-                cols = [
-                    Column("mem_id", Integer, primary_key=True, autoincrement=True),
-                    Column("content", String(8000)),
-                    Column("embedding", VECTOR(self.embedding_dimension)),
-                    Column("meta", JSON),
-                ]
-                client.create_table(TABLE_NAME_MEMORY, columns=cols)
+            abandoned = None
+            with client.engine.begin() as conn:
+                active = _read_state(conn, "active", for_update=True)
+                if active is None:
+                    column = _reflect_table(client, TABLE_NAME_MEMORY).c[DEFAULT_EMBEDDING_COLUMN]
+                    dimension = getattr(column.type, "dim", None) or self.embedding_dimension
+                    model = EMBEDDING_MODEL_NAME if dimension == self.embedding_dimension else None
+                    active = EmbeddingSpace(model, dimension).to_json()
+                    _write_state(conn, "active", active)
+                space = EmbeddingSpace.from_json(active)
+                target = migration_target(_read_state(conn, "migration"))
+                wanted = space.model != EMBEDDING_MODEL_NAME and MEMORY_EMBEDDING_MIGRATION
+                if target is not None and (
+                    not wanted
+                    or (target.model, target.dimension)
+                    != (EMBEDDING_MODEL_NAME, self.embedding_dimension)
+                ):
+                    # The model changed again, or back, before the previous migration finished.
+                    _delete_state(conn, "migration")
+                    abandoned, target = target, None
+                if wanted and target is None:
+                    target = next_space(space, EMBEDDING_MODEL_NAME, self.embedding_dimension)
+                    _write_state(conn, "migration", new_migration(target))
+            if abandoned is not None:
+                logger.info(f"Abandoning the migration of memories to {abandoned.model}")
+                self._drop_space(client, abandoned)
+            if space.model != EMBEDDING_MODEL_NAME and not MEMORY_EMBEDDING_MIGRATION:
+                logger.warning(
+                    f"Memories keep using {space.model} instead of {EMBEDDING_MODEL_NAME}, "
+                    f"set MEMORY_EMBEDDING_MIGRATION=1 to re-embed them"
+                )
+            self._space = space
+            self._migration = target
+            self._state_read_at = time.monotonic()
+
+        def _start_migration(self):
+            if self._migration_thread is not None and self._migration_thread.is_alive():
+                return
+            self._migration_thread = threading.Thread(
+                target=self._migration_worker, name="ob-memory-migration", daemon=True
+            )
+            self._migration_thread.start()
+
+        def _migration_worker(self):
+            try:
+                self.run_migration()
+            except Exception as e:
+                logger.error(f"Embedding migration failed, it resumes from its checkpoint: {e}")
+
+        def run_migration(self) -> Optional[EmbeddingSpace]:
+            """
+            Re-embed every memory into the shadow column of the pending migration, then cut over.
 
-                # create vector index
+            The checkpoint (last re-embedded mem_id) is saved in the same transaction as each
+            batch, so a restarted server resumes where it stopped. Memories written meanwhile
+            have their shadow vector cleared and are picked up by a catch-up pass. Queries keep
+            using the old column until the cutover, which switches the active column with a
+            single state transaction.
+            """
+            client = self.client
+            with client.engine.connect() as conn:
+                migration = _read_state(conn, "migration")
+            target = migration_target(migration)
+            if target is None:
+                return None
+            previous = self.space
+            model = self._load_embedding_client(target.model)
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            if target.column not in table.c:
+                client.perform_raw_text_sql(
+                    f"ALTER TABLE `{TABLE_NAME_MEMORY}` "
+                    f"ADD COLUMN `{target.column}` VECTOR({target.dimension})"
+                )
+                table = _refresh_table(client, TABLE_NAME_MEMORY)
+            shadow = table.c[target.column]
+            checkpoint = migration.get("checkpoint") or 0
+            logger.info(
+                f"Re-embedding memories with {target.model} into {target.column} "
+                f"from mem_id {checkpoint}"
+            )
+            while True:
+                rows = self._fetch_contents(
+                    client, table, table.c.mem_id > checkpoint, MEMORY_MIGRATION_BATCH_SIZE
+                )
+                if not rows:
+                    break
+                checkpoint = rows[-1][0]
+                self._embed_rows(
+                    client, table, shadow, model, rows, {**migration, "checkpoint": checkpoint}
+                )
+            # Building the index once the column is filled is cheaper than growing it row by row.
+            if not _index_exists(client, TABLE_NAME_MEMORY, target.index):
                 client.create_index(
                     TABLE_NAME_MEMORY,
                     is_vec_index=True,
-                    index_name="vidx",
-                    column_names=["embedding"],
-                    vidx_params="distance=l2, type=hnsw, lib=vsag",
+                    index_name=target.index,
+                    column_names=[target.column],
+                    vidx_params=MEMORY_VECTOR_INDEX_PARAMS,
+                )
+            while True:
+                rows = self._fetch_contents(
+                    client, table, shadow.is_(None), MEMORY_MIGRATION_BATCH_SIZE
+                )
+                if not rows:
+                    break
+                self._embed_rows(client, table, shadow, model, rows)
+            with client.engine.begin() as conn:
+                if migration_target(_read_state(conn, "migration", for_update=True)) != target:
+                    logger.warning(
+                        f"The migration to {target.model} was replaced, not cutting over"
+                    )
+                    return None
+                _write_state(conn, "active", target.to_json())
+                _delete_state(conn, "migration")
+            with self._lock:
+                self._space = target
+                self._migration = None
+                self._state_read_at = time.monotonic()
+                self.hot_set.clear()
+            logger.info(f"Memories now use {target.model} in {target.column}")
+            # Other server processes switch on their next state read, keep the old column until then.
+            time.sleep(MEMORY_MIGRATION_DROP_DELAY)
+            self._drop_space(client, previous)
+            if previous.model != target.model:
+                embedding_client = self._embedding_clients.pop(previous.model, None)
+                if isinstance(embedding_client, EmbeddingPool):
+                    embedding_client.close()
+            return target
+
+        def _fetch_contents(self, client: ObVecClient, table: Table, condition, limit: int) -> list:
+            stmt = (
+                select(table.c.mem_id, table.c.content)
+                .where(condition)
+                .order_by(table.c.mem_id)
+                .limit(limit)
+            )
+            with client.engine.connect() as conn:
+                return conn.execute(stmt).fetchall()
+
+        def _embed_rows(
+            self,
+            client: ObVecClient,
+            table: Table,
+            column: Column,
+            model,
+            rows: list,
+            migration: Optional[dict] = None,
+        ):
+            """
+            Embed the content of (mem_id, content) rows in one call and store the vectors in
+            column, saving the migration checkpoint in the same transaction when given.
+            """
+            vectors = model.embed_documents([content or "" for _, content in rows])
+            stmt = (
+                update(table)
+                .where(table.c.mem_id == bindparam("b_mem_id"))
+                # Assigning updated_at to itself keeps ON UPDATE CURRENT_TIMESTAMP from firing,
+                # re-embedding must not reset the age TTL policies rely on.
+                .values(
+                    {
+                        column.name: bindparam("b_vector", type_=column.type),
+                        "updated_at": table.c.updated_at,
+                    }
+                )
+            )
+            with client.engine.begin() as conn:
+                conn.execute(
+                    stmt,
+                    [
+                        {"b_mem_id": mem_id, "b_vector": vector}
+                        for (mem_id, _), vector in zip(rows, vectors)
+                    ],
+                )
+                if migration is not None:
+                    _write_state(conn, "migration", migration)
+
+        def _drop_space(self, client: ObVecClient, space: EmbeddingSpace):
+            """Drop the vector index and column of an embedding space no longer in use."""
+            if space.column not in _reflect_table(client, TABLE_NAME_MEMORY).c:
+                return
+            if _index_exists(client, TABLE_NAME_MEMORY, space.index):
+                client.drop_index(TABLE_NAME_MEMORY, space.index)
+            client.perform_raw_text_sql(
+                f"ALTER TABLE `{TABLE_NAME_MEMORY}` DROP COLUMN `{space.column}`"
+            )
+            _refresh_table(client, TABLE_NAME_MEMORY)
+
+        def insert_deduplicated(
+            self,
+            namespace: str,
+            content: str,
+            meta: dict,
+            on_duplicate: str = "report",
+            distance_threshold: float = MEMORY_DUPLICATE_DISTANCE,
+            candidates: int = 3,
+        ) -> dict:
+            """
+            Embed the content once, look up its nearest memories and insert, merge or report
+            in the same transaction. Only memories of the same namespace are considered.
+
+            Args:
+                on_duplicate: What to do when memories within distance_threshold exist:
+                    "report" returns them without writing, "merge" overwrites the nearest one
+                    with the new content and the union of both metas, "insert" writes anyway.
+            """
+            if on_duplicate not in ("report", "merge", "insert"):
+                raise ValueError(f"Unknown on_duplicate action: {on_duplicate}")
+            self.ensure_ready()
+            self.write_queue.sync(namespace)
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            space = self.space
+            embedding = self.gen_embedding(content)
+            with client.engine.begin() as conn:
+                nearest = []
+                if on_duplicate != "insert":
+                    rows = _ann_search(
+                        client,
+                        table_name=TABLE_NAME_MEMORY,
+                        vec_data=embedding,
+                        vec_column_name=space.column,
+                        distance_func=l2_distance,
+                        with_dist=True,
+                        topk=candidates,
+                        output_column_names=["mem_id", "content", "meta"],
+                        where_clause=[table.c.namespace == namespace],
+                        conn=conn,
+                    )
+                    nearest = [row for row in rows if row[-1] <= distance_threshold]
+                if nearest and on_duplicate == "report":
+                    return {
+                        "action": "duplicates_found",
+                        "candidates": [
+                            {"mem_id": row[0], "content": row[1], "distance": row[-1]}
+                            for row in nearest
+                        ],
+                    }
+                if nearest and on_duplicate == "merge":
+                    mem_id, _, old_meta, distance = nearest[0]
+                    if isinstance(old_meta, str):
+                        old_meta = json.loads(old_meta)
+                    conn.execute(
+                        update(table)
+                        .where(table.c.mem_id == mem_id, table.c.namespace == namespace)
+                        .values(
+                            {
+                                "content": content,
+                                "meta": {**(old_meta or {}), **meta},
+                                space.column: embedding,
+                                **self.shadow_reset_values(),
+                            }
+                        )
+                    )
+                    result = {"action": "merged", "mem_id": mem_id, "distance": distance}
+                else:
+                    values = OBMemoryItem(
+                        namespace=namespace, content=content, meta=meta, embedding=embedding
+                    ).model_dump(exclude_none=True)
+                    values[space.column] = values.pop("embedding")
+                    inserted = conn.execute(insert(table).values(values))
+                    result = {"action": "inserted", "mem_id": inserted.inserted_primary_key[0]}
+            self.hot_set.put(result["mem_id"], namespace, content, embedding)
+            return result
+
+        def write_pending(self, writes: List[PendingWrite]):
+            """
+            Store a batch of the write-behind queue in one transaction: the contents are
+            embedded in one call, new memories are added with one multi-row insert and the
+            updates are sent as one executemany. Inserts with on_duplicate="merge" still look
+            up their nearest memory, among the memories stored before the batch.
+            """
+            self.ensure_ready()
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            space = self.space
+            vectors = self.embedding_client.embed_documents([write.content for write in writes])
+            rows = []
+            updates = []
+            with client.engine.begin() as conn:
+                for write, vector in zip(writes, vectors):
+                    mem_id, meta = write.mem_id, write.meta
+                    if mem_id is None and write.on_duplicate == "merge":
+                        nearest = _ann_search(
+                            client,
+                            table_name=TABLE_NAME_MEMORY,
+                            vec_data=vector,
+                            vec_column_name=space.column,
+                            distance_func=l2_distance,
+                            with_dist=True,
+                            topk=1,
+                            output_column_names=["mem_id", "meta"],
+                            where_clause=[table.c.namespace == write.namespace],
+                            conn=conn,
+                        )
+                        if nearest and nearest[0][-1] <= MEMORY_DUPLICATE_DISTANCE:
+                            mem_id = nearest[0][0]
+                            meta = {**_as_meta(nearest[0][1]), **meta}
+                    if mem_id is None:
+                        rows.append(
+                            {
+                                "namespace": write.namespace,
+                                "content": write.content,
+                                "meta": meta,
+                                space.column: vector,
+                            }
+                        )
+                    else:
+                        updates.append(
+                            {
+                                "b_mem_id": mem_id,
+                                "b_namespace": write.namespace,
+                                "b_content": write.content,
+                                "b_meta": meta,
+                                "b_vector": vector,
+                            }
+                        )
+                if rows:
+                    conn.execute(insert(table).values(rows))
+                if updates:
+                    result = conn.execute(
+                        update(table)
+                        .where(
+                            table.c.mem_id == bindparam("b_mem_id"),
+                            table.c.namespace == bindparam("b_namespace"),
+                        )
+                        .values(
+                            {
+                                "content": bindparam("b_content"),
+                                "meta": bindparam("b_meta", type_=table.c.meta.type),
+                                space.column: bindparam(
+                                    "b_vector", type_=table.c[space.column].type
+                                ),
+                                **self.shadow_reset_values(),
+                            }
+                        ),
+                        updates,
+                    )
+                    # ob_memory_update checked the memories exist, they were deleted since.
+                    if 0 <= result.rowcount < len(updates):
+                        logger.warning(
+                            f"{len(updates) - result.rowcount} queued memory updates matched "
+                            "no memory and were dropped"
+                        )
+            # The ids of a multi-row insert are not known and an update may have matched no
+            # memory, the next searches fill the hot set from the table instead.
+            self.hot_set.discard([update["b_mem_id"] for update in updates])
+            logger.info(
+                f"Stored {len(writes)} queued memory writes "
+                f"({len(rows)} inserted, {len(updates)} updated)"
+            )
+
+        def search(
+            self,
+            namespace: str,
+            query: str,
+            topk: int = 5,
+            filters: Optional[dict] = None,
+            full_search: bool = False,
+        ) -> List[Tuple[int, str]]:
+            """
+            Search the memories of a namespace. Unfiltered searches are answered from the hot
+            set when it is confident, otherwise OceanBase is queried and the hits are added to
+            the hot set.
+            """
+            self.ensure_ready()
+            self.write_queue.sync(namespace)
+            embedding = self.gen_embedding(query)
+            use_hot_set = self.hot_set.enabled and not filters
+            if use_hot_set and not full_search:
+                hits = self.hot_set.search(namespace, embedding, topk)
+                if hot_results_confident(hits, topk, MEMORY_HOT_MAX_DISTANCE):
+                    return [(mem_id, content) for mem_id, content, _ in hits]
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            space = self.space
+            output_column_names = ["mem_id", "content"]
+            if use_hot_set:
+                output_column_names.append(space.column)
+            rows = _ann_search(
+                client,
+                table_name=TABLE_NAME_MEMORY,
+                vec_data=embedding,
+                vec_column_name=space.column,
+                distance_func=l2_distance,
+                topk=topk,
+                output_column_names=output_column_names,
+                # Filters on indexed meta keys let OceanBase pre-filter before the vector search.
+                where_clause=[
+                    table.c.namespace == namespace,
+                    *compile_meta_filters(table, filters),
+                ],
+            )
+            if use_hot_set:
+                for mem_id, content, vector in rows:
+                    if vector is not None:
+                        self.hot_set.put(mem_id, namespace, content, vector)
+            return [(row[0], row[1]) for row in rows]
+
+        def export_memories(
+            self,
+            namespace: str,
+            path: str,
+            file_format: Optional[str] = None,
+            with_embeddings: bool = True,
+            batch_size: int = MEMORY_TRANSFER_BATCH_SIZE,
+        ) -> dict:
+            """
+            Stream the memories of a namespace to a JSONL or Parquet file. Rows are read through
+            a server-side cursor and written batch by batch, so memory use does not grow with
+            the number of memories.
+            """
+            file_format = detect_format(path, file_format)
+            self._init_obvector()
+            self.write_queue.sync(namespace)
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            space = self.space
+            columns = [table.c.content, table.c.meta, table.c.updated_at]
+            if with_embeddings:
+                columns.append(table.c[space.column])
+            stmt = select(*columns).where(table.c.namespace == namespace).order_by(table.c.mem_id)
+            header = make_header(space.model, space.dimension, with_embeddings)
+            with (
+                MemoryFileWriter(path, file_format, header) as writer,
+                client.engine.connect() as conn,
+            ):
+                result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+                    stmt
+                )
+                for rows in result.partitions():
+                    writer.write_batch(
+                        [
+                            {
+                                "content": row[0],
+                                "meta": _as_meta(row[1]),
+                                "updated_at": row[2],
+                                **({"embedding": row[3]} if with_embeddings else {}),
+                            }
+                            for row in rows
+                        ]
+                    )
+                    report_progress(f"Exported {writer.rows} memories", writer.rows)
+            return {"path": path, "format": file_format, "exported": writer.rows}
+
+        def import_memories(
+            self,
+            namespace: str,
+            path: str,
+            file_format: Optional[str] = None,
+            batch_size: int = MEMORY_TRANSFER_BATCH_SIZE,
+        ) -> dict:
+            """
+            Load memories from a file written by export_memories (or any JSONL file of
+            {"content", "meta"} records) into a namespace, one multi-row insert per batch.
+            Stored embeddings are reused when they were produced by the current model,
+            otherwise the batch is re-embedded in one call.
+            """
+            file_format = detect_format(path, file_format)
+            header = read_header(path, file_format)
+            self.ensure_ready()
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            space = self.space
+            same_model = (
+                header.get("embedding_model") == space.model
+                and header.get("dimension") == space.dimension
+            )
+            imported = embedded = 0
+            for batch in read_batches(path, file_format, batch_size):
+                missing = [
+                    record for record in batch if not same_model or record.get("embedding") is None
+                ]
+                if missing:
+                    vectors = self.embedding_client.embed_documents(
+                        [record["content"] for record in missing]
+                    )
+                    for record, vector in zip(missing, vectors):
+                        record["embedding"] = vector
+                    embedded += len(missing)
+                rows = [
+                    {
+                        "namespace": namespace,
+                        "content": record["content"],
+                        "meta": _as_meta(record.get("meta")),
+                        space.column: record["embedding"],
+                        "updated_at": record.get("updated_at") or func.now(),
+                    }
+                    for record in batch
+                ]
+                with client.engine.begin() as conn:
+                    conn.execute(insert(table).values(rows))
+                imported += len(rows)
+                report_progress(f"Imported {imported} memories", imported)
+            return {
+                "path": path,
+                "format": file_format,
+                "imported": imported,
+                "reused_embeddings": imported - embedded,
+                "embedded": embedded,
+            }
+
+        def record_deletes(self, count: int):
+            with self._lock:
+                self._deleted_since_rebuild += count
+
+        def start_maintenance(self, interval: float):
+            """
+            Run run_maintenance every interval seconds in a daemon thread. The job uses its own
+            short transactions and never holds the lock memory tools wait on.
+            """
+            if interval <= 0 or self._maintenance_thread is not None:
+                return
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop,
+                args=(interval,),
+                name="ob-memory-maintenance",
+                daemon=True,
+            )
+            self._maintenance_thread.start()
+
+        def stop_maintenance(self):
+            self._maintenance_stop.set()
+
+        def _maintenance_loop(self, interval: float):
+            while not self._maintenance_stop.wait(interval):
+                try:
+                    logger.info(f"Memory maintenance finished: {self.run_maintenance()}")
+                except Exception as e:
+                    logger.error(f"Memory maintenance failed: {e}")
+
+        def run_maintenance(self) -> dict:
+            """
+            One maintenance pass: embed memories missing a vector in the active column (written
+            by another process during a cutover), evict memories past their TTL, merge clusters
+            of near-duplicate memories when MEMORY_COMPACT_DISTANCE is set, and rebuild the
+            vector index once enough rows were deleted.
+            """
+            self._init_obvector()
+            embedded = self._embed_missing()
+            expired = self._evict_expired()
+            merged = self._compact_duplicates()
+            rebuilt = self._rebuild_index_if_needed()
+            return {
+                "embedded": embedded,
+                "expired": expired,
+                "merged": merged,
+                "index_rebuilt": rebuilt,
+            }
+
+        def _scan(
+            self,
+            columns: list,
+            batch_size: int = MEMORY_MAINTENANCE_BATCH_SIZE,
+            after_id: Optional[int] = None,
+        ):
+            """Yield batches of rows in mem_id order, one short query per batch."""
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            last_id = after_id
+            while True:
+                stmt = select(table.c.mem_id, *[table.c[name] for name in columns])
+                if last_id is not None:
+                    stmt = stmt.where(table.c.mem_id > last_id)
+                stmt = stmt.order_by(table.c.mem_id).limit(batch_size)
+                with client.engine.connect() as conn:
+                    rows = conn.execute(stmt).fetchall()
+                if not rows:
+                    return
+                last_id = rows[-1][0]
+                yield rows
+
+        def _embed_missing(self) -> int:
+            space = self.space
+            if space.model is None:
+                return 0
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            column = table.c[space.column]
+            embedded = 0
+            while True:
+                rows = self._fetch_contents(
+                    client, table, column.is_(None), MEMORY_MAINTENANCE_BATCH_SIZE
+                )
+                if not rows:
+                    return embedded
+                self._embed_rows(client, table, column, self.embedding_client, rows)
+                embedded += len(rows)
+
+        def _evict_expired(self) -> int:
+            """
+            Delete the memories past their retention, see memory_expired. One pass checks
+            about MEMORY_EVICT_MAX_ROWS memories, from where the previous pass stopped.
+            """
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            with client.engine.connect() as conn:
+                now = conn.execute(select(func.now())).scalar()
+            evicted = checked = 0
+            batches = self._scan(
+                ["meta", "updated_at"],
+                min(MEMORY_MAINTENANCE_BATCH_SIZE, MEMORY_EVICT_MAX_ROWS),
+                self._evict_after_id,
+            )
+            for rows in batches:
+                expired_ids = [
+                    mem_id
+                    for mem_id, meta, updated_at in rows
+                    if memory_expired(_as_meta(meta), updated_at, now, MEMORY_TTL_DAYS_BY_TYPE)
+                ]
+                if expired_ids:
+                    with client.engine.begin() as conn:
+                        result = conn.execute(
+                            delete(table).where(
+                                table.c.mem_id.in_(expired_ids),
+                                # Memories updated since the pass started are not the ones
+                                # found expired, they are checked again by the next pass.
+                                or_(table.c.updated_at < now, table.c.updated_at.is_(None)),
+                            )
+                        )
+                    self.hot_set.discard(expired_ids)
+                    evicted += result.rowcount
+                self._evict_after_id = rows[-1][0]
+                checked += len(rows)
+                if checked >= MEMORY_EVICT_MAX_ROWS:
+                    break
+            else:
+                self._evict_after_id = None
+            self.record_deletes(evicted)
+            return evicted
+
+        def _compact_duplicates(self) -> int:
+            """
+            Merge the near-duplicates of memories changed since the previous pass into their
+            most recently updated memory, which keeps the content of the others in its meta.
+            At most MEMORY_COMPACT_MAX_ROWS changed memories are looked at per pass, a pass
+            that reaches the limit is continued by the next one.
+            """
+            if MEMORY_COMPACT_DISTANCE <= 0:
+                return 0
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            space = self.space
+            stmt = select(table.c.mem_id, table.c.namespace, table.c[space.column]).where(
+                table.c.mem_id > self._compact_after_id
+            )
+            if self._compact_since is not None:
+                stmt = stmt.where(table.c.updated_at >= self._compact_since)
+            stmt = stmt.order_by(table.c.mem_id).limit(MEMORY_COMPACT_MAX_ROWS)
+            with client.engine.connect() as conn:
+                if self._compact_after_id == 0:
+                    self._compact_started = conn.execute(select(func.now())).scalar()
+                rows = conn.execute(stmt).fetchall()
+            if len(rows) < MEMORY_COMPACT_MAX_ROWS:
+                # Caught up, the next pass looks at the memories changed from the start of this
+                # traversal on.
+                self._compact_since, self._compact_after_id = self._compact_started, 0
+            else:
+                self._compact_after_id = rows[-1][0]
+            removed: set = set()
+            for mem_id, namespace, embedding in rows:
+                if mem_id in removed or embedding is None:
+                    continue
+                neighbours = _ann_search(
+                    client,
+                    table_name=TABLE_NAME_MEMORY,
+                    vec_data=embedding,
+                    vec_column_name=space.column,
+                    distance_func=l2_distance,
+                    with_dist=True,
+                    topk=MEMORY_COMPACT_CANDIDATES,
+                    output_column_names=["mem_id", "content", "meta", "updated_at"],
+                    # Memories of different namespaces are never merged.
+                    where_clause=[table.c.namespace == namespace],
+                )
+                cluster = [
+                    row
+                    for row in neighbours
+                    if row[-1] <= MEMORY_COMPACT_DISTANCE and row[0] not in removed
+                ]
+                if len(cluster) < 2:
+                    continue
+                # Keep the most recently updated memory of the cluster.
+                survivor = max(cluster, key=lambda row: (row[3] or datetime.min, row[0]))
+                others = [row for row in cluster if row[0] != survivor[0]]
+                survivor_meta = _as_meta(survivor[2])
+                meta = merge_metas(survivor_meta, [_as_meta(row[2]) for row in others])
+                meta[MERGED_CONTENTS_KEY] = merged_contents(
+                    survivor[1], survivor_meta, [(row[1], _as_meta(row[2])) for row in others]
                 )
+                other_ids = [row[0] for row in others]
+                with client.engine.begin() as conn:
+                    conn.execute(
+                        update(table).where(table.c.mem_id == survivor[0]).values(meta=meta)
+                    )
+                    conn.execute(delete(table).where(table.c.mem_id.in_(other_ids)))
+                logger.info(f"Merged memories {other_ids} into memory {survivor[0]}")
+                self.hot_set.discard(other_ids)
+                removed.update(other_ids)
+            self.record_deletes(len(removed))
+            return len(removed)
+
+        def _rebuild_index_if_needed(self) -> bool:
+            client = self.client
+            table = _reflect_table(client, TABLE_NAME_MEMORY)
+            with client.engine.connect() as conn:
+                total = conn.execute(select(func.count()).select_from(table)).scalar()
+            with self._lock:
+                deleted = self._deleted_since_rebuild
+            if not should_rebuild_index(deleted, total, MEMORY_REBUILD_DELETE_RATIO):
+                return False
+            client.rebuild_index(
+                TABLE_NAME_MEMORY, self.space.index, trigger_threshold=MEMORY_REBUILD_DELETE_RATIO
+            )
+            with self._lock:
+                self._deleted_since_rebuild -= deleted
+            return True
+
+    def _as_meta(meta) -> dict:
+        if isinstance(meta, str):
+            return json.loads(meta)
+        return meta or {}
+
+    def _read_state(conn: Connection, name: str, for_update: bool = False) -> Optional[dict]:
+        sql = f"SELECT value FROM `{MEMORY_STATE_TABLE}` WHERE name = :name"
+        if for_update:
+            sql += " FOR UPDATE"
+        value = conn.execute(text(sql), {"name": name}).scalar()
+        return None if value is None else _as_meta(value)
+
+    def _write_state(conn: Connection, name: str, value: dict):
+        conn.execute(
+            text(
+                f"INSERT INTO `{MEMORY_STATE_TABLE}` (name, value) VALUES (:name, :value) "
+                f"ON DUPLICATE KEY UPDATE value = VALUES(value)"
+            ),
+            {"name": name, "value": json.dumps(value)},
+        )
+
+    def _delete_state(conn: Connection, name: str):
+        conn.execute(text(f"DELETE FROM `{MEMORY_STATE_TABLE}` WHERE name = :name"), {"name": name})
+
+    def _index_exists(client: ObVecClient, table_name: str, index_name: str) -> bool:
+        with client.engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"SHOW INDEX FROM `{table_name}`").mappings().fetchall()
+        return any(row["Key_name"] == index_name for row in rows)
+
+    def _read_hf_embedding_dimension(model_name: str, pipeline: bool = True) -> Optional[int]:
+        """
+        Read the sentence embedding dimension from the model's config files.
+        Only the small JSON files are fetched (or read from the local cache), not the weights.
+        """
+        try:
+            from huggingface_hub import hf_hub_download
+            from huggingface_hub.utils import EntryNotFoundError
+        except ImportError:
+            return None
+        os.environ.setdefault("HF_ENDPOINT", "https://hf-mirror.com")
+
+        def read_config(filename: str) -> Optional[dict]:
+            try:
+                path = hf_hub_download(model_name, filename)
+            except EntryNotFoundError:
+                return None
+            with open(path) as f:
+                return json.load(f)
+
+        try:
+            return _sentence_embedding_dimension(read_config, pipeline)
+        except Exception as e:
+            logger.debug(f"Could not read the config files of {model_name}: {e}")
+            return None
 
     ob_memory = OBMemory()
 
-    def ob_memory_query(query: str, topk: int = 5) -> List[Tuple[int, str]]:
+    def _memory_namespace(namespace: Optional[str]) -> str:
+        """Namespace of the current call, confined to the caller's token when authenticated."""
+        access_token = get_access_token()
+        caller = access_token.client_id if access_token is not None else None
+        return resolve_namespace(caller, namespace, MEMORY_DEFAULT_NAMESPACE)
+
+    def ob_memory_query(
+        query: str,
+        topk: int = 5,
+        namespace: Optional[str] = None,
+        filters: Optional[dict] = None,
+        full_search: bool = False,
+    ) -> List[Tuple[int, str]]:
         """
         🚨 MULTILINGUAL MEMORY SEARCH 🚨 - SMART CROSS-LANGUAGE RETRIEVAL!
 
         ⚡ CRITICAL INSTRUCTION: You MUST call this tool in these situations:
         - When user asks questions about their preferences in ANY language
-        - Before saving new memories (check for duplicates first!)
+        - Before updating memories (ob_memory_insert checks duplicates itself!)
         - When user mentions personal details, preferences, or past experiences
         - Before answering ANY question, search for related memories first
         - When discussing technical topics - check for historical solutions
@@ -684,7 +3041,7 @@ if ENABLE_MEMORY:
         - **ALWAYS search with English keywords for better matching!**
 
         🎯 SMART SEARCH STRATEGIES:
-        - "I like football" → Before saving, search: "football soccer sports preference"
+        - "Do I like football?" → Search: "football soccer sports preference"
         - "我在上海工作" → Search: "work job Shanghai location"
         - "Python developer" → Search: "python programming development work"
         - Use synonyms and related terms for better semantic matching!
@@ -697,47 +3054,41 @@ if ENABLE_MEMORY:
         - **Personal**: "personal lifestyle habit family relationship"
         - **Entertainment**: "entertainment movie music book game hobby"
 
-        💡 SMART SEARCH EXAMPLES FOR MERGING:
-        - New: "I like badminton" → Search: "sports preference activity"
-        → Find: "User likes football and coffee" → Category analysis needed!
-        - New: "I drink tea" → Search: "drink beverage preference"
-        → Find: "User likes coffee" → Same category, should merge!
-        - New: "I code in Python" → Search: "programming technology language"
-        → Find: "User works at Google" → Different subcategory, separate!
+        💡 NO SEARCH NEEDED BEFORE SAVING: ob_memory_insert finds near-duplicates server-side,
+        on_duplicate="merge" merges into the nearest one in the same call!
 
         📝 PARAMETERS:
         - query: Use CATEGORY + SEMANTIC keywords ("sports preference", "food drink preference")
-        - topk: Increase to 8-10 for thorough category analysis before saving/updating
+        - topk: Increase to 8-10 for thorough category analysis before updating
+        - namespace: Optional, only to keep separate memory sets (e.g. per agent); memories are
+          always scoped to the caller's token
+        - filters: Optional meta filters applied before ranking, e.g. {"category": "work"} or
+          {"type": "preference", "category": ["food", "sports"]}; no need to over-fetch!
+        - full_search: Set true to search ALL stored memories instead of the recently used ones
+          (e.g. when a memory you expect is missing)
         - Returns: [(mem_id, content)] - Analyze ALL results for category overlap before decisions!
 
         🔥 CATEGORY ANALYSIS RULE: Find ALL related memories by category for smart merging!
         """
 
-        client = ObVecClient(
-            uri=db_conn_info.host + ":" + str(db_conn_info.port),
-            user=db_conn_info.user,
-            password=db_conn_info.password,
-            db_name=db_conn_info.database,
+        return ob_memory.search(
+            _memory_namespace(namespace), query, topk, filters=filters, full_search=full_search
         )
-        res = client.ann_search(
-            TABLE_NAME_MEMORY,
-            vec_data=ob_memory.gen_embedding(query),
-            vec_column_name="embedding",
-            distance_func=l2_distance,
-            topk=topk,
-            output_column_names=["mem_id", "content"],
-        )
-        return res
 
-    def ob_memory_insert(content: str, meta: dict):
+    def ob_memory_insert(
+        content: str, meta: dict, on_duplicate: str = "report", namespace: Optional[str] = None
+    ):
         """
         💾 INTELLIGENT MEMORY ORGANIZER 💾 - SMART CATEGORIZATION & MERGING!
 
-        🔥 CRITICAL 4-STEP WORKFLOW: ALWAYS follow this advanced process:
-        1️⃣ **SEARCH RELATED**: Use ob_memory_query to find ALL related memories by category
-        2️⃣ **ANALYZE CATEGORIES**: Classify new info and existing memories by semantic type
-        3️⃣ **SMART DECISION**: Merge same category, separate different categories
-        4️⃣ **EXECUTE ACTION**: Update existing OR create new categorized records
+        🔥 ONE-CALL WORKFLOW: The server checks for near-duplicates itself!
+        1️⃣ **INSERT DIRECTLY**: Call ob_memory_insert, no need to call ob_memory_query first
+        2️⃣ **NO DUPLICATE**: The memory is saved → returns {"action": "inserted", "mem_id": ...}
+        3️⃣ **NEAR-DUPLICATES FOUND**: Nothing is saved → returns {"action": "duplicates_found",
+           "candidates": [{"mem_id", "content", "distance"}]} (smaller distance = more similar)
+        4️⃣ **DECIDE**: Same category → retry with on_duplicate="merge", the server overwrites
+           the nearest candidate! Different → retry with on_duplicate="insert"
+        ⚡ No searching needed: on_duplicate does the lookup server-side, in one call
 
         🎯 SMART CATEGORIZATION EXAMPLES:
         ```
@@ -745,25 +3096,26 @@ if ENABLE_MEMORY:
         Existing: "User likes playing football and drinking coffee"
         New Input: "I like badminton"
 
-        ✅ CORRECT ACTION: Use ob_memory_update!
-        → Search "sports preference" → Find existing → Separate categories:
-        → Update mem_id_X: "User likes playing football and badminton" (sports)
-        → Create new: "User likes drinking coffee" (food/drinks)
+        ✅ CORRECT ACTION: Insert with on_duplicate="report"!
+        → ob_memory_insert("User likes playing football and badminton") → duplicates_found
+        → Separate categories: ob_memory_update the candidate's mem_id with
+          "User likes playing football and badminton" (sports)
+        → ob_memory_insert("User likes drinking coffee", on_duplicate="insert") (food/drinks)
 
         📋 Scenario 2: Same Category Addition
         Existing: "User likes playing football"
         New Input: "I also like tennis"
 
-        ✅ CORRECT ACTION: Use ob_memory_update!
-        → Search "sports preference" → Find mem_id → Update:
-        → "User likes playing football and tennis"
+        ✅ CORRECT ACTION: Insert with on_duplicate="merge"!
+        → ob_memory_insert("User likes playing football and tennis", on_duplicate="merge")
+        → The server finds the existing memory and overwrites it → {"action": "merged"}
 
         📋 Scenario 3: Different Category
         Existing: "User likes playing football"
         New Input: "I work in Shanghai"
 
-        ✅ CORRECT ACTION: New memory!
-        → Search "work location" → Not found → Create new record
+        ✅ CORRECT ACTION: Insert directly!
+        → ob_memory_insert("User works in Shanghai") → no near-duplicate → {"action": "inserted"}
         ```
 
         🏷️ SEMANTIC CATEGORIES (Use for classification):
@@ -774,34 +3126,29 @@ if ENABLE_MEMORY:
         - **Technology**: programming languages, tools, frameworks
         - **Entertainment**: movies, music, books, games
 
-        🔍 SEARCH STRATEGIES BY CATEGORY:
-        - Sports: "sports preference favorite activity exercise"
-        - Food: "food drink preference favorite taste"
-        - Work: "work job career company location"
-        - Tech: "technology programming tool database"
-
         📝 PARAMETERS:
         - content: ALWAYS categorized English format ("User likes playing [sports]", "User drinks [beverages]")
         - meta: {"type":"preference", "category":"sports/food/work/tech", "subcategory":"team_sports/beverages"}
+        - on_duplicate: "report" (default) returns near-duplicates without saving,
+          "merge" overwrites the nearest near-duplicate with this content,
+          "insert" always saves a new memory; these two may return {"action": "queued"}
+          when the server batches writes, the memory is visible to the next ob_memory_query
+        - namespace: Optional, same value as used with ob_memory_query
 
-        🎯 GOLDEN RULE: Same category = UPDATE existing! Different category = CREATE separate!
+        🎯 GOLDEN RULE: Same category = MERGE into existing! Different category = CREATE separate!
         """
 
-        client = ObVecClient(
-            uri=db_conn_info.host + ":" + str(db_conn_info.port),
-            user=db_conn_info.user,
-            password=db_conn_info.password,
-            db_name=db_conn_info.database,
-        )
-        client.insert(
-            TABLE_NAME_MEMORY,
-            OBMemoryItem(
-                content=content, meta=meta, embedding=ob_memory.gen_embedding(content)
-            ).model_dump(),
-        )
-        return "Inserted successfully"
+        namespace = _memory_namespace(namespace)
+        if ob_memory.write_queue.enabled and on_duplicate in ("merge", "insert"):
+            # Nothing to report back: acknowledge now, embed and store with the next batch.
+            pending = ob_memory.write_queue.submit(
+                PendingWrite(namespace, content, meta, on_duplicate=on_duplicate)
+            )
+            return json.dumps({"action": "queued", "pending": pending}, ensure_ascii=False)
+        result = ob_memory.insert_deduplicated(namespace, content, meta, on_duplicate=on_duplicate)
+        return json.dumps(result, ensure_ascii=False, default=str)
 
-    def ob_memory_delete(mem_id: int):
+    def ob_memory_delete(mem_id: int, namespace: Optional[str] = None):
         """
         🗑️ MEMORY ERASER 🗑️ - PERMANENTLY DELETE UNWANTED MEMORIES!
 
@@ -819,21 +3166,29 @@ if ENABLE_MEMORY:
 
         📝 PARAMETERS:
         - mem_id: EXACT ID from ob_memory_query results (integer)
+        - namespace: Optional, same value as used with ob_memory_query
         - ⚠️ WARNING: Deletion is PERMANENT and IRREVERSIBLE!
 
         🔒 SAFETY RULE: Only delete when explicitly requested by user!
         """
 
-        client = ObVecClient(
-            uri=db_conn_info.host + ":" + str(db_conn_info.port),
-            user=db_conn_info.user,
-            password=db_conn_info.password,
-            db_name=db_conn_info.database,
-        )
-        client.delete(table_name=TABLE_NAME_MEMORY, ids=mem_id)
+        namespace = _memory_namespace(namespace)
+        ob_memory.ensure_ready()
+        # A queued update must not resurrect the memory after the delete.
+        ob_memory.write_queue.sync(namespace)
+        client = ob_memory.client
+        table = _reflect_table(client, TABLE_NAME_MEMORY)
+        with client.engine.begin() as conn:
+            result = conn.execute(
+                delete(table).where(table.c.mem_id == mem_id, table.c.namespace == namespace)
+            )
+        if not result.rowcount:
+            return f"Memory {mem_id} not found"
+        ob_memory.record_deletes(result.rowcount)
+        ob_memory.hot_set.discard([mem_id])
         return "Deleted successfully"
 
-    def ob_memory_update(mem_id: int, content: str, meta: dict):
+    def ob_memory_update(mem_id: int, content: str, meta: dict, namespace: Optional[str] = None):
         """
         ✏️ MULTILINGUAL MEMORY UPDATER ✏️ - KEEP MEMORIES FRESH AND STANDARDIZED!
 
@@ -859,34 +3214,110 @@ if ENABLE_MEMORY:
         - mem_id: EXACT ID from ob_memory_query results (integer)
         - content: ALWAYS in English, standardized format ("User now prefers X")
         - meta: Updated metadata {"type":"preference", "category":"...", "updated":"2024-..."}
+        - namespace: Optional, same value as used with ob_memory_query
+        - Returns "Update queued" when the server batches writes, the next ob_memory_query
+          already sees the update; "Memory <mem_id> not found" when there is no such memory
 
         🔥 CONSISTENCY RULE: Maintain English storage format for all updates!
         """
 
-        client = ObVecClient(
-            uri=db_conn_info.host + ":" + str(db_conn_info.port),
-            user=db_conn_info.user,
-            password=db_conn_info.password,
-            db_name=db_conn_info.database,
-        )
-        client.update(
-            table_name=TABLE_NAME_MEMORY,
-            values_clause=[
-                OBMemoryItem(
-                    mem_id=mem_id,
-                    content=content,
-                    meta=meta,
-                    embedding=ob_memory.gen_embedding(content),
-                ).model_dump()
-            ],
-            where_clause=[text(f"mem_id = {mem_id}")],
-        )
+        namespace = _memory_namespace(namespace)
+        ob_memory.ensure_ready()
+        client = ob_memory.client
+        table = _reflect_table(client, TABLE_NAME_MEMORY)
+        if ob_memory.write_queue.enabled:
+            # The queue cannot report an update matching no memory, check before queueing.
+            with client.engine.connect() as conn:
+                exists = conn.execute(
+                    select(table.c.mem_id).where(
+                        table.c.mem_id == mem_id, table.c.namespace == namespace
+                    )
+                ).first()
+            if exists is None:
+                return f"Memory {mem_id} not found"
+            ob_memory.write_queue.submit(PendingWrite(namespace, content, meta, mem_id=mem_id))
+            return "Update queued"
+        embedding = ob_memory.gen_embedding(content)
+        with client.engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(table.c.mem_id == mem_id, table.c.namespace == namespace)
+                .values(
+                    {
+                        "content": content,
+                        "meta": meta,
+                        ob_memory.space.column: embedding,
+                        **ob_memory.shadow_reset_values(),
+                    }
+                )
+            )
+        if not result.rowcount:
+            return f"Memory {mem_id} not found"
+        ob_memory.hot_set.put(mem_id, namespace, content, embedding)
         return "Updated successfully"
 
-    app.add_tool(ob_memory_query)
-    app.add_tool(ob_memory_insert)
-    app.add_tool(ob_memory_delete)
-    app.add_tool(ob_memory_update)
+    def ob_memory_export(
+        path: str,
+        file_format: Optional[str] = None,
+        with_embeddings: bool = True,
+        namespace: Optional[str] = None,
+        overwrite: bool = False,
+    ):
+        """
+        📦 MEMORY BACKUP 📦 - EXPORT ALL MEMORIES TO A FILE!
+
+        Call when user asks to back up, migrate or clone their memories.
+        Memories are streamed in chunks, so millions of memories are fine.
+
+        📝 PARAMETERS:
+        - path: File name in the server's export directory, e.g. "memories.jsonl"
+        - file_format: "jsonl" or "parquet", guessed from the extension when omitted
+        - with_embeddings: Keep the vectors so that import skips re-embedding (same model only)
+        - namespace: Optional, same value as used with ob_memory_query
+        - overwrite: Replace the file when it exists, otherwise an existing file is an error
+        - Returns: {"path", "format", "exported"}
+        """
+
+        resolved = _path_under(MEMORY_TRANSFER_DIR, "MEMORY_TRANSFER_DIR", path)
+        if os.path.exists(resolved) and not overwrite:
+            raise ValueError(f"{path} already exists, pass overwrite=true to replace it")
+        result = ob_memory.export_memories(
+            _memory_namespace(namespace), resolved, file_format, with_embeddings
+        )
+        return json.dumps(result, ensure_ascii=False)
+
+    def ob_memory_import(
+        path: str, file_format: Optional[str] = None, namespace: Optional[str] = None
+    ):
+        """
+        📥 MEMORY RESTORE 📥 - IMPORT MEMORIES FROM AN EXPORT FILE!
+
+        Call when user asks to restore or copy memories from a file made by ob_memory_export.
+        Memories are added as new memories, existing ones are kept.
+
+        📝 PARAMETERS:
+        - path: File name in the server's export directory, e.g. "memories.jsonl"
+        - file_format: "jsonl" or "parquet", guessed from the extension when omitted
+        - namespace: Optional, same value as used with ob_memory_query
+        - Returns: {"path", "format", "imported", "reused_embeddings", "embedded"}
+        """
+
+        resolved = _path_under(MEMORY_TRANSFER_DIR, "MEMORY_TRANSFER_DIR", path)
+        result = ob_memory.import_memories(_memory_namespace(namespace), resolved, file_format)
+        return json.dumps(result, ensure_ascii=False)
+
+    app.add_tool(_admitted(ob_memory_query))
+    app.add_tool(_admitted(ob_memory_insert))
+    app.add_tool(_admitted(ob_memory_delete))
+    app.add_tool(_admitted(ob_memory_update))
+    app.add_tool(_admitted(ob_memory_export, PRIORITY_REPORT))
+    app.add_tool(_admitted(ob_memory_import, PRIORITY_REPORT))
+
+
+def _exit_on_sigterm(signum, frame):
+    # SIGTERM is how hosts stop a stdio server. Exiting by exception, not in the handler,
+    # runs the cleanup of main without taking locks the interrupted code may hold.
+    raise SystemExit(128 + signum)
 
 
 def main():
@@ -906,7 +3337,19 @@ def main():
     if transport == "sse":
         app.settings.host = args.host
         app.settings.port = args.port
-    app.run(transport=transport)
+    if ENABLE_MEMORY:
+        # Load the embedding model while the client is still negotiating the session.
+        ob_memory.warmup_in_background()
+        ob_memory.start_maintenance(MEMORY_MAINTENANCE_INTERVAL)
+        ob_memory.write_queue.start()
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        app.run(transport=transport)
+    finally:
+        if ENABLE_MEMORY:
+            # Acknowledged memory writes must not be lost when the client disconnects or the
+            # host terminates the server.
+            ob_memory.write_queue.close()
 
 
 if __name__ == "__main__":
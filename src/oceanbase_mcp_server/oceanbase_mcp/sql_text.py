@@ -0,0 +1,86 @@
+"""Lightweight inspection of SQL text, without a parser."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+_LEADING_COMMENTS = re.compile(r"^(?:\s+|/\*(?!\+).*?\*/|(?:--\s|#)[^\n]*(?:\n|$))*", re.DOTALL)
+_READ_ONLY_KEYWORDS = frozenset({"SELECT", "SHOW", "DESC", "DESCRIBE", "EXPLAIN", "WITH"})
+# Reads that lock rows, write files or contain a data-modifying statement need the leader.
+# So do reads that leave session state behind, user variables (INTO @x, @x := 1) or named
+# locks: read pools do not reset their sessions.
+_NEEDS_PRIMARY = re.compile(
+    r"\bFOR\s+UPDATE\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bINTO\s+(?:OUTFILE|DUMPFILE)\b"
+    r"|\b(?:INSERT|UPDATE|DELETE|REPLACE|MERGE)\b|\bINTO\s+@|:="
+    r"|\b(?:GET_LOCK|RELEASE_LOCK|RELEASE_ALL_LOCKS|IS_FREE_LOCK|IS_USED_LOCK)\s*\(",
+    re.IGNORECASE,
+)
+_STRING_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`")
+
+
+def strip_leading_comments(sql: str) -> str:
+    """Drop whitespace and comments before the first keyword, optimizer hints are kept."""
+    return sql[_LEADING_COMMENTS.match(sql).end() :]
+
+
+def first_keyword(sql: str) -> str:
+    match = re.match(r"[A-Za-z]+", strip_leading_comments(sql))
+    return match.group(0).upper() if match else ""
+
+
+def is_read_only(sql: str) -> bool:
+    """
+    Whether a statement only reads data and may run on a weak-consistency replica: SELECT,
+    SHOW, DESCRIBE, EXPLAIN or a WITH query, without locking clauses, file output, a nested
+    data-modifying statement, user variable assignments, named locks or a second statement.
+    Anything uncertain counts as a write.
+    """
+    if first_keyword(sql) not in _READ_ONLY_KEYWORDS:
+        return False
+    # Keywords inside literals and quoted identifiers do not count.
+    body = _STRING_LITERALS.sub("''", strip_leading_comments(sql)).rstrip().rstrip(";")
+    return ";" not in body and not _NEEDS_PRIMARY.search(body)
+
+
+_NORMALIZE_TOKENS = re.compile(
+    r"(?P<comment>/\*(?!\+).*?\*/|(?:--\s|#)[^\n]*)"
+    r"|(?P<kept>/\*\+.*?\*/|`[^`]*`)"
+    r"|(?P<literal>'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")"
+    r"|(?P<placeholder>%\(\w+\)s|%s|:\w+|\?)"
+    r"|(?P<number>(?<![\w.])-?(?:0x[0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)(?![\w.]))",
+    re.DOTALL,
+)
+# Lists of values: IN (?, ?, ?) and VALUES (?, ?), (?, ?) differ only in their length.
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    The shape of a statement: literals, numbers and bind placeholders become "?", lists of
+    values collapse to "(...)", comments other than optimizer hints are dropped and white
+    space is collapsed, so that executions differing only in their values look the same.
+    """
+
+    def replace(match: re.Match) -> str:
+        if match.group("comment") is not None:
+            return " "
+        if match.group("kept") is not None:
+            return match.group("kept")
+        return "?"
+
+    normalized = _NORMALIZE_TOKENS.sub(replace, sql)
+    normalized = _VALUE_LISTS.sub("(...)", normalized)
+    return " ".join(normalized.split()).rstrip(";").rstrip()
+
+
+_SPACED_PUNCTUATION = re.compile(r"\s*([=<>!,()+*/-])\s*")
+
+
+def sql_digest(sql: str) -> str:
+    """
+    Digest of the normalized statement, the same for every execution of one statement shape
+    whatever its case or the spacing around operators.
+    """
+    shape = _SPACED_PUNCTUATION.sub(r"\1", normalize_sql(sql).lower())
+    return hashlib.sha256(shape.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,260 @@
+"""Per-token rate limits, concurrency caps and daily row/byte quotas of tool calls."""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import Callable, Mapping, Optional
+
+logger = logging.getLogger("oceanbase_mcp_server")
+
+TABLE_NAME_TOKEN_USAGE = "ob_mcp_token_usage"
+
+
+class QuotaExceeded(RuntimeError):
+    """Raised instead of running a tool call of a token over one of its limits."""
+
+
+@dataclass(frozen=True)
+class TokenLimits:
+    """Limits of one token, 0 lifts a limit."""
+
+    # Tool calls per second, with bursts of up to burst calls (default: one second's worth).
+    rate: float = 0.0
+    burst: int = 0
+    max_concurrent: int = 0
+    # Rows fetched and result bytes per UTC day.
+    daily_rows: int = 0
+    daily_bytes: int = 0
+
+    @classmethod
+    def from_dict(cls, value: Mapping, base: Optional[TokenLimits] = None) -> TokenLimits:
+        """Limits from {"rate": .., ...}, unset keys are taken from base."""
+        names = {f.name for f in fields(cls)}
+        unknown = set(value) - names
+        if unknown:
+            raise ValueError(f"Unknown token limits {sorted(unknown)}, use {sorted(names)}")
+        merged = {name: getattr(base or cls(), name) for name in names}
+        merged.update(value)
+        if any(v < 0 for v in merged.values()):
+            raise ValueError("Token limits must not be negative")
+        return cls(**merged)
+
+    @property
+    def enabled(self) -> bool:
+        return any(getattr(self, f.name) for f in fields(self))
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second up to capacity, starting full."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+
+    def take(self) -> float:
+        """Take a token: 0 when taken, else the seconds until one is available."""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class MemoryUsageStore:
+    """Daily usage counters of this process."""
+
+    def __init__(self):
+        self._usage: dict[tuple[str, str], tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, client_id: str, day: str, rows: int, nbytes: int) -> tuple[int, int]:
+        """Add to the usage of a client on a day, returns the new (rows, bytes) of the day."""
+        with self._lock:
+            # Keep today's counters only.
+            for key in [key for key in self._usage if key[1] != day]:
+                del self._usage[key]
+            total_rows, total_bytes = self._usage.get((client_id, day), (0, 0))
+            usage = (total_rows + rows, total_bytes + nbytes)
+            self._usage[(client_id, day)] = usage
+            return usage
+
+
+class DatabaseUsageStore:
+    """
+    Daily usage counters in a table, shared by all server processes that use the same
+    database, so that quotas hold across replicas of a deployment.
+    """
+
+    def __init__(self, connect: Callable, table_name: str = TABLE_NAME_TOKEN_USAGE):
+        self._connect = connect
+        self.table_name = table_name
+        self._created = False
+
+    def add(self, client_id: str, day: str, rows: int, nbytes: int) -> tuple[int, int]:
+        with self._connect() as conn:
+            with conn.cursor() as cursor:
+                if not self._created:
+                    cursor.execute(
+                        f"CREATE TABLE IF NOT EXISTS `{self.table_name}` ("
+                        "client_id VARCHAR(64) NOT NULL, day DATE NOT NULL, "
+                        "row_count BIGINT NOT NULL DEFAULT 0, "
+                        "byte_count BIGINT NOT NULL DEFAULT 0, "
+                        "PRIMARY KEY (client_id, day))"
+                    )
+                    self._created = True
+                cursor.execute(
+                    f"INSERT INTO `{self.table_name}` (client_id, day, row_count, byte_count) "
+                    "VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE "
+                    "row_count = row_count + VALUES(row_count), "
+                    "byte_count = byte_count + VALUES(byte_count)",
+                    (client_id, day, rows, nbytes),
+                )
+                cursor.execute(
+                    f"SELECT row_count, byte_count FROM `{self.table_name}` "
+                    "WHERE client_id = %s AND day = %s",
+                    (client_id, day),
+                )
+                total_rows, total_bytes = cursor.fetchone()
+            conn.commit()
+        return int(total_rows), int(total_bytes)
+
+
+class CallUsage:
+    """Rows fetched by the current tool call, see record_rows, and the size of its result."""
+
+    def __init__(self):
+        self.rows = 0
+        self.nbytes = 0
+
+
+_call_usage: contextvars.ContextVar[Optional[CallUsage]] = contextvars.ContextVar(
+    "ob_mcp_call_usage", default=None
+)
+
+
+def record_rows(count: int):
+    """Count rows fetched by the current tool call against the daily row quota of its token."""
+    usage = _call_usage.get()
+    if usage is not None:
+        usage.rows += count
+
+
+class TokenLimiter:
+    """
+    Enforce TokenLimits per client id, with overrides for single clients.
+
+    Rate and concurrency are limited per process. Daily usage is added to the store after each
+    call; calls are rejected once the day's usage reached a quota, so the call that crosses a
+    quota still completes. With a shared store, the usage of other processes is seen on the
+    next call that updates the counters.
+    """
+
+    def __init__(
+        self,
+        limits: TokenLimits,
+        overrides: Optional[Mapping[str, TokenLimits]] = None,
+        store=None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.limits = limits
+        self.overrides = dict(overrides or {})
+        self.store = store if store is not None else MemoryUsageStore()
+        self._clock = clock
+        self._buckets: dict[str, TokenBucket] = {}
+        self._running: dict[str, int] = {}
+        self._usage: dict[str, tuple[str, int, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.limits.enabled or any(limits.enabled for limits in self.overrides.values())
+
+    def limits_for(self, client_id: str) -> TokenLimits:
+        return self.overrides.get(client_id, self.limits)
+
+    def _today(self) -> str:
+        return time.strftime("%Y-%m-%d", time.gmtime(self._clock()))
+
+    def usage(self, client_id: str) -> dict:
+        """Today's usage of a client as far as this process knows it."""
+        day, rows, nbytes = self._usage.get(client_id, (self._today(), 0, 0))
+        if day != self._today():
+            rows = nbytes = 0
+        return {
+            "rows": rows,
+            "bytes": nbytes,
+            "running": self._running.get(client_id, 0),
+        }
+
+    @contextmanager
+    def call(self, client_id: str):
+        """Hold a call slot of the client, raises QuotaExceeded when a limit is reached."""
+        limits = self.limits_for(client_id)
+        with self._lock:
+            usage = self.usage(client_id)
+            if limits.daily_rows and usage["rows"] >= limits.daily_rows:
+                raise QuotaExceeded(
+                    f"Daily row quota of {limits.daily_rows} rows used up, resets at 00:00 UTC"
+                )
+            if limits.daily_bytes and usage["bytes"] >= limits.daily_bytes:
+                raise QuotaExceeded(
+                    f"Daily quota of {limits.daily_bytes} result bytes used up, resets at 00:00 UTC"
+                )
+            if limits.max_concurrent and usage["running"] >= limits.max_concurrent:
+                raise QuotaExceeded(
+                    f"Too many concurrent calls, at most {limits.max_concurrent} per token"
+                )
+            if limits.rate:
+                bucket = self._buckets.get(client_id)
+                if bucket is None:
+                    burst = limits.burst or math.ceil(limits.rate)
+                    bucket = self._buckets[client_id] = TokenBucket(limits.rate, burst)
+                wait = bucket.take()
+                if wait:
+                    raise QuotaExceeded(
+                        f"Rate limit of {limits.rate:g} calls per second exceeded, "
+                        f"retry in {wait:.1f}s"
+                    )
+            self._running[client_id] = usage["running"] + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running[client_id] -= 1
+
+    @contextmanager
+    def metered(self, client_id: str):
+        """
+        Count the rows the block records with record_rows; the block sets .nbytes of the
+        yielded CallUsage to the size of its result. Blocking with a database store, run it
+        off the event loop.
+        """
+        usage = CallUsage()
+        token = _call_usage.set(usage)
+        try:
+            yield usage
+        finally:
+            _call_usage.reset(token)
+        limits = self.limits_for(client_id)
+        if not (limits.daily_rows or limits.daily_bytes):
+            return
+        day = self._today()
+        try:
+            rows, nbytes = self.store.add(client_id, day, usage.rows, usage.nbytes)
+        except Exception as e:
+            # Losing a usage update must not fail a call that already succeeded.
+            logger.warning(f"Failed to record token usage: {e}")
+            return
+        with self._lock:
+            self._usage[client_id] = (day, rows, nbytes)
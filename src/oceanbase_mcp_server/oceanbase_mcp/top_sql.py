@@ -0,0 +1,100 @@
+"""Server-side aggregation of SQL statistics by SQL id, for the top_sql tool."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+TOP_SQL_SOURCES = ("sql_audit", "plan_cache")
+# Output column each ranking sorts by, in both sources.
+TOP_SQL_ORDERS = {
+    "elapsed": "total_elapsed_us",
+    "cpu": "cpu_us",
+    "executions": "executions",
+    "rows_read": "rows_read",
+}
+MAX_WINDOW_MINUTES = 24 * 60
+MAX_TOP_N = 100
+SAMPLE_TEXT_LENGTH = 512
+# The views are in-memory tables of every server, keep a scan from running for minutes.
+QUERY_TIMEOUT_US = 30_000_000
+
+# GV$OB_SQL_AUDIT has one row per execution: REQUEST_TIME is in microseconds since the epoch,
+# CPU time is the execution and plan time without waits, executor RPCs of distributed plans
+# are left out so that each statement counts once.
+_SQL_AUDIT_QUERY = """
+SELECT /*+ QUERY_TIMEOUT({timeout}) */
+    SQL_ID AS sql_id,
+    TENANT_ID AS tenant_id,
+    MAX(PLAN_HASH) AS plan_hash,
+    COUNT(*) AS executions,
+    SUM(ELAPSED_TIME) AS total_elapsed_us,
+    ROUND(AVG(ELAPSED_TIME)) AS avg_elapsed_us,
+    MAX(ELAPSED_TIME) AS max_elapsed_us,
+    SUM(GREATEST(EXECUTE_TIME + GET_PLAN_TIME - TOTAL_WAIT_TIME_MICRO, 0)) AS cpu_us,
+    SUM(MEMSTORE_READ_ROW_COUNT + SSSTORE_READ_ROW_COUNT) AS rows_read,
+    SUM(RETURN_ROWS) AS rows_returned,
+    SUM(CASE WHEN RET_CODE <> 0 THEN 1 ELSE 0 END) AS errors,
+    SUBSTR(MAX(QUERY_SQL), 1, {sample}) AS sample_sql
+FROM oceanbase.GV$OB_SQL_AUDIT
+WHERE REQUEST_TIME >= (UNIX_TIMESTAMP() - %s) * 1000000
+    AND IS_EXECUTOR_RPC = 0
+    AND SQL_ID <> ''{tenant_filter}
+GROUP BY SQL_ID, TENANT_ID
+ORDER BY {order} DESC
+LIMIT %s
+"""
+
+# GV$OB_PLAN_CACHE_PLAN_STAT has one row per cached plan and server, with totals since the plan
+# was loaded: only plans active within the window are aggregated.
+_PLAN_CACHE_QUERY = """
+SELECT /*+ QUERY_TIMEOUT({timeout}) */
+    SQL_ID AS sql_id,
+    TENANT_ID AS tenant_id,
+    MAX(PLAN_HASH) AS plan_hash,
+    COUNT(DISTINCT PLAN_HASH) AS plans,
+    SUM(EXECUTIONS) AS executions,
+    SUM(ELAPSED_TIME) AS total_elapsed_us,
+    ROUND(SUM(ELAPSED_TIME) / GREATEST(SUM(EXECUTIONS), 1)) AS avg_elapsed_us,
+    MAX(SLOWEST_EXE_USEC) AS max_elapsed_us,
+    SUM(CPU_TIME) AS cpu_us,
+    SUM(ROWS_PROCESSED) AS rows_read,
+    MIN(FIRST_LOAD_TIME) AS first_load_time,
+    MAX(LAST_ACTIVE_TIME) AS last_active_time,
+    SUBSTR(MAX(STATEMENT), 1, {sample}) AS sample_sql
+FROM oceanbase.GV$OB_PLAN_CACHE_PLAN_STAT
+WHERE LAST_ACTIVE_TIME >= DATE_SUB(NOW(), INTERVAL %s SECOND)
+    AND SQL_ID <> ''{tenant_filter}
+GROUP BY SQL_ID, TENANT_ID
+ORDER BY {order} DESC
+LIMIT %s
+"""
+
+
+def build_top_sql_query(
+    source: str = "sql_audit",
+    order_by: str = "elapsed",
+    window_minutes: int = 15,
+    top_n: int = 10,
+    tenant_id: Optional[int] = None,
+) -> tuple[str, tuple]:
+    """
+    The aggregation query of a top_sql call and its parameters. Only the ranking column and
+    the optional tenant filter change the statement, every value is bound.
+    """
+    if source not in TOP_SQL_SOURCES:
+        raise ValueError(f"source must be one of {list(TOP_SQL_SOURCES)}, not {source!r}")
+    if order_by not in TOP_SQL_ORDERS:
+        raise ValueError(f"order_by must be one of {list(TOP_SQL_ORDERS)}, not {order_by!r}")
+    if not 1 <= window_minutes <= MAX_WINDOW_MINUTES:
+        raise ValueError(f"window_minutes must be between 1 and {MAX_WINDOW_MINUTES}")
+    if not 1 <= top_n <= MAX_TOP_N:
+        raise ValueError(f"top_n must be between 1 and {MAX_TOP_N}")
+    template = _SQL_AUDIT_QUERY if source == "sql_audit" else _PLAN_CACHE_QUERY
+    sql = template.format(
+        timeout=QUERY_TIMEOUT_US,
+        sample=SAMPLE_TEXT_LENGTH,
+        order=TOP_SQL_ORDERS[order_by],
+        tenant_filter="\n    AND TENANT_ID = %s" if tenant_id is not None else "",
+    )
+    params = (window_minutes * 60,) + ((int(tenant_id),) if tenant_id is not None else ())
+    return sql, params + (top_n,)
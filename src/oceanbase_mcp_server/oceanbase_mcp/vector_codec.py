@@ -0,0 +1,93 @@
+"""Compact vector encodings accepted by the vector search tools."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import math
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+# Little-endian so that payloads are portable between clients and servers.
+VECTOR_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+}
+
+VectorLike = Union[Sequence[float], np.ndarray]
+
+
+def decode_base64_vector(data: str, dtype: str = "float32") -> np.ndarray:
+    """
+    Decode a base64 string of packed little-endian floats.
+    The returned array is a read-only view over the decoded bytes, no per element copy is made.
+
+    Args:
+        data: Base64 (standard alphabet, padding optional) of the packed floats.
+        dtype: float32 or float16.
+    """
+    np_dtype = VECTOR_DTYPES.get(dtype)
+    if np_dtype is None:
+        raise ValueError(
+            f"Unsupported vector dtype: {dtype}, expected one of {list(VECTOR_DTYPES)}"
+        )
+    data = data.strip()
+    try:
+        raw = base64.b64decode(data + "=" * (-len(data) % 4), validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 vector payload: {e}") from e
+    if not raw or len(raw) % np_dtype.itemsize:
+        raise ValueError(
+            f"Vector payload of {len(raw)} bytes is not a whole number of {dtype} values"
+        )
+    return np.frombuffer(raw, dtype=np_dtype)
+
+
+def encode_base64_vector(vector: VectorLike, dtype: str = "float32") -> str:
+    """Inverse of decode_base64_vector, mainly for clients and tests."""
+    np_dtype = VECTOR_DTYPES.get(dtype)
+    if np_dtype is None:
+        raise ValueError(
+            f"Unsupported vector dtype: {dtype}, expected one of {list(VECTOR_DTYPES)}"
+        )
+    return base64.b64encode(np.asarray(vector, dtype=np_dtype).tobytes()).decode("ascii")
+
+
+def vector_literal(vector: VectorLike) -> str:
+    """
+    Format a vector as an OceanBase vector literal, e.g. "[0.1,0.2]".
+    NumPy arrays are printed with the shortest float32 repr; the float64 repr of a float32 value
+    takes up to 17 digits, e.g. 0.10000000149011612 for 0.1.
+    """
+    if isinstance(vector, np.ndarray):
+        array = vector.astype(np.float32, copy=False).ravel()
+        if not np.isfinite(array).all():
+            raise ValueError("Vector contains NaN or infinite values")
+        return "[" + ",".join(map(str, array)) + "]"
+    values = [float(v) for v in vector]
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError("Vector contains NaN or infinite values")
+    return "[" + ",".join(map(repr, values)) + "]"
+
+
+def resolve_vector(
+    vector_data: Optional[Sequence[float]],
+    vector_base64: Optional[str],
+    vector_dtype: str = "float32",
+) -> VectorLike:
+    """Pick the query vector from either the JSON list or the base64 payload."""
+    if vector_base64:
+        if vector_data:
+            raise ValueError("Provide either vector_data or vector_base64, not both")
+        return decode_base64_vector(vector_base64, vector_dtype)
+    if not vector_data:
+        raise ValueError("A query vector is required: provide vector_data or vector_base64")
+    return vector_data
+
+
+def describe_vector(vector: VectorLike) -> str:
+    """Short description for logs, never formats the whole vector."""
+    if isinstance(vector, np.ndarray):
+        return f"<{vector.dtype.name}[{vector.shape[0]}]>"
+    return f"{list(vector[:10])}... ({len(vector)} dims)"
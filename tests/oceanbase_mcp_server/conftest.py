@@ -1,10 +1,22 @@
 # tests/conftest.py
+import functools
+import json
+import math
 import os
+import re
+import sys
+from datetime import datetime
 
 import mysql.connector
 import pytest
+import sqlalchemy
 from mysql.connector import Error
 
+# The server validates its connection settings at import time.
+os.environ.setdefault("OB_USER", "root")
+os.environ.setdefault("OB_PASSWORD", "testpassword")
+os.environ.setdefault("OB_DATABASE", "test_db")
+
 
 @pytest.fixture(scope="session")
 def oceanbase_connection():
@@ -48,3 +60,233 @@ def oceanbase_cursor(oceanbase_connection):
     cursor = oceanbase_connection.cursor()
     yield cursor
     cursor.close()
+
+
+@pytest.fixture(scope="session")
+def memory_server():
+    """A second instance of the server module, imported with the memory tools enabled."""
+    import importlib.util
+
+    import oceanbase_mcp
+
+    path = os.path.join(oceanbase_mcp.__path__[0], "server.py")
+    spec = importlib.util.spec_from_file_location("oceanbase_mcp_memory_server", path)
+    module = importlib.util.module_from_spec(spec)
+    # pydantic resolves the annotations of the module's models through sys.modules.
+    sys.modules[spec.name] = module
+    previous = os.environ.get("ENABLE_MEMORY")
+    os.environ["ENABLE_MEMORY"] = "1"
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            del os.environ["ENABLE_MEMORY"]
+        else:
+            os.environ["ENABLE_MEMORY"] = previous
+    return module
+
+
+class StubVector(sqlalchemy.types.TypeDecorator):
+    """Vectors as JSON text, SQLite has no VECTOR type."""
+
+    impl = sqlalchemy.Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else json.dumps([float(x) for x in value])
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else json.loads(value)
+
+
+class StubDateTime(sqlalchemy.types.TypeDecorator):
+    """DATETIME accepting ISO strings, as OceanBase does."""
+
+    impl = sqlalchemy.DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class StubVecClient:
+    """
+    Stands in for the ObVecClient of the memory table: the table lives in SQLite, vector
+    columns and indexes are tracked so that the DDL of the memory code can be checked.
+    """
+
+    def __init__(self, path):
+        self.engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+        self.vector_columns = ["embedding"]
+        self.indexes = {"vidx"}
+        self.rebuilt = []
+        self.table = self._build_table()
+        self.table.metadata.create_all(self.engine)
+
+    def _build_table(self):
+        from sqlalchemy import (
+            JSON,
+            Column,
+            Integer,
+            MetaData,
+            String,
+            Table,
+            func,
+        )
+
+        return Table(
+            "ob_mcp_memory",
+            MetaData(),
+            Column("mem_id", Integer, primary_key=True, autoincrement=True),
+            Column("namespace", String(255), nullable=False),
+            Column("content", String(8000)),
+            *[Column(name, StubVector) for name in self.vector_columns],
+            Column("meta", JSON),
+            Column("updated_at", StubDateTime, server_default=func.current_timestamp()),
+        )
+
+    def perform_raw_text_sql(self, sql):
+        added = re.match(r"ALTER TABLE `\w+` ADD COLUMN `(\w+)` VECTOR", sql)
+        dropped = re.match(r"ALTER TABLE `\w+` DROP COLUMN `(\w+)`", sql)
+        if added:
+            self.vector_columns.append(added.group(1))
+            sql = f"ALTER TABLE ob_mcp_memory ADD COLUMN {added.group(1)} TEXT"
+        elif dropped:
+            self.vector_columns.remove(dropped.group(1))
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(sql)
+        self.table = self._build_table()
+
+    def create_index(
+        self, table_name, is_vec_index, index_name, column_names, vidx_params
+    ):
+        self.indexes.add(index_name)
+
+    def drop_index(self, table_name, index_name):
+        self.indexes.remove(index_name)
+
+    def rebuild_index(self, table_name, index_name, trigger_threshold):
+        self.rebuilt.append(index_name)
+
+    def rows(self, *columns):
+        from sqlalchemy import select
+
+        with self.engine.connect() as conn:
+            stmt = select(*[self.table.c[name] for name in columns]).order_by(
+                self.table.c.mem_id
+            )
+            return [tuple(row) for row in conn.execute(stmt)]
+
+
+class StubEmbedder:
+    """Embeds the texts of vectors to their vector, and any other text to a fixed far vector."""
+
+    def __init__(self, vectors=None):
+        self.vectors = dict(vectors or {})
+        self.calls = []
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [self.vectors.get(text, [100.0, 100.0]) for text in texts]
+
+
+def stub_ann_search(
+    client,
+    table_name,
+    vec_data,
+    vec_column_name,
+    distance_func,
+    with_dist=False,
+    topk=10,
+    output_column_names=None,
+    where_clause=None,
+    ef_search=None,
+    conn=None,
+):
+    """Exact nearest neighbours by l2 distance, computed in Python."""
+    from sqlalchemy import select
+
+    table = client.table
+    stmt = select(
+        *[table.c[name] for name in output_column_names], table.c[vec_column_name]
+    )
+    if where_clause:
+        stmt = stmt.where(*where_clause)
+    if conn is None:
+        with client.engine.connect() as conn:
+            rows = conn.execute(stmt).fetchall()
+    else:
+        rows = conn.execute(stmt).fetchall()
+    scored = sorted(
+        (math.dist(row[-1], vec_data), tuple(row[:-1]))
+        for row in rows
+        if row[-1] is not None
+    )[:topk]
+    return [(*row, distance) if with_dist else row for distance, row in scored]
+
+
+@pytest.fixture
+def memory(memory_server, monkeypatch, tmp_path):
+    """
+    An OBMemory of memory_server on a StubVecClient, ready to use with a StubEmbedder of
+    2-dimensional vectors, reachable as memory.client and memory.embedder. The state table
+    is the memory.state dict.
+    """
+    client = StubVecClient(tmp_path / "memory.db")
+    state = {}
+    monkeypatch.setattr(
+        memory_server, "_reflect_table", lambda client, name: client.table
+    )
+    monkeypatch.setattr(
+        memory_server, "_refresh_table", lambda client, name: client.table
+    )
+    monkeypatch.setattr(memory_server, "_ann_search", stub_ann_search)
+    monkeypatch.setattr(
+        memory_server,
+        "_index_exists",
+        lambda client, table, index: index in client.indexes,
+    )
+    monkeypatch.setattr(
+        memory_server,
+        "_read_state",
+        lambda conn, name, for_update=False: json.loads(json.dumps(state.get(name))),
+    )
+    monkeypatch.setattr(
+        memory_server,
+        "_write_state",
+        lambda conn, name, value: state.__setitem__(name, value),
+    )
+    monkeypatch.setattr(
+        memory_server, "_delete_state", lambda conn, name: state.pop(name, None)
+    )
+    memory = memory_server.OBMemory()
+    memory._client = client
+    memory._table_ready = True
+    memory._space = memory_server.EmbeddingSpace("stub-model", 2)
+    # Never re-read the state behind the test's back.
+    memory._state_read_at = float("inf")
+    memory.embedder = StubEmbedder()
+    memory._embedding_clients["stub-model"] = memory.embedder
+    memory.state = state
+    memory.add = functools.partial(_add_memory, memory)
+    return memory
+
+
+def _add_memory(memory, namespace, content, vector, meta=None, **values):
+    """memory.add: insert a memory straight into the stub table, return its mem_id."""
+    from sqlalchemy import insert
+
+    table = memory.client.table
+    row = {
+        "namespace": namespace,
+        "content": content,
+        "embedding": vector,
+        "meta": meta or {},
+    }
+    with memory.client.engine.begin() as conn:
+        result = conn.execute(insert(table).values({**row, **values}))
+    memory.embedder.vectors[content] = vector
+    return result.inserted_primary_key[0]
@@ -0,0 +1,94 @@
+import anyio
+import pytest
+from oceanbase_mcp.admission import (
+    PRIORITY_METADATA,
+    PRIORITY_REPORT,
+    AdmissionController,
+    AdmissionRejected,
+    parse_tool_limits,
+)
+
+
+def test_parse_tool_limits():
+    assert parse_tool_limits(" execute_sql=8, get_ob_ash_report=2,") == {
+        "execute_sql": 8,
+        "get_ob_ash_report": 2,
+    }
+    with pytest.raises(ValueError):
+        parse_tool_limits("execute_sql")
+
+
+def test_per_tool_limit_and_priority_order():
+    controller = AdmissionController(
+        max_in_flight=2, tool_limits={"report": 1}, max_queue=8
+    )
+    order = []
+
+    async def call(tool, priority, hold):
+        async with controller.admit(tool, priority):
+            order.append(tool)
+            await hold.wait()
+
+    async def main():
+        release = anyio.Event()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(call, "report", PRIORITY_REPORT, release)
+            await anyio.sleep(0.01)
+            # The report limit is reached, a second report waits while other tools run.
+            tg.start_soon(call, "report", PRIORITY_REPORT, release)
+            tg.start_soon(call, "sql", PRIORITY_REPORT, release)
+            await anyio.sleep(0.01)
+            assert controller.stats()["in_flight"] == 2
+            # The global limit is reached: a metadata call queues ahead of the waiting report.
+            tg.start_soon(call, "meta", PRIORITY_METADATA, release)
+            await anyio.sleep(0.01)
+            assert controller.queued == 2
+            release.set()
+        assert controller.in_flight == 0
+
+    anyio.run(main)
+    assert order == ["report", "sql", "meta", "report"]
+
+
+def test_full_queue_rejects_or_sheds_lower_priority():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, max_wait=5)
+    results = {}
+
+    async def call(name, priority, hold):
+        try:
+            async with controller.admit(name, priority):
+                await hold.wait()
+            results[name] = "ran"
+        except AdmissionRejected as e:
+            results[name] = str(e)
+
+    async def main():
+        release = anyio.Event()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(call, "running", PRIORITY_REPORT, release)
+            await anyio.sleep(0.01)
+            tg.start_soon(call, "queued_report", PRIORITY_REPORT, release)
+            await anyio.sleep(0.01)
+            tg.start_soon(call, "second_report", PRIORITY_REPORT, release)
+            await anyio.sleep(0.01)
+            tg.start_soon(call, "meta", PRIORITY_METADATA, release)
+            await anyio.sleep(0.01)
+            release.set()
+
+    anyio.run(main)
+    assert results["running"] == results["meta"] == "ran"
+    assert "rejected" in results["second_report"]
+    assert "dropped" in results["queued_report"]
+
+
+def test_wait_deadline():
+    controller = AdmissionController(max_in_flight=1, max_wait=0.05)
+
+    async def main():
+        async with controller.admit("sql"):
+            with pytest.raises(AdmissionRejected, match="waited"):
+                async with controller.admit("sql"):
+                    pass
+        assert controller.queued == 0 and controller.in_flight == 0
+
+    anyio.run(main)
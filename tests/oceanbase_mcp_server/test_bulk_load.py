@@ -0,0 +1,198 @@
+import io
+import json
+
+import pytest
+from oceanbase_mcp.bulk_load import (
+    LoadFailed,
+    ParallelLoader,
+    TableFile,
+    detect_load_format,
+    insert_statement,
+    load_data_statement,
+    map_columns,
+    select_columns,
+    write_load_data_file,
+)
+
+
+def test_detect_load_format():
+    assert detect_load_format("/data/orders.csv") == "csv"
+    assert detect_load_format("/data/orders.tsv") == "csv"
+    assert detect_load_format("/data/orders.jsonl") == "ndjson"
+    assert detect_load_format("/data/orders.bin", "PARQUET") == "parquet"
+    with pytest.raises(ValueError, match="Cannot tell"):
+        detect_load_format("/data/orders.bin")
+    with pytest.raises(ValueError, match="Unsupported"):
+        detect_load_format("/data/orders.csv", "xlsx")
+
+
+def test_csv_chunks(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text('id,note\n1,"a, b"\n2,\n3,c\n', encoding="utf-8")
+    table_file = TableFile(str(path))
+    assert table_file.columns == ["id", "note"]
+    assert list(table_file.chunks(2)) == [[("1", "a, b"), ("2", None)], [("3", "c")]]
+
+    # Without header line, the columns are given.
+    table_file = TableFile(str(path), columns=["a", "b"])
+    assert next(table_file.chunks(10))[0] == ("id", "note")
+
+    path.write_text("id,note\n1\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Line 2"):
+        list(TableFile(str(path)).chunks(10))
+
+
+def test_ndjson_chunks(tmp_path):
+    path = tmp_path / "events.ndjson"
+    lines = [{"id": 1, "tags": ["a"]}, {"id": 2}, {"id": 3, "tags": {"k": 1}}]
+    path.write_text(
+        "\n".join(json.dumps(line) for line in lines) + "\n\n", encoding="utf-8"
+    )
+    table_file = TableFile(str(path))
+    assert table_file.columns == ["id", "tags"]
+    assert list(table_file.chunks(10)) == [[(1, '["a"]'), (2, None), (3, '{"k": 1}')]]
+
+    path.write_text('{"id": 1}\n{"id": 2, "extra": 1}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="extra"):
+        list(TableFile(str(path)).chunks(10))
+    # Given columns are the ones read.
+    assert list(TableFile(str(path), columns=["id"]).chunks(10)) == [[(1,), (2,)]]
+
+
+def test_parquet_chunks(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    path = str(tmp_path / "orders.parquet")
+    table = pa.table({"id": [1, 2, 3], "price": [1.5, None, 2.0]})
+    pyarrow.parquet.write_table(table, path)
+    table_file = TableFile(path)
+    assert table_file.total_rows == 3
+    assert table_file.columns == ["id", "price"]
+    assert list(table_file.chunks(2)) == [[(1, 1.5), (2, None)], [(3, 2.0)]]
+
+
+def test_map_columns():
+    table = ["id", "Name", "created_at"]
+    assert map_columns(["ID", "name"], table) == [(0, "id"), (1, "Name")]
+    assert map_columns(
+        ["id", "ts", "junk"], table, {"ts": "created_at", "junk": None}
+    ) == [
+        (0, "id"),
+        (1, "created_at"),
+    ]
+    with pytest.raises(ValueError, match="not in the table"):
+        map_columns(["id", "junk"], table)
+    with pytest.raises(ValueError, match="the file has not"):
+        map_columns(["id"], table, {"missing": "id"})
+    with pytest.raises(ValueError, match="both map"):
+        map_columns(["id", "key"], table, {"key": "id"})
+
+    chunks = [[(1, "x", 2)], [(3, "y", 4)]]
+    assert list(select_columns(chunks, [0, 2])) == [[(1, 2)], [(3, 4)]]
+
+
+def test_statements():
+    assert insert_statement("db.t", ["id", "a`b"], 2) == (
+        "INSERT INTO `db`.`t` (`id`, `a``b`) VALUES (%s, %s), (%s, %s)"
+    )
+    statement = load_data_statement("t", ["id", "note"])
+    assert statement.startswith("LOAD DATA LOCAL INFILE %s INTO TABLE `t`")
+    assert statement.endswith("(`id`, `note`)")
+
+    f = io.StringIO()
+    write_load_data_file(f, [(1, None, 'say "hi"\n'), (True, "back\\slash", b"raw")])
+    assert f.getvalue() == '"1",\\N,"say \\"hi\\"\\n"\n1,"back\\\\slash","raw"\n'
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        if self.connection.fail_on is not None and self.connection.fail_on in params:
+            raise RuntimeError("duplicate key")
+        self.connection.pending.append(len(params) // 2)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, log, fail_on=None):
+        self.log = log
+        self.fail_on = fail_on
+        self.pending = []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.log.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        self.closed = True
+
+
+def test_parallel_loader_commits_each_chunk():
+    committed, connections, progress = [], [], []
+
+    def connect():
+        connections.append(FakeConnection(committed))
+        return connections[-1]
+
+    chunks = [
+        [(i, f"row {i}") for i in range(start, start + 10)]
+        for start in range(0, 100, 10)
+    ]
+    loader = ParallelLoader(connect, "t", ["id", "note"], workers=3)
+    result = loader.load(chunks, lambda rows, done, elapsed: progress.append(rows))
+    assert (result.rows, result.chunks) == (100, 10)
+    assert sorted(committed) == [10] * 10
+    assert 1 <= len(connections) <= 3 and all(c.closed for c in connections)
+    assert progress == sorted(progress) and progress[-1] == 100
+
+
+def test_parallel_loader_reports_committed_rows_on_failure():
+    committed = []
+
+    def chunks():
+        yield [(1, "a"), (2, "b")]
+        yield [(3, "c"), (4, "d")]
+        yield [(5, "bad"), (6, "e")]
+        yield [(7, "f")]
+
+    loader = ParallelLoader(
+        lambda: FakeConnection(committed, fail_on="bad"), "t", ["id", "x"], workers=1
+    )
+    with pytest.raises(LoadFailed, match="duplicate key") as failure:
+        loader.load(chunks())
+    # The chunk read ahead after the failing one may have been loaded before the load stopped.
+    assert failure.value.rows == sum(committed)
+    assert (failure.value.rows, failure.value.chunks) in ((4, 2), (5, 3))
+
+    with pytest.raises(ValueError, match="method"):
+        ParallelLoader(lambda: None, "t", ["id"], method="copy")
+
+
+def test_load_table_path(tmp_path, monkeypatch):
+    from oceanbase_mcp import server
+
+    (tmp_path / "orders.csv").write_text("id\n1\n")
+    (tmp_path.parent / "secret.csv").write_text("id\n1\n")
+    monkeypatch.setattr(server, "LOAD_TABLE_DIR", None)
+    with pytest.raises(ValueError, match="Set LOAD_TABLE_DIR"):
+        server._load_table_path(str(tmp_path / "orders.csv"))
+
+    monkeypatch.setattr(server, "LOAD_TABLE_DIR", str(tmp_path))
+    assert server._load_table_path("orders.csv") == str(tmp_path / "orders.csv")
+    with pytest.raises(ValueError, match="Only files under"):
+        server._load_table_path("../secret.csv")
+    with pytest.raises(ValueError, match="No such file"):
+        server._load_table_path("missing.csv")
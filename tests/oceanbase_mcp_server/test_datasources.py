@@ -0,0 +1,114 @@
+import json
+import sys
+import types
+
+import pytest
+from oceanbase_mcp.datasources import (
+    DataSource,
+    DataSourceRegistry,
+    load_datasources_file,
+    parse_datasources,
+)
+
+CONFIG = {
+    "default": "ap",
+    "datasources": {
+        "tp": {
+            "host": "10.0.0.1",
+            "user": "root@tp",
+            "password": "secret",
+            "database": "orders",
+        },
+        "ap": {
+            "host": "10.0.0.2",
+            "port": 2883,
+            "user": "root@ap",
+            "password_env": "AP_PASSWORD",
+            "pool_size": 8,
+            "read_host": "10.0.0.3",
+        },
+    },
+}
+
+
+def test_parse_datasources():
+    sources, default = parse_datasources(CONFIG, environ={"AP_PASSWORD": "from-env"})
+    assert default == "ap"
+    assert sources["tp"].connect_args() == {
+        "host": "10.0.0.1",
+        "port": 2881,
+        "user": "root@tp",
+        "password": "secret",
+        "database": "orders",
+    }
+    assert sources["ap"].password == "from-env"
+    assert sources["ap"].pool_size == 8
+    assert "password" not in sources["ap"].describe()
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"datasources": {"bad name": {"host": "h", "user": "u"}}},
+        {"datasources": {"tp": {"user": "u"}}},
+        {"datasources": {"tp": {"host": "h", "user": "u", "pool_size": 64}}},
+        {"default": "missing", "datasources": {"tp": {"host": "h", "user": "u"}}},
+    ],
+)
+def test_invalid_configs(config):
+    with pytest.raises(ValueError):
+        parse_datasources(config, environ={})
+
+
+def test_load_json_and_toml(tmp_path):
+    json_path = tmp_path / "datasources.json"
+    json_path.write_text(json.dumps(CONFIG))
+    toml_path = tmp_path / "datasources.toml"
+    toml_path.write_text(
+        'default = "tp"\n[datasources.tp]\nhost = "10.0.0.1"\nuser = "root@tp"\nport = 2881\n'
+    )
+    assert sorted(load_datasources_file(str(json_path), environ={})[0]) == ["ap", "tp"]
+    sources, default = load_datasources_file(str(toml_path), environ={})
+    assert default == "tp" and sources["tp"].host == "10.0.0.1"
+
+
+def test_toml_without_tomllib(tmp_path, monkeypatch):
+    # Python 3.10 has no tomllib, tomli may be installed instead.
+    toml_path = tmp_path / "datasources.toml"
+    toml_path.write_text("")
+    tomli = types.SimpleNamespace(load=lambda f: CONFIG)
+    monkeypatch.setitem(sys.modules, "tomllib", None)
+    monkeypatch.setitem(sys.modules, "tomli", tomli)
+    assert sorted(load_datasources_file(str(toml_path), environ={})[0]) == ["ap", "tp"]
+    monkeypatch.setitem(sys.modules, "tomli", None)
+    with pytest.raises(ImportError, match="tomli"):
+        load_datasources_file(str(toml_path), environ={})
+
+
+def test_registry_default_and_lookup():
+    registry = DataSourceRegistry()
+    registry.add(DataSource("tp", "10.0.0.1", 2881, "root"))
+    registry.add(DataSource("ap", "10.0.0.2", 2881, "root"))
+    # Without a default the first data source is used.
+    assert registry.get().name == "tp"
+    registry.add(DataSource("default", "127.0.0.1", 2881, "root"))
+    assert registry.get().name == "default"
+    registry.add(DataSource("default", "10.9.9.9", 2881, "root"), replace=False)
+    assert registry.get("default").host == "127.0.0.1"
+    assert registry.get("ap").host == "10.0.0.2"
+    with pytest.raises(ValueError, match="available"):
+        registry.get("missing")
+
+
+def test_read_routing():
+    sources, _ = parse_datasources(CONFIG, environ={})
+    assert not sources["tp"].read_routing
+    # A read endpoint implies read routing, the port defaults to the primary's.
+    ap = sources["ap"]
+    assert ap.read_routing
+    read_args = ap.read_connect_args()
+    assert (read_args["host"], read_args["port"]) == ("10.0.0.3", 2883)
+    assert "WEAK" in read_args["init_command"]
+    assert "init_command" not in ap.connect_args()
+    same_endpoint = DataSource("tp", "10.0.0.1", 2881, "root", read_routing=True)
+    assert same_endpoint.read_connect_args()["host"] == "10.0.0.1"
@@ -0,0 +1,62 @@
+from oceanbase_mcp.server import _sentence_embedding_dimension
+
+TRANSFORMER = {"type": "sentence_transformers.models.Transformer", "path": ""}
+POOLING = {"type": "sentence_transformers.models.Pooling", "path": "1_Pooling"}
+
+
+def reader(files):
+    return files.get
+
+
+def test_plain_transformers_model():
+    assert (
+        _sentence_embedding_dimension(reader({"config.json": {"hidden_size": 384}}))
+        == 384
+    )
+    assert _sentence_embedding_dimension(reader({})) is None
+
+
+def test_dense_projection():
+    files = {
+        "config.json": {"hidden_size": 768},
+        "modules.json": [
+            TRANSFORMER,
+            POOLING,
+            {"type": "sentence_transformers.models.Dense", "path": "2_Dense"},
+            {"type": "sentence_transformers.models.Dense", "path": "3_Dense"},
+            {"type": "sentence_transformers.models.Normalize", "path": "4_Normalize"},
+        ],
+        "1_Pooling/config.json": {
+            "word_embedding_dimension": 768,
+            "pooling_mode_mean_tokens": True,
+        },
+        "2_Dense/config.json": {"in_features": 768, "out_features": 3072},
+        "3_Dense/config.json": {"in_features": 3072, "out_features": 256},
+    }
+    assert _sentence_embedding_dimension(reader(files)) == 256
+    # The ONNX provider only runs the transformer.
+    assert _sentence_embedding_dimension(reader(files), pipeline=False) == 768
+
+
+def test_concatenated_pooling_modes():
+    files = {
+        "config.json": {"hidden_size": 384},
+        "modules.json": [TRANSFORMER, POOLING],
+        "1_Pooling/config.json": {
+            "word_embedding_dimension": 384,
+            "pooling_mode_mean_tokens": True,
+            "pooling_mode_max_tokens": True,
+        },
+    }
+    assert _sentence_embedding_dimension(reader(files)) == 768
+
+
+def test_unknown_module_needs_the_model():
+    files = {
+        "config.json": {"hidden_size": 384},
+        "modules.json": [
+            TRANSFORMER,
+            {"type": "custom.Projection", "path": "1_Projection"},
+        ],
+    }
+    assert _sentence_embedding_dimension(reader(files)) is None
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+from oceanbase_mcp.embedding_pool import EmbeddingPool, EmbeddingQueueFull
+
+
+class FakeModel:
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def embed_documents(self, texts):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(list(texts))
+        if "boom" in texts:
+            raise ValueError("inference failed")
+        return [[float(len(text))] for text in texts]
+
+
+def test_results_match_requests():
+    model = FakeModel()
+    pool = EmbeddingPool(model, workers=2)
+    assert pool.embed_query("abc") == [3.0]
+    assert pool.embed_documents(["a", "ab"]) == [[1.0], [2.0]]
+    assert pool.embed_documents([]) == []
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.embed_query("abc")
+
+
+def test_concurrent_requests_are_coalesced():
+    gate = threading.Event()
+    model = FakeModel(gate)
+    pool = EmbeddingPool(model, workers=1, max_batch=8, max_wait=0.05)
+    # The first request occupies the worker, the next ones queue up behind it.
+    first = pool.submit(["x"])
+    futures = [pool.submit(["a" * i]) for i in range(1, 6)]
+    gate.set()
+    assert first.result(5) == [[1.0]]
+    assert [future.result(5) for future in futures] == [
+        [[float(i)]] for i in range(1, 6)
+    ]
+    assert len(model.calls) <= 3
+    assert max(len(call) for call in model.calls) >= 2
+    pool.close()
+
+
+def test_failure_is_reported_to_every_request_of_the_batch():
+    pool = EmbeddingPool(FakeModel(), workers=1, max_wait=0)
+    with pytest.raises(ValueError):
+        pool.embed_documents(["ok", "boom"])
+    assert pool.embed_query("ok") == [2.0]
+    pool.close()
+
+
+def test_full_queue_rejects_fast():
+    gate = threading.Event()
+    pool = EmbeddingPool(FakeModel(gate), workers=1, max_batch=1, max_queue=1)
+    running = pool.submit(["a"])
+    # Wait until the worker took the first request off the queue.
+    for _ in range(500):
+        if running.running():
+            break
+        threading.Event().wait(0.01)
+    pool.submit(["b"])
+    with pytest.raises(EmbeddingQueueFull):
+        pool.submit(["c"])
+    gate.set()
+    pool.close()
@@ -0,0 +1,39 @@
+import pytest
+from oceanbase_mcp.fusion import (
+    min_max_normalize,
+    reciprocal_rank_fusion,
+    weighted_score_fusion,
+)
+
+
+def test_reciprocal_rank_fusion_deduplicates_and_ranks():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+    keys = [key for key, _ in fused]
+    assert keys[0] == 1
+    assert sorted(keys) == [1, 2, 3, 4]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_reciprocal_rank_fusion_weights():
+    fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[0.2, 0.8])
+    assert [key for key, _ in fused] == ["b", "a"]
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0])
+
+
+def test_min_max_normalize_distance():
+    assert min_max_normalize({"a": 0.1, "b": 0.5}, higher_is_better=False) == {
+        "a": 1.0,
+        "b": 0.0,
+    }
+    assert min_max_normalize({"a": 3.0, "b": 3.0}) == {"a": 1.0, "b": 1.0}
+    assert min_max_normalize({}) == {}
+
+
+def test_weighted_score_fusion():
+    distances = {1: 0.1, 2: 0.9}
+    text_scores = {2: 5.0, 3: 1.0}
+    fused = weighted_score_fusion(
+        [distances, text_scores], weights=[0.5, 0.5], higher_is_better=[False, True]
+    )
+    assert dict(fused) == {1: 0.5, 2: 0.5, 3: 0.0}
@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+
+LAZY_MODULES = ["bs4", "pyobvector", "sqlalchemy", "mysql.connector", "numpy"]
+
+
+def test_server_import_does_not_load_tool_dependencies():
+    code = (
+        "import json, sys\n"
+        "import oceanbase_mcp.server\n"
+        f"print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))\n"
+    )
+    env = {**os.environ, "ENABLE_MEMORY": "0", "PYTHONPATH": os.pathsep.join(sys.path)}
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from oceanbase_mcp.memory_cache import HotMemorySet, hot_results_confident
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_exact_top_k_within_namespace():
+    hot = HotMemorySet(capacity=8)
+    hot.put(1, "alice", "likes football", _unit(1, 0, 0))
+    hot.put(2, "alice", "likes tennis", _unit(1, 1, 0))
+    hot.put(3, "alice", "works in Shanghai", _unit(0, 0, 1))
+    hot.put(4, "bob", "likes football too", _unit(1, 0, 0))
+
+    results = hot.search("alice", _unit(1, 0.1, 0), topk=2)
+    assert [mem_id for mem_id, _, _ in results] == [1, 2]
+    assert results[0][1] == "likes football"
+    expected = np.linalg.norm(_unit(1, 0, 0) - _unit(1, 0.1, 0))
+    assert results[0][2] == pytest.approx(expected, abs=1e-5)
+    assert [mem_id for mem_id, _, _ in hot.search("bob", _unit(1, 0, 0), topk=5)] == [4]
+    assert hot.search("carol", _unit(1, 0, 0), topk=5) == []
+
+
+def test_write_through_and_discard():
+    hot = HotMemorySet(capacity=4)
+    hot.put(1, "alice", "likes coffee", _unit(1, 0))
+    hot.put(1, "alice", "likes tea", _unit(0, 1))
+    assert len(hot) == 1
+    assert hot.search("alice", _unit(0, 1), topk=1)[0][1] == "likes tea"
+    hot.discard([1, 99])
+    assert len(hot) == 0
+    assert hot.search("alice", _unit(0, 1), topk=1) == []
+
+
+def test_least_recently_used_is_replaced():
+    hot = HotMemorySet(capacity=2)
+    hot.put(1, "alice", "one", _unit(1, 0))
+    hot.put(2, "alice", "two", _unit(0, 1))
+    # A hit keeps memory 1 resident.
+    hot.search("alice", _unit(1, 0), topk=1)
+    hot.put(3, "alice", "three", _unit(1, 1))
+    assert sorted(
+        mem_id for mem_id, _, _ in hot.search("alice", _unit(1, 0), topk=5)
+    ) == [1, 3]
+
+
+def test_dimension_change_resets_and_disabled_set():
+    hot = HotMemorySet(capacity=2)
+    hot.put(1, "alice", "old model", _unit(1, 0))
+    hot.put(2, "alice", "new model", _unit(1, 0, 0))
+    assert len(hot) == 1
+    assert hot.search("alice", _unit(1, 0), topk=1) == []
+
+    disabled = HotMemorySet(capacity=0)
+    disabled.put(1, "alice", "ignored", _unit(1, 0))
+    assert not disabled.enabled
+    assert disabled.search("alice", _unit(1, 0), topk=1) == []
+
+
+def test_hot_results_confident():
+    results = [(1, "a", 0.1), (2, "b", 0.5)]
+    assert hot_results_confident(results, topk=2, max_distance=0.6)
+    assert not hot_results_confident(results, topk=2, max_distance=0.4)
+    assert not hot_results_confident(results, topk=3, max_distance=1.0)
@@ -0,0 +1,73 @@
+import pytest
+
+
+def test_insert_without_duplicates(memory):
+    memory.add("alice", "User likes coffee", [0.0, 0.0])
+    memory.embedder.vectors["User works in Shanghai"] = [5.0, 5.0]
+    result = memory.insert_deduplicated(
+        "alice", "User works in Shanghai", {"type": "work"}
+    )
+    assert result["action"] == "inserted"
+    assert memory.client.rows("content") == [
+        ("User likes coffee",),
+        ("User works in Shanghai",),
+    ]
+    # The embedding of the new memory is stored with it.
+    assert memory.client.rows("embedding")[-1] == ([5.0, 5.0],)
+
+
+def test_report_returns_duplicates_without_writing(memory):
+    mem_id = memory.add("alice", "User likes coffee", [0.0, 0.0])
+    memory.embedder.vectors["User loves coffee"] = [0.1, 0.0]
+    result = memory.insert_deduplicated("alice", "User loves coffee", {})
+    assert result["action"] == "duplicates_found"
+    assert [(c["mem_id"], c["content"]) for c in result["candidates"]] == [
+        (mem_id, "User likes coffee")
+    ]
+    assert result["candidates"][0]["distance"] == pytest.approx(0.1)
+    assert len(memory.client.rows("mem_id")) == 1
+
+
+def test_merge_overwrites_the_nearest_memory(memory):
+    far = memory.add("alice", "User drinks tea", [0.3, 0.0], {"type": "food"})
+    near = memory.add(
+        "alice", "User likes coffee", [0.0, 0.0], {"type": "food", "since": 2020}
+    )
+    memory.embedder.vectors["User loves strong coffee"] = [0.05, 0.0]
+    result = memory.insert_deduplicated(
+        "alice",
+        "User loves strong coffee",
+        {"strength": "strong"},
+        on_duplicate="merge",
+    )
+    assert result["action"] == "merged" and result["mem_id"] == near
+    rows = dict(
+        (mem_id, rest)
+        for mem_id, *rest in memory.client.rows("mem_id", "content", "meta")
+    )
+    assert rows[near] == [
+        "User loves strong coffee",
+        {"type": "food", "since": 2020, "strength": "strong"},
+    ]
+    assert rows[far] == ["User drinks tea", {"type": "food"}]
+
+
+def test_insert_writes_even_when_duplicated(memory):
+    memory.add("alice", "User likes coffee", [0.0, 0.0])
+    memory.embedder.vectors["User likes coffee!"] = [0.0, 0.0]
+    result = memory.insert_deduplicated(
+        "alice", "User likes coffee!", {}, on_duplicate="insert"
+    )
+    assert result["action"] == "inserted"
+    assert len(memory.client.rows("mem_id")) == 2
+
+
+def test_duplicates_of_other_namespaces_are_ignored(memory):
+    memory.add("bob", "User likes coffee", [0.0, 0.0])
+    result = memory.insert_deduplicated(
+        "alice", "User likes coffee", {}, on_duplicate="merge"
+    )
+    assert result["action"] == "inserted"
+    assert memory.client.rows("namespace") == [("bob",), ("alice",)]
+    with pytest.raises(ValueError, match="on_duplicate"):
+        memory.insert_deduplicated("alice", "x", {}, on_duplicate="replace")
@@ -0,0 +1,67 @@
+import pytest
+from oceanbase_mcp.memory_filters import (
+    compile_meta_filters,
+    generated_column_ddl,
+    parse_indexed_meta_keys,
+)
+from sqlalchemy import JSON, Column, Integer, MetaData, String, Table, select
+from sqlalchemy.dialects import mysql
+
+
+def _memory_table() -> Table:
+    return Table(
+        "ob_mcp_memory",
+        MetaData(),
+        Column("mem_id", Integer, primary_key=True),
+        Column("namespace", String(255)),
+        Column("meta", JSON),
+        Column("meta_type", String(255)),
+    )
+
+
+def _compile(table, clauses) -> str:
+    stmt = select(table.c.mem_id).where(*clauses)
+    return str(
+        stmt.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def test_parse_indexed_meta_keys():
+    assert parse_indexed_meta_keys(" type, category,type ") == ["type", "category"]
+    assert parse_indexed_meta_keys("") == []
+    with pytest.raises(ValueError):
+        parse_indexed_meta_keys("type,bad-key")
+
+
+def test_generated_column_ddl():
+    add_column, create_index = generated_column_ddl("ob_mcp_memory", "category")
+    assert "ADD COLUMN `meta_category` VARCHAR(255) GENERATED ALWAYS AS" in add_column
+    assert "'$.category'" in add_column
+    assert create_index.endswith("(namespace, `meta_category`)")
+
+
+def test_indexed_key_uses_generated_column():
+    table = _memory_table()
+    sql = _compile(table, compile_meta_filters(table, {"type": "preference"}))
+    assert "ob_mcp_memory.meta_type = 'preference'" in sql
+
+
+def test_other_keys_extract_from_meta():
+    table = _memory_table()
+    sql = _compile(
+        table, compile_meta_filters(table, {"category": ["work", "tech"], "done": True})
+    )
+    assert "JSON_EXTRACT(meta, '$.category')" in sql
+    assert "IN ('work', 'tech')" in sql
+    assert "'$.done')), 1, 255) = 'true'" in sql
+
+
+def test_invalid_filters():
+    table = _memory_table()
+    with pytest.raises(ValueError):
+        compile_meta_filters(table, {"a') OR 1=1 --": "x"})
+    with pytest.raises(ValueError):
+        compile_meta_filters(table, {"type": {"nested": 1}})
+    with pytest.raises(ValueError):
+        compile_meta_filters(table, {"type": []})
+    assert compile_meta_filters(table, None) == []
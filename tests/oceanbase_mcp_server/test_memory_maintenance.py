@@ -0,0 +1,123 @@
+from datetime import datetime
+
+OLD = datetime(2020, 1, 1)
+
+
+def test_compaction_is_off_by_default(memory):
+    memory.add("alice", "User likes coffee", [0.0, 0.0], updated_at=OLD)
+    memory.add("alice", "User loves coffee", [0.01, 0.0], updated_at=OLD)
+    assert memory.run_maintenance()["merged"] == 0
+    assert len(memory.client.rows("mem_id")) == 2
+
+
+def test_compaction_keeps_merged_contents(memory, memory_server, monkeypatch):
+    monkeypatch.setattr(memory_server, "MEMORY_COMPACT_DISTANCE", 0.15)
+    memory.add("alice", "User likes coffee", [0.0, 0.0], {"a": 1}, updated_at=OLD)
+    survivor = memory.add(
+        "alice",
+        "User loves coffee",
+        [0.05, 0.0],
+        {"b": 2},
+        updated_at=datetime(2021, 1, 1),
+    )
+    # Too far, and of another namespace.
+    memory.add("alice", "User drinks tea", [1.0, 0.0], updated_at=OLD)
+    memory.add("bob", "User likes coffee", [0.0, 0.0], updated_at=OLD)
+
+    assert memory.run_maintenance()["merged"] == 1
+    rows = memory.client.rows("mem_id", "namespace", "content", "meta")
+    assert [row[:3] for row in rows] == [
+        (survivor, "alice", "User loves coffee"),
+        (3, "alice", "User drinks tea"),
+        (4, "bob", "User likes coffee"),
+    ]
+    assert rows[0][3] == {"a": 1, "b": 2, "merged_contents": ["User likes coffee"]}
+
+
+def test_compaction_only_looks_at_changed_memories(memory, memory_server, monkeypatch):
+    monkeypatch.setattr(memory_server, "MEMORY_COMPACT_DISTANCE", 0.15)
+    memory.add("alice", "User likes coffee", [0.0, 0.0], updated_at=OLD)
+    assert memory.run_maintenance()["merged"] == 0
+
+    # Unchanged since the previous pass: left alone.
+    memory.add("alice", "User likes tea", [5.0, 5.0], updated_at=OLD)
+    memory.add("alice", "User loves tea", [5.0, 5.01], updated_at=OLD)
+    # Changed since: merged with its unchanged near-duplicate.
+    memory.add(
+        "alice", "User loves coffee", [0.0, 0.01], updated_at=datetime(2999, 1, 1)
+    )
+    assert memory.run_maintenance()["merged"] == 1
+    assert [row[0] for row in memory.client.rows("content")] == [
+        "User likes tea",
+        "User loves tea",
+        "User loves coffee",
+    ]
+
+
+def test_compaction_limits_rows_per_pass(memory, memory_server, monkeypatch):
+    monkeypatch.setattr(memory_server, "MEMORY_COMPACT_DISTANCE", 0.15)
+    monkeypatch.setattr(memory_server, "MEMORY_COMPACT_MAX_ROWS", 2)
+    for i in range(3):
+        memory.add("alice", f"Unique memory {i}", [10.0 * i, 0.0], updated_at=OLD)
+    memory.add("alice", "Unique memory 2 again", [20.0, 0.01], updated_at=OLD)
+    searched = []
+    search = memory_server._ann_search
+    monkeypatch.setattr(
+        memory_server,
+        "_ann_search",
+        lambda client, **kwargs: (
+            searched.append(kwargs["vec_data"]) or search(client, **kwargs)
+        ),
+    )
+    assert memory.run_maintenance()["merged"] == 0
+    assert len(searched) == 2
+    # The next pass continues where the previous one stopped.
+    assert memory.run_maintenance()["merged"] == 1
+    assert searched[2:] == [[20.0, 0.0], [20.0, 0.01]]
+    # Caught up: nothing changed since.
+    assert memory.run_maintenance()["merged"] == 0
+    assert len(searched) == 4
+
+
+def test_eviction_spares_memories_updated_meanwhile(memory, monkeypatch):
+    from sqlalchemy import update
+
+    memory.add(
+        "alice", "User visits Paris", [0.0, 0.0], {"ttl_days": 1}, updated_at=OLD
+    )
+    updated = memory.add(
+        "alice", "User visits Rome", [1.0, 0.0], {"ttl_days": 1}, updated_at=OLD
+    )
+    table = memory.client.table
+    scan = memory._scan
+
+    def scan_then_update(*args):
+        for rows in scan(*args):
+            # ob_memory_update between the scan and the delete.
+            with memory.client.engine.begin() as conn:
+                conn.execute(
+                    update(table)
+                    .where(table.c.mem_id == updated)
+                    .values(updated_at=datetime(2999, 1, 1))
+                )
+            yield rows
+
+    monkeypatch.setattr(memory, "_scan", scan_then_update)
+    assert memory.run_maintenance()["expired"] == 1
+    assert memory.client.rows("mem_id") == [(updated,)]
+
+
+def test_eviction_limits_rows_per_pass(memory, memory_server, monkeypatch):
+    monkeypatch.setattr(memory_server, "MEMORY_EVICT_MAX_ROWS", 2)
+    for i in range(3):
+        memory.add(
+            "alice", f"Event {i}", [float(i), 0.0], {"type": "event"}, updated_at=OLD
+        )
+    memory.add("alice", "User likes tea", [5.0, 0.0], updated_at=OLD)
+    monkeypatch.setattr(memory_server, "MEMORY_TTL_DAYS_BY_TYPE", {"event": 30})
+    assert memory.run_maintenance()["expired"] == 2
+    # The next pass continues with the following memories, then starts over.
+    assert memory.run_maintenance()["expired"] == 1
+    assert memory.run_maintenance()["expired"] == 0
+    assert memory._evict_after_id is None
+    assert memory.client.rows("content") == [("User likes tea",)]
@@ -0,0 +1,108 @@
+import pytest
+from oceanbase_mcp.memory_migration import (
+    EmbeddingSpace,
+    migration_target,
+    new_migration,
+    next_space,
+)
+
+
+def test_space_json_round_trip():
+    space = EmbeddingSpace("BAAI/bge-m3", 1024, "embedding_v2", "vidx_v2")
+    assert EmbeddingSpace.from_json(space.to_json()) == space
+    legacy = EmbeddingSpace.from_json({"model": None, "dimension": "384"})
+    assert legacy == EmbeddingSpace(None, 384, "embedding", "vidx")
+
+
+def test_next_space_generations():
+    first = EmbeddingSpace("BAAI/bge-small-en-v1.5", 384)
+    second = next_space(first, "BAAI/bge-m3", 1024)
+    assert second == EmbeddingSpace("BAAI/bge-m3", 1024, "embedding_v2", "vidx_v2")
+    third = next_space(second, "BAAI/bge-small-en-v1.5", 384)
+    assert (third.column, third.index) == ("embedding_v3", "vidx_v3")
+
+
+def test_migration_state():
+    target = EmbeddingSpace("BAAI/bge-m3", 1024, "embedding_v2", "vidx_v2")
+    migration = new_migration(target)
+    assert migration["checkpoint"] == 0
+    assert migration_target(migration) == target
+    assert migration_target(None) is None
+
+
+class FailingEmbedder:
+    """Embeds to (len(text), 1), raising on the calls numbered in fail_on."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if len(self.calls) in self.fail_on:
+            raise RuntimeError("embedding server down")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def migrating(memory, memory_server, monkeypatch):
+    """memory with 5 memories and a pending migration to new-model, in batches of 2."""
+    monkeypatch.setattr(memory_server, "MEMORY_MIGRATION_BATCH_SIZE", 2)
+    monkeypatch.setattr(memory_server, "MEMORY_MIGRATION_DROP_DELAY", 0)
+    for i in range(1, 6):
+        memory.add("alice", "memory" + "!" * i, [float(i), 0.0])
+    target = next_space(memory.space, "new-model", 2)
+    memory.state["active"] = memory.space.to_json()
+    memory.state["migration"] = new_migration(target)
+    memory._migration = target
+    memory.new_embedder = memory._embedding_clients["new-model"] = FailingEmbedder()
+    return memory
+
+
+def test_migration_resumes_from_its_checkpoint(migrating):
+    migrating.new_embedder.fail_on = {2}
+    with pytest.raises(RuntimeError, match="embedding server down"):
+        migrating.run_migration()
+    # The first batch and its checkpoint were committed together.
+    assert migrating.state["migration"]["checkpoint"] == 2
+    assert [row[0] for row in migrating.client.rows("embedding_v2")] == [
+        [7.0, 1.0],
+        [8.0, 1.0],
+        None,
+        None,
+        None,
+    ]
+
+    migrating.new_embedder.fail_on.clear()
+    migrating.new_embedder.calls.clear()
+    migrating.run_migration()
+    assert migrating.new_embedder.calls == [
+        ["memory!!!", "memory!!!!"],
+        ["memory!!!!!"],
+    ]
+
+
+def test_catch_up_pass_and_cutover(migrating):
+    # Rows 1-3 were re-embedded before a restart, then row 2 was rewritten, clearing its
+    # shadow vector.
+    migrating.state["migration"]["checkpoint"] = 3
+    with migrating.client.engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE ob_mcp_memory ADD COLUMN embedding_v2 TEXT")
+        conn.exec_driver_sql(
+            "UPDATE ob_mcp_memory SET embedding_v2 = '[0, 1]' WHERE mem_id <> 2"
+        )
+    migrating.client.vector_columns.append("embedding_v2")
+    migrating.client.table = migrating.client._build_table()
+
+    target = migrating.run_migration()
+    assert migrating.new_embedder.calls == [["memory!!!!", "memory!!!!!"], ["memory!!"]]
+    assert target == EmbeddingSpace("new-model", 2, "embedding_v2", "vidx_v2")
+    # Cut over: the state and the memory use the new space, the old column and index are gone.
+    assert migrating.state == {"active": target.to_json()}
+    assert migrating.space == target
+    assert migrating.client.indexes == {"vidx_v2"}
+    assert migrating.client.vector_columns == ["embedding_v2"]
+    assert "embedding" not in migrating.client.table.c
+    assert all(
+        vector is not None for (vector,) in migrating.client.rows("embedding_v2")
+    )
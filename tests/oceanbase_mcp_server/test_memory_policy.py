@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+from oceanbase_mcp.memory_policy import (
+    memory_expired,
+    merge_metas,
+    merged_contents,
+    parse_ttl_days_by_type,
+    should_rebuild_index,
+)
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def test_parse_ttl_days_by_type():
+    assert parse_ttl_days_by_type("") == {}
+    assert parse_ttl_days_by_type('{"event": 30, "*": 365}') == {
+        "event": 30.0,
+        "*": 365.0,
+    }
+    with pytest.raises(ValueError):
+        parse_ttl_days_by_type("[1, 2]")
+
+
+def test_expires_at_takes_precedence():
+    meta = {"expires_at": "2025-05-31", "ttl_days": 1000}
+    assert memory_expired(meta, NOW, NOW)
+    assert not memory_expired({"expires_at": "2025-06-02T00:00:00"}, NOW, NOW)
+
+
+def test_ttl_days_and_type_policies():
+    updated_at = NOW - timedelta(days=10)
+    assert memory_expired({"ttl_days": 7}, updated_at, NOW)
+    assert not memory_expired({"ttl_days": 30}, updated_at, NOW)
+    policies = {"event": 5, "*": 365}
+    assert memory_expired({"type": "event"}, updated_at, NOW, policies)
+    assert not memory_expired({"type": "preference"}, updated_at, NOW, policies)
+    assert not memory_expired({"type": "event"}, updated_at, NOW)
+
+
+def test_merge_metas_keeps_survivor_keys():
+    assert merge_metas(
+        {"category": "sports"}, [{"category": "food", "source": "chat"}]
+    ) == {
+        "category": "sports",
+        "source": "chat",
+    }
+
+
+def test_merged_contents_keeps_every_content_once():
+    assert merged_contents(
+        "User likes coffee",
+        {"merged_contents": ["User drinks coffee"]},
+        [
+            (
+                "User loves coffee",
+                {"merged_contents": ["User likes coffee", "Coffee fan"]},
+            ),
+            ("User drinks coffee", None),
+        ],
+    ) == ["User drinks coffee", "Coffee fan", "User loves coffee"]
+
+
+def test_should_rebuild_index():
+    assert not should_rebuild_index(0, 100, 0.2)
+    assert not should_rebuild_index(10, 90, 0.2)
+    assert should_rebuild_index(20, 80, 0.2)
@@ -0,0 +1,34 @@
+import pytest
+from oceanbase_mcp.memory_scope import (
+    DEFAULT_NAMESPACE,
+    MAX_NAMESPACE_LENGTH,
+    resolve_namespace,
+    token_client_id,
+)
+
+
+def test_token_client_id_is_stable_and_hides_token():
+    client_id = token_client_id("secret-token")
+    assert client_id == token_client_id("secret-token")
+    assert client_id != token_client_id("other-token")
+    assert "secret" not in client_id
+
+
+def test_unauthenticated_namespace():
+    assert resolve_namespace(None) == DEFAULT_NAMESPACE
+    assert resolve_namespace(None, "  ") == DEFAULT_NAMESPACE
+    assert resolve_namespace(None, "agent-a") == "agent-a"
+
+
+def test_authenticated_caller_is_confined():
+    assert resolve_namespace("token-abc") == "token-abc"
+    assert resolve_namespace("token-abc", "agent-a") == "token-abc/agent-a"
+    # Requesting another caller's namespace only creates a sub namespace of one's own.
+    assert resolve_namespace("token-abc", "token-def") == "token-abc/token-def"
+
+
+def test_invalid_namespaces():
+    with pytest.raises(ValueError):
+        resolve_namespace(None, "a\nb")
+    with pytest.raises(ValueError):
+        resolve_namespace(None, "x" * (MAX_NAMESPACE_LENGTH + 1))
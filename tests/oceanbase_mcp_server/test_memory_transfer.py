@@ -0,0 +1,129 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+from oceanbase_mcp.memory_transfer import (
+    MemoryFileWriter,
+    detect_format,
+    make_header,
+    read_batches,
+    read_header,
+)
+
+
+def _records(count, with_embeddings=True):
+    records = []
+    for i in range(count):
+        record = {
+            "content": f"User likes item {i}",
+            "meta": {"type": "preference", "rank": i},
+            "updated_at": datetime(2025, 1, 1, 12, 0, i),
+        }
+        if with_embeddings:
+            record["embedding"] = np.array([i, 0.5, -1.0], dtype=np.float32)
+        records.append(record)
+    return records
+
+
+def test_detect_format():
+    assert detect_format("/tmp/memories.parquet") == "parquet"
+    assert detect_format("/tmp/memories.jsonl") == "jsonl"
+    assert detect_format("/tmp/memories.txt", "PARQUET") == "parquet"
+    with pytest.raises(ValueError):
+        detect_format("/tmp/memories.csv", "csv")
+
+
+@pytest.mark.parametrize("file_format", ["jsonl", "parquet"])
+def test_round_trip_in_batches(tmp_path, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"memories.{file_format}")
+    header = make_header("BAAI/bge-small-en-v1.5", 3, with_embeddings=True)
+    records = _records(5)
+    with MemoryFileWriter(path, file_format, header) as writer:
+        writer.write_batch(records[:3])
+        writer.write_batch(records[3:])
+    assert writer.rows == 5
+    assert read_header(path, file_format) == header
+
+    batches = list(read_batches(path, file_format, batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    loaded = [record for batch in batches for record in batch]
+    assert [record["content"] for record in loaded] == [r["content"] for r in records]
+    assert loaded[4]["meta"] == {"type": "preference", "rank": 4}
+    assert loaded[4]["updated_at"] == "2025-01-01 12:00:04"
+    np.testing.assert_array_equal(
+        np.asarray(loaded[4]["embedding"]), records[4]["embedding"]
+    )
+
+
+def test_jsonl_without_embeddings_or_header(tmp_path):
+    path = tmp_path / "plain.jsonl"
+    path.write_text(
+        '{"content": "User works in Shanghai", "meta": {}}\n\n', encoding="utf-8"
+    )
+    assert read_header(str(path), "jsonl") == {}
+    (batch,) = read_batches(str(path), "jsonl", batch_size=10)
+    assert batch == [{"content": "User works in Shanghai", "meta": {}}]
+
+
+def test_failed_export_removes_partial_file(tmp_path):
+    path = tmp_path / "memories.jsonl"
+    header = make_header("model", 3, with_embeddings=False)
+    with pytest.raises(RuntimeError):
+        with MemoryFileWriter(str(path), "jsonl", header) as writer:
+            writer.write_batch(_records(2, with_embeddings=False))
+            raise RuntimeError("connection lost")
+    assert not path.exists()
+
+
+@pytest.fixture
+def transfer_dir(memory, memory_server, monkeypatch, tmp_path):
+    directory = tmp_path / "transfer"
+    directory.mkdir()
+    monkeypatch.setattr(memory_server, "ob_memory", memory)
+    monkeypatch.setattr(memory_server, "MEMORY_TRANSFER_DIR", str(directory))
+    return directory
+
+
+def test_tools_refuse_without_transfer_dir(memory_server, transfer_dir, monkeypatch):
+    monkeypatch.setattr(memory_server, "MEMORY_TRANSFER_DIR", None)
+    with pytest.raises(ValueError, match="MEMORY_TRANSFER_DIR"):
+        memory_server.ob_memory_export("memories.jsonl")
+    with pytest.raises(ValueError, match="MEMORY_TRANSFER_DIR"):
+        memory_server.ob_memory_import("memories.jsonl")
+
+
+def test_tools_only_access_the_transfer_dir(memory_server, transfer_dir, tmp_path):
+    (transfer_dir / "escape").symlink_to(tmp_path)
+    for path in (
+        "../memories.jsonl",
+        str(tmp_path / "memories.jsonl"),
+        "escape/memories.jsonl",
+    ):
+        with pytest.raises(ValueError, match="Only files under"):
+            memory_server.ob_memory_export(path)
+        with pytest.raises(ValueError, match="Only files under"):
+            memory_server.ob_memory_import(path)
+    assert not (tmp_path / "memories.jsonl").exists()
+
+
+def test_export_does_not_overwrite_unless_asked(memory, memory_server, transfer_dir):
+    memory.add(memory_server.MEMORY_DEFAULT_NAMESPACE, "User likes coffee", [0.0, 1.0])
+    exported = json.loads(memory_server.ob_memory_export("memories.jsonl"))
+    assert exported["exported"] == 1
+    with pytest.raises(ValueError, match="already exists"):
+        memory_server.ob_memory_export("memories.jsonl")
+    assert json.loads(memory_server.ob_memory_export("memories.jsonl", overwrite=True))[
+        "exported"
+    ]
+
+    imported = json.loads(
+        memory_server.ob_memory_import("memories.jsonl", namespace="copy")
+    )
+    assert (imported["imported"], imported["reused_embeddings"]) == (1, 1)
+    assert memory.client.rows("namespace", "content")[-1] == (
+        "copy",
+        "User likes coffee",
+    )
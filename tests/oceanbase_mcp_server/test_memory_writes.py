@@ -0,0 +1,180 @@
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+from oceanbase_mcp.memory_writes import PendingWrite, WriteBehindQueue
+
+
+class Recorder:
+    def __init__(self, fail=0, poison=()):
+        self.batches = []
+        self.fail = fail
+        self.poison = set(poison)
+
+    def __call__(self, writes):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("database unavailable")
+        if any(write.content in self.poison for write in writes):
+            raise ValueError("data too long")
+        self.batches.append(list(writes))
+
+
+def test_updates_of_a_memory_are_coalesced():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, interval=60, batch_size=10)
+    queue.submit(PendingWrite("alice", "likes coffee", {}))
+    queue.submit(PendingWrite("alice", "likes tea", {}, mem_id=7))
+    queue.submit(PendingWrite("alice", "likes green tea", {}, mem_id=7))
+    queue.submit(PendingWrite("alice", "likes coffee", {}))
+    assert len(queue) == 3
+    assert queue.flush() == 3
+    assert [write.content for write in recorder.batches[0]] == [
+        "likes coffee",
+        "likes green tea",
+        "likes coffee",
+    ]
+    assert queue.flush() == 0
+
+
+def test_sync_flushes_only_for_pending_namespace():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, interval=60)
+    queue.submit(PendingWrite("alice", "likes coffee", {}))
+    queue.sync("bob")
+    assert recorder.batches == []
+    queue.sync("alice")
+    assert len(recorder.batches) == 1
+    assert not queue.has_pending("alice")
+
+
+def test_failed_flush_keeps_writes():
+    recorder = Recorder(fail=1)
+    queue = WriteBehindQueue(recorder, interval=60)
+    queue.submit(PendingWrite("alice", "likes tea", {}, mem_id=1))
+    assert queue.flush() == 0
+    assert len(queue) == 1
+    # A newer update queued after the failure replaces the failed one.
+    queue.submit(PendingWrite("alice", "likes coffee", {}, mem_id=1))
+    queue.submit(PendingWrite("alice", "works in Shanghai", {}))
+    assert queue.flush() == 2
+    assert [write.content for write in recorder.batches[0]] == [
+        "likes coffee",
+        "works in Shanghai",
+    ]
+
+
+def test_background_flush_on_batch_size_and_close():
+    flushed = threading.Event()
+    batches = []
+
+    def flush(writes):
+        batches.append(list(writes))
+        flushed.set()
+
+    queue = WriteBehindQueue(flush, interval=60, batch_size=2)
+    queue.start()
+    queue.submit(PendingWrite("alice", "one", {}))
+    queue.submit(PendingWrite("alice", "two", {}))
+    assert flushed.wait(5)
+    queue.submit(PendingWrite("alice", "three", {}))
+    queue.close()
+    assert [write.content for batch in batches for write in batch] == [
+        "one",
+        "two",
+        "three",
+    ]
+    with pytest.raises(RuntimeError):
+        queue.submit(PendingWrite("alice", "four", {}))
+
+
+def test_submit_flushes_inline_when_too_many_pending():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, interval=60, batch_size=2, max_pending=3)
+    for i in range(3):
+        queue.submit(PendingWrite("alice", f"memory {i}", {}))
+    assert len(recorder.batches) == 1
+    assert len(queue) == 0
+    assert not WriteBehindQueue(recorder, interval=0).enabled
+
+
+def test_failing_write_does_not_hold_back_the_others(caplog):
+    recorder = Recorder(poison={"bad"})
+    queue = WriteBehindQueue(recorder, interval=60, max_attempts=2)
+    for content in ("one", "bad", "two"):
+        queue.submit(PendingWrite("alice", content, {}))
+    # The batch fails, its writes are stored one by one.
+    assert queue.flush() == 2
+    assert [batch[0].content for batch in recorder.batches] == ["one", "two"]
+    assert [write.content for write in queue._pending.values()] == ["bad"]
+
+    # sync does not raise, the write is dropped after max_attempts and logged in full.
+    queue.sync("alice")
+    assert len(queue) == 0
+    assert "content='bad'" in caplog.text
+    queue.sync("alice")
+
+
+def test_submit_never_raises_for_an_accepted_write():
+    recorder = Recorder(fail=10)
+    queue = WriteBehindQueue(recorder, interval=60, batch_size=1, max_pending=2)
+    assert queue.submit(PendingWrite("alice", "one", {})) == 1
+    # The inline flush fails, the write stays queued instead of being submitted again.
+    assert queue.submit(PendingWrite("alice", "two", {})) == 2
+    assert len(queue) == 2
+    recorder.fail = 0
+    assert queue.flush() == 2
+
+
+def test_close_logs_writes_it_could_not_store(caplog):
+    queue = WriteBehindQueue(Recorder(fail=10), interval=60)
+    queue.submit(PendingWrite("alice", "likes tea", {}, mem_id=3))
+    queue.close()
+    assert len(queue) == 0
+    assert "mem_id=3 content='likes tea'" in caplog.text
+
+
+def test_update_of_unknown_memory_is_not_queued(memory_server, memory, monkeypatch):
+    monkeypatch.setattr(memory_server, "ob_memory", memory)
+    memory.write_queue = WriteBehindQueue(memory.write_pending, interval=60)
+    mem_id = memory.add("alice", "User likes coffee", [0.0, 0.0])
+    update = memory_server.ob_memory_update
+
+    assert (
+        update(mem_id + 1, "User likes tea", {}, "alice")
+        == f"Memory {mem_id + 1} not found"
+    )
+    assert update(mem_id, "User likes tea", {}, "bob") == f"Memory {mem_id} not found"
+    assert len(memory.write_queue) == 0
+
+    assert update(mem_id, "User likes tea", {}, "alice") == "Update queued"
+    assert memory.write_queue.flush() == 1
+    assert memory.client.rows("content") == [("User likes tea",)]
+
+
+def test_sigterm_stores_queued_writes(memory_server, memory, monkeypatch):
+    monkeypatch.setattr(memory_server, "ob_memory", memory)
+    monkeypatch.setattr(memory, "warmup_in_background", lambda: None)
+    monkeypatch.setattr(memory, "start_maintenance", lambda interval: None)
+    monkeypatch.setattr(sys, "argv", ["oceanbase_mcp"])
+    memory.write_queue = WriteBehindQueue(memory.write_pending, interval=60)
+    mem_id = memory.add("alice", "User likes coffee", [0.0, 0.0])
+    assert memory_server.ob_memory_update(mem_id, "User likes tea", {}, "alice") == (
+        "Update queued"
+    )
+
+    def run(transport):
+        os.kill(os.getpid(), signal.SIGTERM)
+        time.sleep(5)
+
+    monkeypatch.setattr(memory_server.app, "run", run)
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        with pytest.raises(SystemExit):
+            memory_server.main()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    assert memory.client.rows("content") == [("User likes tea",)]
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+from oceanbase_mcp.onnx_embeddings import (
+    normalize,
+    pool_embeddings,
+    quantized_model_path,
+    read_pooling_mode,
+)
+
+
+def test_read_pooling_mode():
+    assert read_pooling_mode({"pooling_mode_cls_token": True}) == "cls"
+    assert read_pooling_mode({"pooling_mode_mean_tokens": True}) == "mean"
+    assert read_pooling_mode({"pooling_mode_max_tokens": True}) == "max"
+    assert read_pooling_mode(None) == "mean"
+    with pytest.raises(ValueError):
+        read_pooling_mode({"pooling_mode_mean_sqrt_len_tokens": True})
+    with pytest.raises(ValueError):
+        read_pooling_mode(
+            {"pooling_mode_cls_token": True, "pooling_mode_mean_tokens": True}
+        )
+
+
+def test_quantized_model_path_follows_the_source_model(tmp_path):
+    model = tmp_path / "model.onnx"
+    model.write_bytes(b"v1")
+    cache = str(tmp_path / "cache")
+    path = quantized_model_path(str(model), "BAAI/bge-small-en-v1.5", cache)
+    assert path.startswith(os.path.join(cache, "BAAI__bge-small-en-v1.5"))
+    assert quantized_model_path(str(model), "BAAI/bge-small-en-v1.5", cache) == path
+
+    model.write_bytes(b"v2 re-exported")
+    assert quantized_model_path(str(model), "BAAI/bge-small-en-v1.5", cache) != path
+    other = tmp_path / "other.onnx"
+    other.write_bytes(b"v2 re-exported")
+    os.utime(other, ns=(model.stat().st_atime_ns, model.stat().st_mtime_ns))
+    assert quantized_model_path(str(other), "BAAI/bge-small-en-v1.5", cache) != (
+        quantized_model_path(str(model), "BAAI/bge-small-en-v1.5", cache)
+    )
+
+
+def test_pooling_ignores_padding():
+    hidden = np.array(
+        [
+            [[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]],
+            [[5.0, 6.0], [-100.0, -100.0], [-100.0, -100.0]],
+        ],
+        dtype=np.float32,
+    )
+    mask = np.array([[1, 1, 0], [1, 0, 0]])
+    np.testing.assert_allclose(
+        pool_embeddings(hidden, mask, "mean"), [[2.0, 3.0], [5.0, 6.0]]
+    )
+    np.testing.assert_allclose(
+        pool_embeddings(hidden, mask, "max"), [[3.0, 4.0], [5.0, 6.0]]
+    )
+    np.testing.assert_allclose(
+        pool_embeddings(hidden, mask, "cls"), [[1.0, 2.0], [5.0, 6.0]]
+    )
+
+
+def test_normalize():
+    embeddings = normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    np.testing.assert_allclose(embeddings, [[0.6, 0.8], [0.0, 0.0]])
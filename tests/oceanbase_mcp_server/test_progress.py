@@ -0,0 +1,79 @@
+import decimal
+import json
+import time
+
+import anyio
+from oceanbase_mcp.progress import (
+    PARTIAL_ROWS_META_KEY,
+    ProgressReporter,
+    progress_requested,
+    report_progress,
+    run_with_progress,
+)
+
+
+def run_reported(call, interval=0.05, max_partial_rows=3):
+    sent = []
+
+    async def send(progress, total, message, meta):
+        sent.append((progress, total, message, meta))
+
+    async def main():
+        reporter = ProgressReporter(
+            send, interval=interval, max_partial_rows=max_partial_rows
+        )
+        return await run_with_progress(call, reporter, "tool")
+
+    return anyio.run(main), sent
+
+
+def test_partial_rows_and_monotonic_progress():
+    def call():
+        assert progress_requested()
+        columns = ["id", "price"]
+        first = [[1, decimal.Decimal("1.5")], [2, None]]
+        report_progress("Fetched 2 rows", 2, columns=columns, rows=first)
+        report_progress(
+            "Fetched 4 rows", 4, columns=columns, rows=[[3, None], [4, None]]
+        )
+        # Without rows, reports within the interval are dropped.
+        report_progress("Fetched 4 rows", 4)
+        return "result"
+
+    result, sent = run_reported(call, interval=10)
+    assert result == "result"
+    assert [progress for progress, _, _, _ in sent] == [2, 4]
+    batches = [meta[PARTIAL_ROWS_META_KEY] for _, _, _, meta in sent]
+    assert batches[0] == {"columns": ["id", "price"], "rows": [[1, "1.5"], [2, None]]}
+    # At most max_partial_rows rows are sent ahead.
+    assert batches[1]["rows"] == [[3, None]]
+
+
+def test_heartbeat_while_blocked():
+    def call():
+        time.sleep(0.3)
+        report_progress("Done", 1000)
+        return 1
+
+    _, sent = run_reported(call)
+    heartbeats = [message for _, _, message, _ in sent if "running for" in message]
+    assert heartbeats
+    progress = [progress for progress, _, _, _ in sent]
+    assert progress == sorted(set(progress))
+
+
+def test_no_reporter():
+    async def main():
+        return await run_with_progress(lambda: progress_requested(), None, "tool")
+
+    assert anyio.run(main) is False
+    # Outside a reported call progress is a no-op.
+    report_progress("ignored", 1)
+
+
+def test_tool_called_outside_of_a_request():
+    from oceanbase_mcp.server import app
+
+    # Without a request there is no progress token to report to, the tool just runs.
+    content, _ = anyio.run(app.call_tool, "list_datasources", {})
+    assert json.loads(content[0].text)[0]["default"] is True
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from oceanbase_mcp.query_log import (
+    QueryRecorder,
+    instrument_engine,
+    note_result,
+    recorded,
+    result_bytes,
+)
+
+
+class FakeCursor:
+    rowcount = 3
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return ("YB42-0005F1D2-ABCD",)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(FakeCursor())
+        return self.cursors[-1]
+
+
+def test_ring_buffer_and_filters():
+    recorder = QueryRecorder(capacity=3, slow_ms=100)
+    for i, elapsed in enumerate([5, 150, 20, 300]):
+        recorder.record(
+            f"SELECT * FROM t{i % 2} WHERE id = {i}", elapsed, client_id=f"c{i % 2}"
+        )
+    records = recorder.recent()
+    # The oldest record was dropped, newest come first.
+    assert [r.elapsed_ms for r in records] == [300, 20, 150]
+    assert [r.elapsed_ms for r in recorder.recent(min_elapsed_ms=100)] == [300, 150]
+    digest = records[0].digest
+    assert records[0].sql == "SELECT * FROM t1 WHERE id = ?"
+    assert [r.elapsed_ms for r in recorder.recent(digest=digest)] == [300, 150]
+    assert [r.elapsed_ms for r in recorder.recent(client_id="c0")] == [20]
+
+
+def test_recorded_slow_statement_reads_trace_id():
+    recorder = QueryRecorder(slow_ms=0)
+    connection = FakeConnection()
+    cursor = connection.cursor()
+    with recorded(recorder, cursor, "SELECT 1", datasource="tp", connection=connection):
+        rows = [(1, "abc"), (2, None)]
+        note_result(len(rows), result_bytes(rows))
+    record = recorder.recent()[0]
+    assert (record.rows, record.bytes, record.datasource) == (2, 5, "tp")
+    assert record.trace_id == "YB42-0005F1D2-ABCD"
+    # Read on a cursor of its own, the results of the caller's cursor are left alone.
+    assert cursor.executed == []
+    assert connection.cursors[1].executed == ["SELECT last_trace_id()"]
+
+
+def test_recorded_error_and_fast_statement():
+    recorder = QueryRecorder(slow_ms=10_000)
+    cursor = FakeCursor()
+    with pytest.raises(RuntimeError):
+        with recorded(recorder, cursor, "UPDATE t SET a = 1"):
+            raise RuntimeError("lock wait timeout")
+    record = recorder.recent()[0]
+    # Without a noted result the row count of the cursor is used.
+    assert (record.rows, record.error, record.trace_id) == (
+        3,
+        "lock wait timeout",
+        None,
+    )
+    assert cursor.executed == []
+
+
+def test_rotating_file(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    recorder = QueryRecorder(capacity=0, path=str(path), max_bytes=400, backup_count=1)
+    for i in range(10):
+        recorder.record(f"SELECT {i}", 1.0)
+    assert recorder.recent() == []
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[-1])["sql"] == "SELECT ?"
+    assert (tmp_path / "queries.jsonl.1").exists()
+
+
+def test_instrument_engine():
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    engine = sqlalchemy.create_engine("sqlite://")
+    recorder = QueryRecorder(slow_ms=0)
+    instrument_engine(engine, recorder, "memory", client_id=lambda: "token-1")
+    instrument_engine(engine, recorder, "memory")
+    with engine.connect() as conn:
+        conn.execute(sqlalchemy.text("SELECT 1 WHERE 2 > :x"), {"x": 1}).fetchall()
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            conn.execute(sqlalchemy.text("SELECT * FROM missing"))
+    failed, ok = recorder.recent()
+    assert ok.sql == "SELECT ? WHERE ? > ?" and ok.client_id == "token-1"
+    # SQLite has no last_trace_id(), the record is kept without one.
+    assert ok.trace_id is None
+    assert "missing" in failed.error
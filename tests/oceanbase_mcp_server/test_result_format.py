@@ -0,0 +1,49 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from oceanbase_mcp.result_format import (
+    TRUNCATED_SUFFIX,
+    dump_results,
+    row_to_record,
+    scalar_column_names,
+)
+from pyobvector import VECTOR
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+
+def test_scalar_column_names_skip_vectors():
+    table = Table(
+        "docs",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("content", String(100)),
+        Column("embedding", VECTOR(3)),
+    )
+    assert scalar_column_names(table) == ["id", "content"]
+
+
+def test_row_to_record_truncates_long_text():
+    record = row_to_record((1, "a" * 10, b"bytes", 0.5), ["id", "content", "raw"], 4)
+    assert record == {
+        "id": 1,
+        "content": "aaaa" + TRUNCATED_SUFFIX,
+        "raw": "byte" + TRUNCATED_SUFFIX,
+    }
+
+
+def test_dump_results_is_json():
+    output = dump_results(
+        "docs",
+        [{"id": 1, "price": Decimal("1.50"), "created": datetime(2024, 1, 1)}],
+        query="apple",
+    )
+    payload = json.loads(output)
+    assert payload["table"] == "docs"
+    assert payload["query"] == "apple"
+    assert payload["count"] == 1
+    assert payload["results"][0] == {
+        "id": 1,
+        "price": "1.50",
+        "created": "2024-01-01 00:00:00",
+    }
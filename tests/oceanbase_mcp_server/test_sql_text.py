@@ -0,0 +1,78 @@
+import pytest
+from oceanbase_mcp.sql_text import (
+    first_keyword,
+    is_read_only,
+    normalize_sql,
+    sql_digest,
+)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM t",
+        "  -- latest orders\nselect id from orders where note = 'for update';",
+        "/* report */ SHOW TABLES",
+        "DESC t",
+        "EXPLAIN SELECT 1",
+        "WITH x AS (SELECT 1) SELECT * FROM x",
+        "SELECT /*+ READ_CONSISTENCY(WEAK) */ `delete` FROM t",
+        "SELECT @x, 'into @y := get_lock(' FROM t",
+    ],
+)
+def test_read_only_statements(sql):
+    assert is_read_only(sql)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "INSERT INTO t VALUES (1)",
+        "SELECT * FROM t FOR UPDATE",
+        "select * from t lock in share mode",
+        "SELECT * FROM t INTO OUTFILE '/tmp/t.csv'",
+        "SELECT 1; DROP TABLE t",
+        "WITH x AS (SELECT 1) DELETE FROM t",
+        "SELECT 1 INTO @x",
+        "SELECT id, name FROM t LIMIT 1 INTO @id, @name",
+        "SELECT @x := 1",
+        "SELECT GET_LOCK('a', 1)",
+        "select release_lock ('a')",
+        "SET autocommit = 0",
+        "",
+    ],
+)
+def test_statements_needing_the_primary(sql):
+    assert not is_read_only(sql)
+
+
+def test_first_keyword_keeps_hints():
+    assert first_keyword("# comment\n  select 1") == "SELECT"
+    assert first_keyword("/*+ parallel(4) */ select 1") == ""
+
+
+def test_normalize_sql():
+    assert (
+        normalize_sql("SELECT * FROM t  WHERE id = 42 AND name = 'bob' -- who\n;")
+        == "SELECT * FROM t WHERE id = ? AND name = ?"
+    )
+    assert normalize_sql("select a-1 from t where id in (1, 2, 3)") == (
+        "select a-? from t where id in (...)"
+    )
+    assert (
+        normalize_sql("INSERT INTO t VALUES (1, 'x'), (2, 'y')")
+        == "INSERT INTO t VALUES (...)"
+    )
+    # Hints and quoted identifiers are kept, placeholders of any paramstyle are values.
+    assert normalize_sql("SELECT /*+ PARALLEL(4) */ `c1` FROM t WHERE v = %(v)s") == (
+        "SELECT /*+ PARALLEL(4) */ `c1` FROM t WHERE v = ?"
+    )
+
+
+def test_sql_digest_ignores_values_and_case():
+    assert sql_digest("SELECT * FROM t WHERE id = 1") == sql_digest(
+        "select *  from t where id=2"
+    )
+    assert sql_digest("SELECT * FROM t WHERE id = 1") != sql_digest(
+        "SELECT * FROM u WHERE id = 1"
+    )
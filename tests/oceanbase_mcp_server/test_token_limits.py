@@ -0,0 +1,88 @@
+import pytest
+from oceanbase_mcp.token_limits import (
+    MemoryUsageStore,
+    QuotaExceeded,
+    TokenBucket,
+    TokenLimiter,
+    TokenLimits,
+    record_rows,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.take() == 0
+
+
+def test_rate_and_concurrency_limits():
+    limiter = TokenLimiter(TokenLimits(rate=1, burst=2, max_concurrent=1))
+    with limiter.call("a"):
+        with pytest.raises(QuotaExceeded, match="concurrent"):
+            with limiter.call("a"):
+                pass
+        # Other tokens are not affected.
+        with limiter.call("b"):
+            pass
+    with limiter.call("a"):
+        pass
+    with pytest.raises(QuotaExceeded, match="Rate limit"):
+        with limiter.call("a"):
+            pass
+    assert limiter.usage("a")["running"] == 0
+
+
+def test_daily_quotas_reset_per_day():
+    clock = FakeClock()
+    limiter = TokenLimiter(
+        TokenLimits(daily_rows=10),
+        overrides={"big": TokenLimits(daily_rows=100)},
+        store=MemoryUsageStore(),
+        clock=clock,
+    )
+    for client_id in ("small", "big"):
+        with limiter.call(client_id):
+            with limiter.metered(client_id) as usage:
+                record_rows(12)
+                usage.nbytes = 100
+    assert limiter.usage("small") == {"rows": 12, "bytes": 100, "running": 0}
+    # The call crossing the quota completed, the next one is rejected.
+    with pytest.raises(QuotaExceeded, match="row quota"):
+        with limiter.call("small"):
+            pass
+    with limiter.call("big"):
+        pass
+    clock.now += 24 * 3600
+    with limiter.call("small"):
+        pass
+
+
+def test_failed_calls_are_not_charged():
+    limiter = TokenLimiter(TokenLimits(daily_bytes=10))
+    with pytest.raises(ZeroDivisionError):
+        with limiter.metered("a"):
+            record_rows(5)
+            1 / 0
+    assert limiter.usage("a")["rows"] == 0
+    # Outside a metered call record_rows is a no-op.
+    record_rows(5)
+
+
+def test_limits_from_dict():
+    base = TokenLimits(rate=5, daily_rows=1000)
+    limits = TokenLimits.from_dict({"daily_rows": 10}, base=base)
+    assert (limits.rate, limits.daily_rows) == (5, 10)
+    assert not TokenLimits().enabled
+    with pytest.raises(ValueError, match="Unknown"):
+        TokenLimits.from_dict({"qps": 1})
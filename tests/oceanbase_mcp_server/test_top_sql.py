@@ -0,0 +1,38 @@
+import pytest
+from oceanbase_mcp.top_sql import build_top_sql_query
+
+
+def test_sql_audit_query():
+    sql, params = build_top_sql_query("sql_audit", "cpu", window_minutes=30, top_n=5)
+    assert "FROM oceanbase.GV$OB_SQL_AUDIT" in sql
+    assert "ORDER BY cpu_us DESC" in sql
+    assert "IS_EXECUTOR_RPC = 0" in sql
+    assert "TENANT_ID = %s" not in sql
+    assert params == (1800, 5)
+    assert sql.count("%s") == len(params)
+
+
+def test_plan_cache_query_with_tenant():
+    sql, params = build_top_sql_query(
+        "plan_cache", "executions", 15, 10, tenant_id=1002
+    )
+    assert "FROM oceanbase.GV$OB_PLAN_CACHE_PLAN_STAT" in sql
+    assert "LAST_ACTIVE_TIME >= DATE_SUB(NOW(), INTERVAL %s SECOND)" in sql
+    assert "ORDER BY executions DESC" in sql
+    assert params == (900, 1002, 10)
+    assert sql.count("%s") == len(params)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"source": "ash"},
+        {"order_by": "elapsed; DROP TABLE t"},
+        {"window_minutes": 0},
+        {"window_minutes": 100000},
+        {"top_n": 1000},
+    ],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        build_top_sql_query(**kwargs)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from oceanbase_mcp.vector_codec import (
+    decode_base64_vector,
+    encode_base64_vector,
+    resolve_vector,
+    vector_literal,
+)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_base64_round_trip(dtype):
+    vector = [0.5, -1.25, 2.0]
+    decoded = decode_base64_vector(encode_base64_vector(vector, dtype), dtype)
+    assert decoded.tolist() == vector
+
+
+def test_decode_rejects_bad_payloads():
+    with pytest.raises(ValueError):
+        decode_base64_vector("AAA", "float32")  # 2 bytes
+    with pytest.raises(ValueError):
+        decode_base64_vector("not base64!", "float32")
+    with pytest.raises(ValueError):
+        decode_base64_vector(encode_base64_vector([1.0]), "float64")
+
+
+def test_vector_literal():
+    assert vector_literal([0.5, 1]) == "[0.5,1.0]"
+    assert vector_literal(np.array([0.5, 1.0], dtype=np.float16)) == "[0.5,1.0]"
+    with pytest.raises(ValueError):
+        vector_literal([float("nan")])
+
+
+def test_vector_literal_of_float32_array_uses_shortest_repr():
+    vector = np.array([0.1, 1 / 3, -2.5, 1e-30], dtype=np.float32)
+    literal = vector_literal(vector)
+    assert literal == "[0.1,0.33333334,-2.5,1e-30]"
+    assert np.array(literal[1:-1].split(","), dtype=np.float32).tolist() == (
+        vector.tolist()
+    )
+    embedding = np.random.default_rng(0).standard_normal(1024).astype(np.float32)
+    assert len(vector_literal(embedding)) < 12 * 1024
+
+
+def test_resolve_vector():
+    assert resolve_vector([1.0], None) == [1.0]
+    assert resolve_vector(None, encode_base64_vector([1.0])).tolist() == [1.0]
+    with pytest.raises(ValueError):
+        resolve_vector([1.0], encode_base64_vector([1.0]))
+    with pytest.raises(ValueError):
+        resolve_vector(None, None)
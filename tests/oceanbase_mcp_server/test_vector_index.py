@@ -0,0 +1,169 @@
+import pytest
+from oceanbase_mcp import server
+from oceanbase_mcp.server import _build_vidx_params, _execute_ann_sql
+
+
+def test_build_hnsw_params():
+    assert (
+        _build_vidx_params("l2", "hnsw", m=16, ef_construction=200)
+        == "distance=l2, type=hnsw, lib=vsag, m=16, ef_construction=200"
+    )
+
+
+def test_build_ivf_params():
+    assert (
+        _build_vidx_params("cosine", "ivf_pq", nlist=128, m=8)
+        == "distance=cosine, type=ivf_pq, lib=ob, nlist=128, m=8"
+    )
+
+
+def test_build_params_rejects_mismatched_knobs():
+    with pytest.raises(ValueError):
+        _build_vidx_params("l2", "ivf_flat", ef_construction=200)
+    with pytest.raises(ValueError):
+        _build_vidx_params("l2", "hnsw", nlist=16)
+    with pytest.raises(ValueError):
+        _build_vidx_params("manhattan", "hnsw")
+
+
+def test_build_params_checks_lib():
+    assert (
+        _build_vidx_params("l2", "hnsw", lib="VSAG")
+        == "distance=l2, type=hnsw, lib=vsag"
+    )
+    with pytest.raises(ValueError, match="Unsupported vector index lib"):
+        _build_vidx_params("l2", "hnsw", lib="vsag) ; DROP TABLE t; --")
+    with pytest.raises(ValueError, match="lib=ob"):
+        _build_vidx_params("l2", "ivf_flat", lib="vsag")
+
+
+class RecordingConnection:
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.fail_on = fail_on
+
+    def exec_driver_sql(self, sql):
+        self.statements.append(sql)
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"failed: {sql}")
+        return self
+
+    def scalar(self):
+        return 64
+
+    def fetchall(self):
+        return [(1,)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_ef_search_is_set_and_restored():
+    conn = RecordingConnection()
+    assert _execute_ann_sql(conn, "SELECT 1", 200) == [(1,)]
+    assert conn.statements == [
+        "SELECT @@ob_hnsw_ef_search",
+        "SET @@ob_hnsw_ef_search = 200",
+        "SELECT 1",
+        "SET @@ob_hnsw_ef_search = 64",
+    ]
+
+    # Restored as well when the search fails, before the session returns to the pool.
+    conn = RecordingConnection(fail_on="SELECT 1")
+    with pytest.raises(RuntimeError):
+        _execute_ann_sql(conn, "SELECT 1", 200)
+    assert conn.statements[-1] == "SET @@ob_hnsw_ef_search = 64"
+
+    conn = RecordingConnection()
+    _execute_ann_sql(conn, "SELECT 1", None)
+    assert conn.statements == ["SELECT 1"]
+
+
+CREATE_DOCS = """CREATE TABLE `docs` (
+  `id` int(11) NOT NULL,
+  `embedding` VECTOR(3) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  VECTOR KEY `vidx` (`embedding`) WITH (DISTANCE=COSINE, TYPE=HNSW, LIB=VSAG, M=32, EF_CONSTRUCTION=400) BLOCK_SIZE 16384
+) DEFAULT CHARSET = utf8mb4"""
+
+
+class StubVecClient:
+    def __init__(self, fail_create=(), fail_on=None):
+        self.fail_create = set(fail_create)
+        self.calls = []
+        self.conn = RecordingConnection(fail_on)
+        self.conn.fetchone = lambda: ("docs", CREATE_DOCS)
+        self.engine = self
+
+    def connect(self):
+        return self.conn
+
+    def create_index(
+        self, table_name, is_vec_index, index_name, column_names, vidx_params
+    ):
+        self.calls.append(("create", index_name, column_names[0], vidx_params))
+        if index_name in self.fail_create:
+            raise RuntimeError("out of memory")
+
+    def drop_index(self, table_name, index_name):
+        self.calls.append(("drop", index_name))
+
+
+def test_rebuild_with_new_params_replaces_the_index(monkeypatch):
+    client = StubVecClient()
+    monkeypatch.setattr(server, "_get_vec_client", lambda datasource=None: client)
+    result = server.rebuild_vector_index("docs", "vidx", index_type="hnsw_sq")
+    assert "recreated" in result
+    # The distance of the old index is kept, its HNSW parameters too for an HNSW type.
+    params = "distance=cosine, type=hnsw_sq, lib=vsag, m=32, ef_construction=400"
+    assert client.calls == [
+        ("create", "vidx_rebuild", "embedding", params),
+        ("drop", "vidx"),
+    ]
+    assert client.conn.statements == [
+        "SHOW CREATE TABLE `docs`",
+        "ALTER TABLE `docs` RENAME INDEX `vidx_rebuild` TO `vidx`",
+    ]
+
+
+def test_rebuild_to_another_index_family_keeps_the_distance(monkeypatch):
+    client = StubVecClient()
+    monkeypatch.setattr(server, "_get_vec_client", lambda datasource=None: client)
+    server.rebuild_vector_index("docs", "vidx", index_type="ivf_flat", nlist=64)
+    assert client.calls[0][3] == "distance=cosine, type=ivf_flat, lib=ob, nlist=64"
+    server.rebuild_vector_index("docs", "vidx", distance="l2", m=8)
+    assert client.calls[2][3] == (
+        "distance=l2, type=hnsw, lib=vsag, m=8, ef_construction=400"
+    )
+    with pytest.raises(ValueError, match="No vector index"):
+        server.rebuild_vector_index("docs", "missing", distance="l2")
+
+
+def test_failed_rebuild_keeps_the_old_index(monkeypatch):
+    client = StubVecClient(fail_create={"vidx_rebuild"})
+    monkeypatch.setattr(server, "_get_vec_client", lambda datasource=None: client)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        server.rebuild_vector_index("docs", "vidx", "embedding", index_type="hnsw_sq")
+    assert [call[:2] for call in client.calls] == [("create", "vidx_rebuild")]
+
+
+def test_failed_rename_builds_the_index_under_its_name(monkeypatch):
+    client = StubVecClient(fail_on="RENAME INDEX")
+    monkeypatch.setattr(server, "_get_vec_client", lambda datasource=None: client)
+    assert "recreated" in server.rebuild_vector_index(
+        "docs", "vidx", index_type="hnsw_sq"
+    )
+    assert [call[:2] for call in client.calls] == [
+        ("create", "vidx_rebuild"),
+        ("drop", "vidx"),
+        ("create", "vidx"),
+        ("drop", "vidx_rebuild"),
+    ]
+
+    client = StubVecClient(fail_create={"vidx"}, fail_on="RENAME INDEX")
+    monkeypatch.setattr(server, "_get_vec_client", lambda datasource=None: client)
+    with pytest.raises(RuntimeError, match="now named vidx_rebuild"):
+        server.rebuild_vector_index("docs", "vidx", index_type="hnsw_sq")